@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of IntelMQ's messages, pipelines and representative bots.
+
+Every benchmark runs in a separate process and reports the throughput in events per second,
+the 50th and 99th percentile of the latency of the single operations (a message, a report
+or a batch) and the peak resident set size of the process.
+The bots run in the library mode with the Pythonlistsimple pipeline, the redis benchmarks
+need a local redis server and are skipped if it is not reachable.
+
+The results are written as JSON. Give the results of a previous run with `--compare`
+to let the script fail if the throughput of a benchmark dropped by more than `--max-regression`.
+"""
+import argparse
+import datetime
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import traceback
+from typing import Any, List, Optional
+
+import intelmq
+import intelmq.lib.utils as utils
+from intelmq.lib import codec, exceptions, pipeline
+from intelmq.lib.bot import BotLibSettings
+from intelmq.lib.message import MessageFactory, load_harmonization
+
+EVENT = {
+    '__type': 'Event',
+    'feed.name': 'Benchmark',
+    'feed.url': 'https://example.com/feed.csv',
+    'time.observation': '2026-01-01T00:00:00+00:00',
+    'time.source': '2025-12-31T23:59:59+00:00',
+    'source.ip': '192.0.2.1',
+    'source.port': 23,
+    'source.fqdn': 'host.example.com',
+    'source.asn': 64496,
+    'source.geolocation.cc': 'AT',
+    'protocol.transport': 'tcp',
+    'protocol.application': 'telnet',
+    'classification.type': 'vulnerable-system',
+    'classification.identifier': 'accessible-telnet',
+    'extra.tag': 'telnet',
+    'raw': utils.base64_encode('"2025-12-31 23:59:59","192.0.2.1","tcp",23'),
+}
+REPORT = {
+    '__type': 'Report',
+    'feed.name': 'Benchmark',
+    'feed.url': 'https://example.com/feed.csv',
+    'time.observation': '2026-01-01T00:00:00+00:00',
+}
+SHADOWSERVER_HEADER = ('"timestamp","ip","protocol","port","hostname","tag","asn","geo","region","city",'
+                       '"naics","sic","banner"\n')
+SHADOWSERVER_ROW = ('"2025-12-31 23:59:59","{ip}","tcp",23,"host{index}.example.com","telnet",64496,"AT",'
+                    '"REGION","CITY",0,0,"|Login:"\n')
+SIEVE_RULES = """
+if :exists source.fqdn && source.fqdn =~ '.*\\.example\\.com$' {
+    add comment = 'example'
+}
+if source.ip << ['198.51.100.0/24', '203.0.113.0/24'] {
+    drop
+} elif source.asn == 64496 {
+    update classification.identifier = 'benchmark'
+}
+if classification.type == 'vulnerable-system' {
+    keep
+}
+"""
+LOGGER = logging.getLogger('benchmark')
+LOGGER.addHandler(logging.NullHandler())
+
+
+def ip_address(index: int) -> str:
+    return f'10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}'
+
+
+class Benchmark:
+    """
+    Base class of the benchmarks.
+
+    `setup` prepares the input items, `run` processes a single item and is timed.
+    """
+    name: str = None
+    group: str = None
+    description: str = None
+
+    def __init__(self, options: argparse.Namespace):
+        self.options = options
+        self.harmonization = load_harmonization()
+
+    def setup(self) -> List[Any]:
+        raise NotImplementedError
+
+    def run(self, item: Any) -> Optional[int]:
+        """
+        Returns the number of processed events, if not 1.
+        """
+        raise NotImplementedError
+
+    def teardown(self):
+        pass
+
+    def events(self) -> List[dict]:
+        return [dict(EVENT, **{'source.ip': ip_address(index)}) for index in range(self.options.count)]
+
+
+class MessageConstructBenchmark(Benchmark):
+    name = 'message.construct'
+    group = 'message'
+    description = 'Events created from dictionaries, sanitizing and validating all values'
+
+    def setup(self):
+        return self.events()
+
+    def run(self, item):
+        MessageFactory.from_dict(item, harmonization=self.harmonization)
+
+
+class MessageSerializeBenchmark(Benchmark):
+    name = 'message.serialize'
+    group = 'message'
+    description = 'Events serialized with the given codec'
+    codec = 'json'
+
+    def setup(self):
+        self.codec_instance = codec.get_codec(self.codec)
+        return [MessageFactory.from_dict(event, harmonization=self.harmonization) for event in self.events()]
+
+    def run(self, item):
+        MessageFactory.serialize(item, codec=self.codec_instance)
+
+
+class MessageSerializeMsgpackBenchmark(MessageSerializeBenchmark):
+    name = 'message.serialize.msgpack'
+    codec = 'msgpack'
+
+
+class MessageUnserializeBenchmark(Benchmark):
+    name = 'message.unserialize'
+    group = 'message'
+    description = 'Serialized events decoded and validated'
+    codec = 'json'
+    trusted = False
+
+    def setup(self):
+        codec_instance = codec.get_codec(self.codec)
+        return [MessageFactory.serialize(MessageFactory.from_dict(event, harmonization=self.harmonization),
+                                         codec=codec_instance)
+                for event in self.events()]
+
+    def run(self, item):
+        MessageFactory.unserialize(item, harmonization=self.harmonization, trusted=self.trusted)
+
+
+class MessageUnserializeTrustedBenchmark(MessageUnserializeBenchmark):
+    name = 'message.unserialize.trusted'
+    trusted = True
+
+
+class MessageUnserializeMsgpackBenchmark(MessageUnserializeBenchmark):
+    name = 'message.unserialize.msgpack'
+    codec = 'msgpack'
+
+
+class BotBenchmark(Benchmark):
+    """
+    Runs a bot in the library mode, `run` processes one input message.
+    """
+    group = 'bot'
+    module: str = None
+    parameters: dict = {}
+
+    def setup(self):
+        self.directory = tempfile.TemporaryDirectory()
+        bot_class = getattr(__import__(self.module, fromlist=['BOT']), 'BOT')
+        bot_id = self.name.replace('.', '-').replace('_', '-')
+        try:
+            self.bot = bot_class(bot_id, settings=BotLibSettings | {'logging_level': 'ERROR'} | self.parameters_())
+        except ValueError as exc:
+            # the bot stops if the initialization failed, report missing dependencies as such
+            cause = exc.__context__
+            while cause is not None:
+                if isinstance(cause, exceptions.MissingDependencyError):
+                    raise cause
+                cause = cause.__context__
+            raise
+        return [MessageFactory.from_dict(message, harmonization=self.harmonization) for message in self.messages()]
+
+    def parameters_(self) -> dict:
+        return self.parameters
+
+    def messages(self) -> List[dict]:
+        return self.events()
+
+    def run(self, item):
+        output = self.bot.process_message(item).get('output', ())
+        # output bots do not send messages, count the input instead
+        return None if self.group == 'output' else len(output)
+
+    def teardown(self):
+        self.bot.shutdown()
+        self.directory.cleanup()
+
+
+class ParserBenchmark(BotBenchmark):
+    """
+    Parses reports of `--report-lines` lines each.
+    """
+    group = 'parser'
+    file_name = None
+
+    def messages(self):
+        reports = []
+        lines = self.options.report_lines
+        for start in range(0, self.options.count, lines):
+            report = dict(REPORT, raw=utils.base64_encode(self.report(start, min(lines, self.options.count - start))))
+            if self.file_name:
+                report['extra.file_name'] = self.file_name
+            reports.append(report)
+        return reports
+
+    def report(self, start: int, count: int) -> str:
+        raise NotImplementedError
+
+
+class ShadowserverParserBenchmark(ParserBenchmark):
+    name = 'parser.shadowserver'
+    description = 'Shadowserver CSV reports (Accessible Telnet, test schema)'
+    module = 'intelmq.bots.parsers.shadowserver.parser'
+    parameters = {'test_mode': True}
+    file_name = '2026-01-01-test_telnet-test.csv'
+
+    def report(self, start, count):
+        return SHADOWSERVER_HEADER + ''.join(SHADOWSERVER_ROW.format(ip=ip_address(index), index=index)
+                                             for index in range(start, start + count))
+
+
+class GenericCsvParserBenchmark(ParserBenchmark):
+    name = 'parser.generic_csv'
+    description = 'Generic CSV reports'
+    module = 'intelmq.bots.parsers.generic.parser_csv'
+    parameters = {'columns': ['time.source', 'source.ip', 'source.port', 'source.fqdn', '__IGNORE__', 'extra.tag'],
+                  'type': 'vulnerable-system', 'skip_header': True}
+
+    def report(self, start, count):
+        return 'time,ip,port,hostname,asn,tag\n' + ''.join(
+            f'2025-12-31T23:59:59+00:00,{ip_address(index)},23,host{index}.example.com,64496,telnet\n'
+            for index in range(start, start + count))
+
+
+class JsonStreamParserBenchmark(ParserBenchmark):
+    name = 'parser.json_stream'
+    description = 'Reports of events in JSON, one per line'
+    module = 'intelmq.bots.parsers.json.parser'
+    parameters = {'splitlines': True}
+
+    def report(self, start, count):
+        event = {key: value for key, value in EVENT.items()
+                 if not key.startswith('feed.') and key not in ('__type', 'raw', 'time.observation')}
+        return ''.join(json.dumps(dict(event, **{'source.ip': ip_address(index)})) + '\n'
+                       for index in range(start, start + count))
+
+
+class SieveExpertBenchmark(BotBenchmark):
+    name = 'expert.sieve'
+    group = 'expert'
+    description = 'Sieve expert with string, network, numeric and existence rules'
+    module = 'intelmq.bots.experts.sieve.expert'
+
+    def parameters_(self):
+        path = os.path.join(self.directory.name, 'benchmark.sieve')
+        with open(path, 'w') as handle:
+            handle.write(SIEVE_RULES)
+        return {'file': path}
+
+
+class ModifyExpertBenchmark(BotBenchmark):
+    name = 'expert.modify'
+    group = 'expert'
+    description = 'Modify expert with the example configuration'
+    module = 'intelmq.bots.experts.modify.expert'
+
+    def parameters_(self):
+        return {'configuration_path': os.path.join(os.path.dirname(intelmq.__file__),
+                                                   'bots/experts/modify/examples/default.conf')}
+
+
+class FileOutputBenchmark(BotBenchmark):
+    name = 'output.file'
+    group = 'output'
+    description = 'File output writing JSON lines'
+    module = 'intelmq.bots.outputs.file.output'
+
+    def parameters_(self):
+        return {'file': os.path.join(self.directory.name, 'events.txt')}
+
+
+class SqlOutputBenchmark(BotBenchmark):
+    name = 'output.sql'
+    group = 'output'
+    description = 'SQL output inserting into an SQLite database'
+    module = 'intelmq.bots.outputs.sql.output'
+
+    def parameters_(self):
+        import sqlite3
+
+        path = os.path.join(self.directory.name, 'events.sqlite')
+        with sqlite3.connect(path) as connection:
+            columns = ', '.join(f'"{key}" TEXT' for key in sorted(self.harmonization['event']))
+            connection.execute(f'CREATE TABLE events ({columns})')
+        return {'engine': 'sqlite', 'database': path}
+
+
+class RedisBenchmark(Benchmark):
+    """
+    Pipeline operations on a local redis server.
+    """
+    group = 'redis'
+    batch_size = 1
+
+    def setup(self):
+        self.source_queue = 'intelmq-benchmark-source'
+        self.destination_queue = 'intelmq-benchmark-destination'
+        arguments = {'source_pipeline_batch_size': self.batch_size,
+                     'destination_pipeline_batch_size': self.batch_size}
+        for direction in ('source', 'destination'):
+            arguments[f'{direction}_pipeline_host'] = self.options.redis_host
+            arguments[f'{direction}_pipeline_port'] = self.options.redis_port
+            arguments[f'{direction}_pipeline_db'] = self.options.redis_db
+            arguments[f'{direction}_pipeline_password'] = self.options.redis_password
+        self.pipe = pipeline.PipelineFactory.create(LOGGER, broker='Redis', pipeline_args=arguments)
+        self.pipe.load_configurations('source')
+        self.pipe.set_queues(self.source_queue, 'source')
+        self.pipe.set_queues(self.destination_queue, 'destination')
+        self.pipe.connect()
+        self.clear()
+        self.messages = [MessageFactory.serialize(MessageFactory.from_dict(event, harmonization=self.harmonization))
+                         for event in self.events()]
+        return self.items()
+
+    def items(self) -> List[Any]:
+        raise NotImplementedError
+
+    def clear(self):
+        for queue in (self.source_queue, self.pipe.internal_queue, self.destination_queue):
+            self.pipe.clear_queue(queue)
+
+    def teardown(self):
+        self.clear()
+        self.pipe.disconnect()
+
+
+class RedisSendBenchmark(RedisBenchmark):
+    name = 'redis.send'
+    description = 'Messages sent to a queue'
+
+    def items(self):
+        return self.messages
+
+    def run(self, item):
+        self.pipe.send(item)
+
+
+class RedisHopBenchmark(RedisBenchmark):
+    name = 'redis.hop'
+    description = 'Messages received, decoded, encoded, sent and acknowledged like a bot does'
+
+    def items(self):
+        self.pipe.pipe.lpush(self.source_queue, *self.messages)
+        return [1] * len(self.messages)
+
+    def run(self, item):
+        message = MessageFactory.unserialize(self.pipe.receive(), harmonization=self.harmonization)
+        self.pipe.send(MessageFactory.serialize(message))
+        self.pipe.flush()
+        self.pipe.acknowledge()
+
+
+class RedisHopBatchBenchmark(RedisHopBenchmark):
+    name = 'redis.hop.batch'
+    description = 'Like redis.hop, with batches of `--batch-size` messages'
+
+    def setup(self):
+        self.batch_size = self.options.batch_size
+        return super().setup()
+
+    def items(self):
+        super().items()
+        return [min(self.batch_size, len(self.messages) - start)
+                for start in range(0, len(self.messages), self.batch_size)]
+
+    def run(self, item):
+        messages = self.pipe.receive_batch(item)
+        for raw_message in messages:
+            message = MessageFactory.unserialize(raw_message, harmonization=self.harmonization)
+            self.pipe.send(MessageFactory.serialize(message))
+        self.pipe.flush()
+        for _ in messages:
+            self.pipe.acknowledge()
+        return len(messages)
+
+
+BENCHMARKS = {benchmark.name: benchmark for benchmark in (
+    MessageConstructBenchmark, MessageSerializeBenchmark, MessageSerializeMsgpackBenchmark,
+    MessageUnserializeBenchmark, MessageUnserializeTrustedBenchmark, MessageUnserializeMsgpackBenchmark,
+    ShadowserverParserBenchmark, GenericCsvParserBenchmark, JsonStreamParserBenchmark,
+    SieveExpertBenchmark, ModifyExpertBenchmark, FileOutputBenchmark, SqlOutputBenchmark,
+    RedisSendBenchmark, RedisHopBenchmark, RedisHopBatchBenchmark)}
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """ Nearest-rank percentile of the sorted values. """
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def peak_rss() -> int:
+    """ Peak resident set size of the process in KiB. """
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss // 1024 if sys.platform == 'darwin' else maxrss
+
+
+def run_benchmark(name: str, options: argparse.Namespace) -> dict:
+    benchmark = BENCHMARKS[name](options)
+    result = {'name': name, 'group': benchmark.group, 'description': benchmark.description}
+    try:
+        items = benchmark.setup()
+    except (exceptions.MissingDependencyError, ImportError) as exc:
+        result['skipped'] = f'Missing dependency: {exc}'
+        return result
+    except Exception as exc:
+        if benchmark.group == 'redis':
+            result['skipped'] = f'Redis is not available: {exc}'
+            return result
+        raise
+    try:
+        # at most a tenth of the items, e.g. for parsers with few large reports
+        warmup = min(options.warmup, len(items) // 10)
+        for item in items[:warmup]:
+            benchmark.run(item)
+        items = items[warmup:]
+        latencies = []
+        events = 0
+        start = time.perf_counter()
+        for item in items:
+            item_start = time.perf_counter()
+            count = benchmark.run(item)
+            latencies.append(time.perf_counter() - item_start)
+            events += 1 if count is None else count
+        duration = time.perf_counter() - start
+    finally:
+        benchmark.teardown()
+    latencies.sort()
+    result.update({
+        'operations': len(latencies),
+        'events': events,
+        'seconds': round(duration, 6),
+        'events_per_second': round(events / duration, 1) if duration else None,
+        'latency_p50_us': round(percentile(latencies, 50) * 1e6, 1) if latencies else None,
+        'latency_p99_us': round(percentile(latencies, 99) * 1e6, 1) if latencies else None,
+        'peak_rss_kib': peak_rss(),
+    })
+    return result
+
+
+def _child(name: str, options: argparse.Namespace, queue):
+    # keep stdout clean for the results, the bots log to stdout
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    try:
+        queue.put(run_benchmark(name, options))
+    except Exception:
+        queue.put({'name': name, 'error': traceback.format_exc()})
+
+
+def run_isolated(name: str, options: argparse.Namespace) -> dict:
+    """
+    Runs the benchmark in a new process, for an independent peak memory usage.
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(name, options, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def compare(results: List[dict], baseline: dict, max_regression: float) -> List[str]:
+    """
+    Returns the benchmarks with a throughput below the baseline by more than max_regression.
+    """
+    previous = {result['name']: result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(result['name'], {}).get('events_per_second')
+        new = result.get('events_per_second')
+        if old and new is not None and new < old * (1 - max_regression):
+            regressions.append(f"{result['name']}: {new} events/s, baseline {old} events/s "
+                               f"({(new / old - 1) * 100:.1f}%)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmarks', nargs='*', metavar='NAME-OR-GROUP',
+                        help='Benchmarks to run, by name or group, all by default: ' +
+                             ', '.join(BENCHMARKS))
+    parser.add_argument('--count', type=int, default=10000, help='Number of events per benchmark')
+    parser.add_argument('--warmup', type=int, default=10, help='Number of operations not measured, at most a tenth of all')
+    parser.add_argument('--report-lines', type=int, default=1000, help='Number of lines of the parsed reports')
+    parser.add_argument('--batch-size', type=int, default=100, help='Batch size of redis.hop.batch')
+    parser.add_argument('--redis-host', default='127.0.0.1')
+    parser.add_argument('--redis-port', type=int, default=6379)
+    parser.add_argument('--redis-db', type=int, default=4, help='Redis database, only the benchmark '
+                                                                'queues are cleared')
+    parser.add_argument('--redis-password', default=os.getenv('INTELMQ_TEST_REDIS_PASSWORD'))
+    parser.add_argument('--output', '-o', help='Write the results to this file instead of stdout')
+    parser.add_argument('--compare', metavar='BASELINE', help='Results of a previous run to compare with')
+    parser.add_argument('--max-regression', type=float, default=0.1,
+                        help='Maximum allowed decrease of the throughput compared to the baseline, '
+                             'default: %(default)s')
+    options = parser.parse_args(argv)
+
+    selected = [name for name, benchmark in BENCHMARKS.items()
+                if not options.benchmarks or name in options.benchmarks or benchmark.group in options.benchmarks]
+    if not selected:
+        parser.error('No benchmarks selected.')
+
+    results = []
+    for name in selected:
+        print(f'Running {name}.', file=sys.stderr)
+        results.append(run_isolated(name, options))
+
+    output = {
+        'intelmq_version': intelmq.__version__,
+        'python_version': platform.python_version(),
+        'platform': platform.platform(),
+        'date': datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+        'count': options.count,
+        'results': results,
+    }
+    if options.output:
+        with open(options.output, 'w') as handle:
+            json.dump(output, handle, indent=4)
+    else:
+        print(json.dumps(output, indent=4))
+
+    retval = 0
+    for result in results:
+        if 'error' in result:
+            print(f"{result['name']} failed:\n{result['error']}", file=sys.stderr)
+            retval = 1
+    if options.compare:
+        with open(options.compare) as handle:
+            regressions = compare(results, json.load(handle), options.max_regression)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)
+        if regressions:
+            retval = 1
+    return retval
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main())
@@ -16,6 +16,7 @@
 import textwrap
 import traceback
 import time
+from typing import Dict, List
 
 import pkg_resources
 from ruamel.yaml import YAML
@@ -25,9 +26,10 @@
                      RUNTIME_CONF_FILE, VAR_RUN_PATH, STATE_FILE_PATH,
                      DEFAULT_LOGGING_PATH, __version_info__,
                      CONFIG_DIR, ROOT_DIR)
-from intelmq.lib import utils
+from intelmq.lib import cache, metrics, utils
 from intelmq.lib.datatypes import ReturnType, MESSAGES, LogLevel
 from intelmq.lib.processmanager import *
+from intelmq.lib.histogram import Histogram
 from intelmq.lib.pipeline import PipelineFactory
 import intelmq.lib.upgrades as upgrades
 
@@ -142,6 +144,9 @@ def __init__(self, interactive: bool = False, returntype: ReturnType = ReturnTyp
         intelmqctl [start|stop|restart|status|reload]
         intelmqctl list [bots|queues|queues-and-status]
         intelmqctl log bot-id [number-of-lines [log-level]]
+        intelmqctl latency [bot-id|--group group]
+        intelmqctl metrics
+        intelmqctl metrics-server [--listen address] [--port port]
         intelmqctl run bot-id message [get|pop|send]
         intelmqctl run bot-id process [--msg|--dryrun]
         intelmqctl run bot-id console
@@ -199,6 +204,17 @@ def __init__(self, interactive: bool = False, returntype: ReturnType = ReturnTyp
 Default is INFO. Number of lines defaults to 10, -1 gives all. Result
 can be longer due to our logging format!
 
+Get the latency statistics of the bots, in milliseconds:
+    intelmqctl latency
+    intelmqctl latency bot-id
+For each processed message (or batch), the time waiting for the source pipeline (receive),
+the time sending to the destination pipeline (send) and the remaining processing time (process).
+
+Get the queue sizes, message counters and dump file sizes in the OpenMetrics format:
+    intelmqctl metrics
+Serve them for Prometheus at http://127.0.0.1:9469/metrics:
+    intelmqctl metrics-server --listen 127.0.0.1 --port 9469
+
 Upgrade from a previous version:
     intelmqctl upgrade-config
 Make a backup of your configuration first, also including bot's configuration files.
@@ -250,6 +266,24 @@ def __init__(self, interactive: bool = False, returntype: ReturnType = ReturnTyp
             parser_log.add_argument('log_level', help='logging level', choices=[i.name for i in LogLevel], default='INFO', nargs='?')
             parser_log.set_defaults(func=self.read_bot_log)
 
+            parser_latency = subparsers.add_parser('latency', help='Show the latency statistics of a bot or botnet')
+            parser_latency.add_argument('bot_id', nargs='?',
+                                        choices=self._configured_bots_list())
+            parser_latency.add_argument('--group', help='Get the latency statistics of a group of bots',
+                                        choices=BOT_GROUP.keys())
+            parser_latency.set_defaults(func=self.bot_latency)
+
+            parser_metrics = subparsers.add_parser('metrics', help='Show the metrics in the OpenMetrics format')
+            parser_metrics.set_defaults(func=self.metrics)
+
+            parser_metrics_server = subparsers.add_parser('metrics-server',
+                                                          help='Serve the metrics in the OpenMetrics format via HTTP')
+            parser_metrics_server.add_argument('--listen', default='127.0.0.1',
+                                               help='Address to listen on, default: %(default)s')
+            parser_metrics_server.add_argument('--port', type=int, default=9469,
+                                               help='Port to listen on, default: %(default)s')
+            parser_metrics_server.set_defaults(func=self.metrics_server)
+
             parser_run = subparsers.add_parser('run', help='Run a bot interactively')
             parser_run.add_argument('bot_id', choices=self._configured_bots_list())
             parser_run.add_argument('--loglevel', '-l', nargs='?', default=None, choices=[i.name for i in LogLevel])
@@ -673,6 +707,16 @@ def _pipeline_configuration(self):
                         pipeline_configuration[botid]['destination_queues'] = botconfig['parameters']['destination_queues']
         return pipeline_configuration
 
+    def _internal_queues(self, bot_id: str, source_queue: str) -> List[str]:
+        """
+        Returns the internal queues of the bot, one per process if `instances_processes` is larger than 1.
+        """
+        parameters = self._runtime_configuration.get(bot_id, {}).get('parameters', {})
+        instances = int(parameters.get('instances_processes') or 0)
+        if instances > 1:
+            return [f'{source_queue}-internal.{number}' for number in range(instances)]
+        return [f'{source_queue}-internal']
+
     def get_queues(self, with_internal_queues=False):
         """
         :return: 4-tuple of source, destination, internal queues, and all queues combined.
@@ -688,7 +732,7 @@ def get_queues(self, with_internal_queues=False):
             if 'source_queue' in value:
                 source_queues.add(value['source_queue'])
                 if with_internal_queues:
-                    internal_queues.add(value['source_queue'] + '-internal')
+                    internal_queues.update(self._internal_queues(botid, value['source_queue']))
             if 'destination_queues' in value:
                 # flattens ["one", "two"] → {"one", "two"}, {"_default": "one", "other": ["two", "three"]} → {"one", "two", "three"}
                 destination_queues.update(utils.flatten_queues(value['destination_queues']))
@@ -727,7 +771,9 @@ def list_queues(self, non_zero=False, count=False):
                     return_dict[bot_id]['source_queue'] = (
                         info['source_queue'], counters[info['source_queue']])
                     if pipeline.has_internal_queues:
-                        return_dict[bot_id]['internal_queue'] = counters[info['source_queue'] + '-internal']
+                        # the sum of the internal queues of all processes
+                        return_dict[bot_id]['internal_queue'] = sum(
+                            counters[queue] for queue in self._internal_queues(bot_id, info['source_queue']))
 
                 if 'destination_queues' in info:
                     return_dict[bot_id]['destination_queues'] = []
@@ -753,7 +799,7 @@ def clear_queue(self, queue):
             if 'source_queue' in value:
                 queues.add(value['source_queue'])
                 if pipeline.has_internal_queues:
-                    queues.add(value['source_queue'] + '-internal')
+                    queues.update(self._internal_queues(key, value['source_queue']))
             if 'destination_queues' in value:
                 queues.update(value['destination_queues'])
 
@@ -824,6 +870,173 @@ def read_bot_log(self, bot_id, log_level, number_of_lines):
         self.log_log_messages(messages[::-1])
         return 0, messages[::-1]
 
+    def _statistics_cache(self) -> cache.Cache:
+        return cache.Cache(host=getattr(self._parameters, 'statistics_host', '127.0.0.1'),
+                           port=getattr(self._parameters, 'statistics_port', 6379),
+                           db=int(getattr(self._parameters, 'statistics_database', 3)),
+                           password=getattr(self._parameters, 'statistics_password', None),
+                           ttl=None)
+
+    def _statistics_instances(self, bot_id: str) -> List[str]:
+        """
+        Returns the IDs under which the bot writes its statistics according to the configuration:
+        The bot ID itself and `<bot_id>.<n>` for its processes (`instances_processes`) and threads (`instances_threads`).
+        """
+        parameters = self._runtime_configuration.get(bot_id, {}).get('parameters', {})
+        instances = max(int(parameters.get('instances_processes') or 0), int(parameters.get('instances_threads') or 0))
+        return [bot_id] + [f'{bot_id}.{number}' for number in range(instances)]
+
+    def _read_statistics(self, stats_cache: cache.Cache, names: Dict[str, List[str]]) -> Dict[str, Dict[str, list]]:
+        """
+        Reads statistics of all instances of the bots from the statistics cache.
+
+        The statistics of the configured instances (see `_statistics_instances`) are requested together with
+        the instance registries `<bot_id>.instances` in one pipelined call. Only the statistics of registered,
+        but not configured instances need a second request.
+
+        Parameters:
+            stats_cache: The statistics cache
+            names: The names of the statistics per bot ID, e.g. `stats.success`
+
+        Returns:
+            The existing values per bot ID and name
+        """
+        configured = {bot_id: self._statistics_instances(bot_id) for bot_id in names}
+        requests = [(bot_id, name, f'{instance}.{name}')
+                    for bot_id, instances in configured.items() for instance in instances for name in names[bot_id]]
+        pipe = stats_cache.redis.pipeline(transaction=False)
+        for bot_id in names:
+            pipe.smembers(f'{bot_id}.instances')
+        if requests:
+            pipe.mget([key for _, _, key in requests])
+        replies = pipe.execute()
+        values = list(replies[len(names)]) if requests else []
+
+        unconfigured = []
+        for bot_id, members in zip(names, replies):
+            for instance in sorted(f'{bot_id}.{utils.decode(member)}' for member in members):
+                if instance not in configured[bot_id]:
+                    unconfigured.extend((bot_id, name, f'{instance}.{name}') for name in names[bot_id])
+        if unconfigured:
+            requests.extend(unconfigured)
+            values.extend(stats_cache.redis.mget([key for _, _, key in unconfigured]))
+
+        results = {bot_id: {name: [] for name in bot_names} for bot_id, bot_names in names.items()}
+        for (bot_id, name, _), value in zip(requests, values):
+            if value is not None:
+                results[bot_id][name].append(value)
+        return results
+
+    def bot_latency(self, bot_id=None, group=None):
+        """
+        Summarizes the latency histograms of the bots in the statistics cache.
+        The histograms of all processes and threads of a bot are merged.
+
+        Returns:
+            For every bot the count, mean, percentiles and maximum per stage, in seconds
+        """
+        stages = ('receive', 'process', 'send')
+        bots = [bot_id] if bot_id else self._configured_bots_list(group=group)
+        results = {}
+        try:
+            statistics = self._read_statistics(self._statistics_cache(),
+                                               {bot: [f'latency.{stage}' for stage in stages] for bot in bots})
+            for bot, values in statistics.items():
+                histograms = {}
+                for stage in stages:
+                    for data in values[f'latency.{stage}']:
+                        histogram = histograms.setdefault(stage, Histogram())
+                        histogram.merge(Histogram.from_dict(json.loads(data)))
+                results[bot] = {stage: histogram.summary() for stage, histogram in histograms.items()}
+        except Exception as exc:
+            self._logger.error('Could not read the statistics: %s', utils.error_message_from_exc(exc))
+            return 1, 'error'
+
+        if self._returntype is ReturnType.TEXT:
+            for bot, stages in results.items():
+                if not stages:
+                    if not self._quiet:
+                        print(f'{bot}: no statistics')
+                    continue
+                print(f'{bot}:')
+                print(f"    {'stage':<8} {'count':>10} {'mean':>10} {'p50':>10} {'p90':>10} {'p99':>10} {'max':>10}")
+                for stage, summary in stages.items():
+                    print(f"    {stage:<8} {summary['count']:>10}" +
+                          ''.join(f' {summary[key] * 1000:>10.3f}' for key in ('mean', 'p50', 'p90', 'p99', 'max')))
+        return 0, results
+
+    def collect_metrics(self) -> List[metrics.MetricFamily]:
+        """
+        Collects the sizes of all queues (including the internal queues), the message counters
+        of the bots written to the statistics cache and the sizes of the dump files.
+
+        The queue sizes are requested with one round trip to the pipeline, the counters with
+        one pipelined call to the statistics cache, see `_read_statistics`.
+        The counters of all processes and threads of a bot are summed up.
+        """
+        pipeline = PipelineFactory.create(logger=self._logger, pipeline_args=self._parameters.__dict__)
+        pipeline.set_queues(None, "source")
+        pipeline.connect()
+        try:
+            *_, all_queues = self.get_queues(with_internal_queues=pipeline.has_internal_queues)
+            counters = pipeline.count_queued_messages(*sorted(all_queues))
+        finally:
+            pipeline.disconnect()
+        queue_messages = metrics.MetricFamily('intelmq_queue_messages', 'gauge', 'Number of messages in the queue.')
+        for queue, counter in counters.items():
+            queue_messages.add(counter, queue=queue)
+
+        processed = metrics.MetricFamily('intelmq_bot_processed_messages', 'counter',
+                                         'Number of successfully processed messages.')
+        failed = metrics.MetricFamily('intelmq_bot_failed_messages', 'counter',
+                                      'Number of failures processing a message.')
+        sent = metrics.MetricFamily('intelmq_bot_sent_messages', 'counter',
+                                    'Number of messages sent to the path of the destination queues.')
+        dump_size = metrics.MetricFamily('intelmq_bot_dump_file_bytes', 'gauge', 'Size of the dump file in bytes.')
+        samples = {}  # bot ID: name of the statistic: metric family, labels
+        for bot_id, info in self._pipeline_configuration().items():
+            destination_queues = info.get('destination_queues')
+            if isinstance(destination_queues, dict):
+                paths = list(destination_queues)
+            else:
+                paths = ['_default'] if destination_queues else []
+            samples[bot_id] = {'stats.success': (processed, {'bot': bot_id}),
+                               'stats.failure': (failed, {'bot': bot_id})}
+            samples[bot_id].update((f'total.{path}', (sent, {'bot': bot_id, 'path': path})) for path in paths)
+            dump_file = os.path.join(self._parameters.logging_path, f'{bot_id}.dump')
+            dump_size.add(os.path.getsize(dump_file) if os.path.isfile(dump_file) else 0, bot=bot_id)
+
+        statistics = self._read_statistics(self._statistics_cache(),
+                                           {bot_id: list(bot_samples) for bot_id, bot_samples in samples.items()})
+        for bot_id, bot_samples in samples.items():
+            for name, (family, labels) in bot_samples.items():
+                family.add(sum(int(value) for value in statistics[bot_id][name]), **labels)
+        return [queue_messages, processed, failed, sent, dump_size]
+
+    def metrics(self):
+        """
+        Returns the metrics of `collect_metrics` in the OpenMetrics text format.
+        """
+        try:
+            text = metrics.render(self.collect_metrics())
+        except Exception as exc:
+            self._logger.error('Could not collect the metrics: %s', utils.error_message_from_exc(exc))
+            return 1, 'error'
+        if self._returntype is ReturnType.TEXT:
+            print(text, end='')
+        return 0, text
+
+    def metrics_server(self, listen='127.0.0.1', port=9469):
+        """
+        Serves the metrics of `collect_metrics` via HTTP at `/metrics`, until interrupted.
+        """
+        try:
+            metrics.serve(self.collect_metrics, listen, port, self._logger)
+        except OSError as exc:
+            self._logger.error('Could not start the metrics server: %s', utils.error_message_from_exc(exc))
+            return 1, 'error'
+        return 0, 'success'
+
     def check(self, no_connections=False, check_executables=True):
         retval = 0
         if self._returntype is ReturnType.JSON:
@@ -878,10 +1091,10 @@ def check(self, no_connections=False, check_executables=True):
             if ('group' in bot_config and bot_config['group'] in ['Parser', 'Expert', 'Output']):
                 if ('parameters' in bot_config and 'source_queue' in bot_config['parameters'] and isinstance(bot_config['parameters']['source_queue'], str)):
                     all_queues.add(bot_config['parameters']['source_queue'])
-                    all_queues.add(f"{bot_config['parameters']['source_queue']}-internal")
+                    all_queues.update(self._internal_queues(bot_id, bot_config['parameters']['source_queue']))
                 else:
                     all_queues.add(f"{bot_id}-queue")
-                    all_queues.add(f"{bot_id}-queue-internal")
+                    all_queues.update(self._internal_queues(bot_id, f"{bot_id}-queue"))
         # ignore allowed orphaned queues
         allowed_orphan_queues = set(getattr(self._parameters, 'intelmqctl_check_orphaned_queues_ignore', ()))
         if not no_connections:
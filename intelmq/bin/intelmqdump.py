@@ -20,10 +20,13 @@
 import traceback
 from collections import OrderedDict
 from pathlib import Path
+from typing import Union
 
 from termstyle import bold, green, inverted, red
 
 import intelmq.bin.intelmqctl as intelmqctl
+import intelmq.lib.codec as codec
+import intelmq.lib.dump as dump
 import intelmq.lib.exceptions as exceptions
 import intelmq.lib.message as message
 import intelmq.lib.pipeline as pipeline
@@ -100,14 +103,9 @@ def dump_info(fname, file_descriptor=None):
             info = red(f'unable to open file: {exc!s}')
         else:
             try:
-                content = json.load(handle)
+                info = f"{dump.count(fname)!s} dumps"
             except ValueError as exc:
                 info = red(f'unable to load JSON: {exc!s}')
-            else:
-                try:
-                    info = f"{len(content.keys())!s} dumps"
-                except AttributeError as exc:
-                    info = red(f"unable to count dumps: {exc!s}")
         finally:
             try:
                 if file_descriptor is None:
@@ -117,27 +115,22 @@ def dump_info(fname, file_descriptor=None):
     return info
 
 
-def save_file(handle, content):
-    handle.truncate()
-    try:
-        json.dump(content, handle, indent=4, sort_keys=True)
-    except KeyboardInterrupt:
-        print('Got KeyboardInterrupt, saving file before exit.', file=sys.stderr)
-        json.dump(content, handle, indent=4, sort_keys=True)
-        sys.exit(1)
-    handle.seek(0)
-
-
-def load_meta(dump):
+def load_meta(content):
+    """
+    Returns the timestamp and the error of each record.
+    """
     retval = []
-    for key, value in dump.items():
+    for key, value in content.items():
+        if value is None:
+            retval.append(('?', 'Invalid record in the dump file.'))
+            continue
         if type(value['traceback']) is not list:
             error = value['traceback'].splitlines()[-1]
         else:
             error = value['traceback'][-1].strip()
         if len(error) > 200:
             error = error[:100] + '...' + error[-100:]
-        retval.append((key, error))
+        retval.append((value.get('timestamp'), error))
     return retval
 
 
@@ -168,6 +161,27 @@ def complete(self, text, state):
             return
 
 
+def sanitize_message(msg: Union[bytes, str]) -> Union[bytes, str]:
+    """
+    Sanitizes and validates a message fully before it is recovered,
+    as the receiving bot may trust the messages of its source queue.
+    Messages of binary codecs are converted to JSON.
+    Messages which are no serialized IntelMQ messages are returned unchanged.
+
+    Raises:
+        intelmq.lib.exceptions.IntelMQException: If the message is invalid.
+    """
+    try:
+        decoded = message.Message.unserialize(msg)
+    except ValueError:
+        if codec.is_binary(msg):
+            raise
+        return msg
+    if not isinstance(decoded, dict) or '__type' not in decoded:
+        return msg
+    return message.MessageFactory.from_dict(decoded).serialize()
+
+
 def main(argv=None):
     parser = argparse.ArgumentParser(
         prog=APPNAME,
@@ -254,7 +268,8 @@ def main(argv=None):
                 exit(1)
             fname = fname[0]
     else:
-        botid = args.botid
+        # all process instances of a bot (`<bot_id>.<n>`) write to the bot's dump file
+        botid = args.botid.split('.')[0]
         logging_path = utils.get_bots_settings(botid)["parameters"].get(
             "logging_path", DEFAULT_LOGGING_PATH)
         fname = os.path.join(logging_path, botid) + '.dump'
@@ -263,6 +278,16 @@ def main(argv=None):
         print(bold(f'Given file does not exist: {fname}'))
         exit(1)
 
+    if dump.is_legacy(fname):
+        # convert dump files of previous versions to JSON lines
+        try:
+            dump.migrate(fname, timeout=0)
+        except ValueError:
+            print(red('Dump file is currently locked. Stopping.'))
+            exit(1)
+        except Exception as exc:
+            print(red(f'Could not convert the dump file {fname}: {exc}'))
+
     answer = None
     delete_file = False
     while True:
@@ -282,14 +307,14 @@ def main(argv=None):
                 available_answers = [k for k, v in ACTIONS.items() if v[2]]
                 print('Restricted actions.')
             else:
+                # the records by their offset in the file, sorted by timestamp, #1280
+                content = OrderedDict(sorted(dump.read(fname),
+                                             key=lambda t: (t[1] or {}).get('timestamp') or ''))
+                meta = load_meta(content)
+                offsets = list(content)
+                available_opts = [item[0] for item in ACTIONS.values()]
                 # don't display list after 'show', 'recover' & edit commands
                 if not (answer and isinstance(answer, list) and answer[0] in ['s', 'r', 'e']):
-                    content = json.load(handle)
-                    handle.seek(0)
-                    content = OrderedDict(sorted(content.items(), key=lambda t: t[0]))  # sort by key here, #1280
-                    meta = load_meta(content)
-
-                    available_opts = [item[0] for item in ACTIONS.values()]
                     for count, line in enumerate(meta):
                         print('{:3}: {} {}'.format(count, *line))
 
@@ -297,8 +322,8 @@ def main(argv=None):
             try:
                 bot_status = ctl.bot_status(botid)
                 if bot_status[1] == 'running':
-                    print(red('This bot is currently running, the dump file is now locked and '
-                              'the bot can\'t write it.'))
+                    print(red('This bot is currently running, it may append new dumps '
+                              'to the file in the meantime.'))
             except KeyError:
                 bot_status = 'error'
                 print(red('Attention: This bot is not defined!'))
@@ -340,53 +365,64 @@ def main(argv=None):
                 params = defaults.copy()
                 params.update(runtime_config[botid].get("parameters", {}))
                 pipe = pipeline.PipelineFactory.create(logger=logger, pipeline_args=params)
-                try:
-                    for i, (key, entry) in enumerate([item for (count, item)
-                                                      in enumerate(content.items()) if count in ids]):
-                        if entry['message']:
-                            msg = copy.copy(entry['message'])  # otherwise the message field gets converted
-                            if isinstance(msg, dict):
-                                msg = json.dumps(msg)
-                        else:
-                            print('No message here, deleting entry.')
-                            del content[key]
-                            continue
-
-                        if queue_name is None:
-                            if len(answer) == 3:
-                                queue_name = answer[2]
-                            else:
-                                queue_name = entry['source_queue']
-                        if queue_name in pipeline_pipes:
-                            if runtime_config[pipeline_pipes[queue_name]]['group'] == 'Parser' and json.loads(msg)['__type'] == 'Event':
-                                print('Event converted to Report automatically.')
-                                msg = message.Report(message.MessageFactory.unserialize(msg)).serialize()
-                        else:
-                            print(red(f"The given queue '{queue_name}' is not configured. Please retry with a valid queue."))
-                            break
-                        try:
-                            pipe.set_queues(queue_name, 'destination')
-                            pipe.connect()
-                            pipe.send(msg)
-                        except exceptions.PipelineError:
-                            print(red('Could not reinject into queue {}: {}'
-                                      ''.format(queue_name, traceback.format_exc())))
+                for i, (key, entry) in enumerate([item for (count, item)
+                                                  in enumerate(content.items()) if count in ids]):
+                    if entry is None:
+                        print(red(f'Dump {i} is not a valid record and has not been recovered.'))
+                        continue
+                    if entry['message']:
+                        msg = copy.copy(entry['message'])  # otherwise the message field gets converted
+                        if isinstance(msg, dict):
+                            msg = json.dumps(msg)
+                        elif entry.get('message_type') == 'base64':
+                            msg = base64.b64decode(msg)
+                    else:
+                        print('No message here, deleting entry.')
+                        dump.delete(fname, key)
+                        del content[key]
+                        continue
+
+                    try:
+                        msg = sanitize_message(msg)
+                    except exceptions.IntelMQException as exc:
+                        print(red(f'Dump {i} is not valid and has not been recovered, please edit it: {exc}'))
+                        continue
+
+                    if queue_name is None:
+                        if len(answer) == 3:
+                            queue_name = answer[2]
                         else:
-                            del content[key]
-                            print(green(f'Recovered dump {i}.'))
-                finally:
-                    save_file(handle, content)
+                            queue_name = entry['source_queue']
+                    if queue_name in pipeline_pipes:
+                        if runtime_config[pipeline_pipes[queue_name]]['group'] == 'Parser' and json.loads(msg)['__type'] == 'Event':
+                            print('Event converted to Report automatically.')
+                            msg = message.Report(message.MessageFactory.unserialize(msg)).serialize()
+                    else:
+                        print(red(f"The given queue '{queue_name}' is not configured. Please retry with a valid queue."))
+                        break
+                    try:
+                        pipe.set_queues(queue_name, 'destination')
+                        pipe.connect()
+                        pipe.send(msg)
+                        pipe.flush()
+                    except exceptions.PipelineError:
+                        print(red('Could not reinject into queue {}: {}'
+                                  ''.format(queue_name, traceback.format_exc())))
+                    else:
+                        dump.delete(fname, key)
+                        del content[key]
+                        print(green(f'Recovered dump {i}.'))
                 if not content:
-                    delete_file = True
-                    print(f'Deleting empty file {fname}')
-                    break
+                    if dump.remove_if_empty(fname):
+                        print(f'Deleting empty file {fname}')
+                        break
+                    print('New messages have been dumped in the meantime.')
             elif answer[0] == 'd':
                 # Delete entries or file
                 if ids:
                     # delete entries
                     for entry in ids:
-                        del content[meta[entry][0]]
-                    save_file(handle, content)
+                        dump.delete(fname, offsets[entry])
                 else:
                     # delete dumpfile
                     delete_file = True
@@ -395,10 +431,13 @@ def main(argv=None):
             elif answer[0] == 's':
                 # Show entries by id
                 for count, (key, orig_value) in enumerate(content.items()):
-                    value = copy.copy(orig_value)  # otherwise the raw field gets truncated
                     if count not in ids:
                         continue
-                    print('=' * 100, f'\nShowing id {count} {key}\n',
+                    if orig_value is None:
+                        print('=' * 100, f'\nShowing id {count}: Invalid record in the dump file.')
+                        continue
+                    value = copy.copy(orig_value)  # otherwise the raw field gets truncated
+                    print('=' * 100, f'\nShowing id {count} {value.get("timestamp")}\n',
                           '-' * 50)
                     if value.get('message_type') == 'base64':
                         if args.truncate and len(value['message']) > args.truncate:
@@ -419,40 +458,46 @@ def main(argv=None):
                     print(red('Edit mode needs an id'))
                     continue
                 for entry in ids:
-                    if content[meta[entry][0]].get('message_type') == 'base64':
+                    record = content[offsets[entry]]
+                    if record is None:
+                        print(red(f'Dump {entry} is not a valid record and can not be edited.'))
+                        continue
+                    record = dict(record)
+                    if record.get('message_type') == 'base64':
                         with tempfile.NamedTemporaryFile(mode='w+b', suffix='.txt') as tmphandle:
                             filename = tmphandle.name
-                            tmphandle.write(base64.b64decode(content[meta[entry][0]]['message']))
+                            tmphandle.write(base64.b64decode(record['message']))
                             tmphandle.flush()
                             proc = subprocess.run(['sensible-editor', filename])
                             if proc.returncode != 0:
                                 print(red('Calling editor failed with exitcode %r.' % proc.returncode))
-                            else:
-                                tmphandle.seek(0)
-                                new_content = tmphandle.read()
-                                try:
-                                    new_content = new_content.decode()
-                                except UnicodeDecodeError as exc:
-                                    print(red("Could not write the new message because of the following error:"))
-                                    print(red(exceptions.DecodingError(exception=exc)))
-                                else:
-                                    del content[meta[entry][0]]['message_type']
-                                    content[meta[entry][0]]['message'] = new_content
-                                    save_file(handle, content)
+                                continue
+                            tmphandle.seek(0)
+                            new_content = tmphandle.read()
+                            try:
+                                new_content = new_content.decode()
+                            except UnicodeDecodeError as exc:
+                                print(red("Could not write the new message because of the following error:"))
+                                print(red(exceptions.DecodingError(exception=exc)))
+                                continue
+                            del record['message_type']
+                            record['message'] = new_content
                     else:
                         with tempfile.NamedTemporaryFile(mode='w+t', suffix='.json') as tmphandle:
                             filename = tmphandle.name
                             utils.write_configuration(configuration_filepath=filename,
-                                                      content=json.loads(content[meta[entry][0]]['message']),
+                                                      content=json.loads(record['message']),
                                                       new=True,
                                                       backup=False, useyaml=False)
                             proc = subprocess.run(['sensible-editor', filename])
                             if proc.returncode != 0:
                                 print(red('Calling editor failed with exitcode %r.' % proc.returncode))
-                            else:
-                                tmphandle.seek(0)
-                                content[meta[entry][0]]['message'] = tmphandle.read()
-                                save_file(handle, content)
+                                continue
+                            tmphandle.seek(0)
+                            record['message'] = tmphandle.read()
+                    # the modified record is appended, the original one deleted
+                    dump.append(fname, record)
+                    dump.delete(fname, offsets[entry])
 
     if delete_file:
         os.remove(fname)
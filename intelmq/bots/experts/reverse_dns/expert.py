@@ -76,7 +76,7 @@ def process(self):
                 else:
                     ttl = datetime.fromtimestamp(expiration) - datetime.now()
                     self.cache_set(cache_key, str(result),
-                                   ttl=int(ttl.total_seconds()))
+                                   ttl=max(int(ttl.total_seconds()), 1))
 
             if result is not None:
                 event.add(key % 'reverse_dns', str(result), overwrite=self.overwrite)
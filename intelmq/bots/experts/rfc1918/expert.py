@@ -29,6 +29,7 @@
 from urllib.parse import urlparse
 
 from intelmq.lib.bot import ExpertBot
+from intelmq.lib.iptrie import IPTrie
 
 NETWORKS = ("10.0.0.0/8", "100.64.0.0/10", "127.0.0.0/8",
             "169.254.0.0/16", "172.16.0.0/12", "192.0.0.0/24", "192.0.2.0/24",
@@ -57,7 +58,7 @@ def init(self):
             raise ValueError("Length of parameters 'fields' (%d) and 'policy' (%d) is unequal."
                              "" % (len(self.fields), len(self.policy)))
 
-        self.ip_networks = [ipaddress.ip_network(iprange) for iprange in NETWORKS]
+        self.ip_networks = IPTrie(NETWORKS)
 
     @staticmethod
     def check(parameters):
@@ -69,7 +70,7 @@ def check(parameters):
                      "" % (fields, policy)]]
 
     def is_in_net(self, ip):
-        return any(ip in iprange for iprange in self.ip_networks)
+        return ip in self.ip_networks
 
     def is_in_domains(self, value):
         return value in DOMAINS
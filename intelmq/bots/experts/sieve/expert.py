@@ -9,7 +9,9 @@
 Parameters:
     file: string
 """
+import functools
 import ipaddress
+import logging
 import os
 import re
 import traceback
@@ -17,7 +19,7 @@
 import json
 
 from datetime import datetime, timedelta, timezone
-from typing import Callable, Dict, Optional, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from enum import Enum, auto
 
 import intelmq.lib.exceptions as exceptions
@@ -25,6 +27,7 @@
 from intelmq.lib import utils
 from intelmq.lib.bot import ExpertBot
 from intelmq.lib.exceptions import MissingDependencyError
+from intelmq.lib.iptrie import IPTrie
 from intelmq.lib.message import Message
 from intelmq.lib.utils import parse_relative
 from intelmq.lib.harmonization import DateTime
@@ -63,12 +66,14 @@ def init(self) -> None:
             raise MissingDependencyError("pendulum")
 
         if not SieveExpertBot._harmonization:
-            harmonization_config = utils.load_configuration(HARMONIZATION_CONF_FILE)
-            SieveExpertBot._harmonization = harmonization_config["event"]
+            # the harmonization loaded by the bot, also available in the library mode
+            SieveExpertBot._harmonization = self.harmonization["event"]
 
         self.metamodel = self.init_metamodel()
         self.model = self.read_sieve_file(self.file, self.metamodel)
         self.variables = {}
+        # the rules compiled to functions, with precompiled regular expressions and networks
+        self.statements = self.compile_model(self.model)
 
     @staticmethod
     def check(parameters):
@@ -225,7 +230,6 @@ def process(self) -> None:
         "BoolMatch": lambda self, match, event: self.process_bool_match(
             self.resolve_value(match.key, str), match.op, match.value, event
         ),
-        "Expression": lambda self, match, event: self.match_expression(match, event),
     }
 
     @staticmethod
@@ -269,86 +273,311 @@ def read_sieve_file(filename, metamodel):
                 f"Could not parse sieve file {filename!r}, error in ({e.line}, {e.col}): {e}"
             )
 
-    def model_process(self, event):
-        procedure = Procedure.CONTINUE
+    def compile_model(self, model) -> List[Tuple[Callable[[Message], Procedure], Tuple[int, int]]]:
+        """
+        Compiles the top-level statements of the sieve model to functions, with their positions in the sieve file.
+        """
+        if not model:  # empty rules file results in empty string
+            return []
+        return [(self.compile_statement(statement), self.get_linecol(statement))
+                for statement in model.statements]
+
+    def model_process(self, event) -> Procedure:
         self.variables.clear()
-        if not self.model:  # empty rules file results in empty string
-            return procedure
 
-        for statement in self.model.statements:
-            procedure = self.process_statement(statement, event)
-            if procedure == Procedure.KEEP:
-                self.logger.debug(
-                    f"Stop processing based on statement at {self.get_linecol(statement)}: {event}."
-                )
-                break
-            elif procedure == Procedure.DROP:
-                self.logger.debug(
-                    f"Dropped event based on statement at {self.get_linecol(statement)}: {event}."
-                )
-                break
+        for statement, position in self.statements:
+            procedure = statement(event)
+            if procedure is Procedure.CONTINUE:
+                continue
+            if self.logger.isEnabledFor(logging.DEBUG):
+                if procedure is Procedure.KEEP:
+                    self.logger.debug("Stop processing based on statement at %s: %s.", position, event)
+                else:
+                    self.logger.debug("Dropped event based on statement at %s: %s.", position, event)
+            return procedure
 
-        return procedure
+        return Procedure.CONTINUE
 
-    def process_statement(self, statement, event):
+    def compile_statement(self, statement) -> Callable[[Message], Procedure]:
         name = statement.__class__.__name__
         if name == "Branching":
-            return self.process_branching(statement, event)
+            return self.compile_branching(statement)
         elif name == "Action":
-            return self.process_action(statement.action, event)
+            return self.compile_action(statement.action)
         raise TextXSemanticError(
-            f"unexpected statement class {name} in process_statement."
+            f"unexpected statement class {name} in compile_statement."
         )
 
-    def process_branching(self, rule, event) -> Procedure:
-        # process 'if' clause
-        result = self.process_clause(rule.if_, event)
-        if result:
-            return result
+    def compile_block(self, statements) -> Callable[[Message], Procedure]:
+        """
+        Compiles the statements of a clause, processed until one returns another procedure than CONTINUE.
+        """
+        compiled = tuple(self.compile_statement(statement) for statement in statements)
+
+        def block(event):
+            for statement in compiled:
+                procedure = statement(event)
+                if procedure is not Procedure.CONTINUE:
+                    return procedure
+            return Procedure.CONTINUE
+        return block
+
+    @classmethod
+    def index_entry(cls, clause) -> Optional[Tuple[str, tuple]]:
+        """
+        Returns the key and the values of clauses with a single equality condition on a constant key,
+        e.g. `if feed.name == 'x'` or `if source.asn :in [1, 2]`, which can be looked up in an index.
+        """
+        if len(clause.expr.conj) != 1 or len(clause.expr.conj[0].cond) != 1:
+            return None
+        cond = clause.expr.conj[0].cond[0]
+        match = cond.match
+        name = match.__class__.__name__
+        if cond.neg or name == "Expression" or not cls.is_constant(match):
+            return None
+        if name in ("SingleStringMatch", "SingleNumericMatch") and match.op == "==":
+            return match.key, (match.value.value, )
+        if name in ("MultiStringMatch", "MultiNumericMatch") and match.op == ":in":
+            return match.key, tuple(value.value for value in match.value.values)
+        return None
 
-        # process optional 'elif' clauses
-        for clause in rule.elif_:
-            result = self.process_clause(clause, event)
-            if result:
-                return result
+    def compile_branching(self, rule) -> Callable[[Message], Procedure]:
+        """
+        Consecutive clauses with equality conditions on the same key are looked up in an index of the values,
+        instead of testing them one after another.
+        """
+        selectors = []
+        index_key = index = None
+        for clause in (rule.if_, *rule.elif_):
+            compiled_clause = (self.compile_block(clause.statements), self.get_linecol(clause))
+            entry = self.index_entry(clause)
+            if entry is not None and entry[0] == index_key:
+                for value in entry[1]:
+                    index.setdefault(value, compiled_clause)
+                continue
+            if entry is not None:
+                index_key, index = entry[0], {}
+                for value in entry[1]:
+                    index.setdefault(value, compiled_clause)
+                selectors.append(self.compile_index_selector(index_key, index))
+            else:
+                index_key = index = None
+                selectors.append(self.compile_selector(self.compile_expression(clause.expr), compiled_clause))
+        else_block = self.compile_block(rule.else_.statements) if rule.else_ else None
+        else_position = self.get_linecol(rule.else_) if rule.else_ else None
+
+        def branching(event):
+            for selector in selectors:
+                clause = selector(event)
+                if clause is not None:
+                    block, position = clause
+                    break
+            else:
+                if else_block is None:
+                    return Procedure.CONTINUE
+                block, position = else_block, else_position
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Matched event based on rule at %s: %s.", position, event)
+            return block(event)
+        return branching
 
-        # process optional 'else' clause
-        if rule.else_:
-            result = self.process_clause(rule.else_, event, True)
-            if result:
-                return result
+    @staticmethod
+    def compile_selector(expression, clause):
+        return lambda event: clause if expression(event) else None
 
-        return Procedure.CONTINUE
+    @staticmethod
+    def compile_index_selector(key, index):
+        def selector(event):
+            if key not in event:
+                return None
+            try:
+                return index.get(event[key])
+            except TypeError:  # unhashable values like lists are never equal to the constants
+                return None
+        return selector
+
+    def compile_expression(self, expr) -> Callable[[Message], bool]:
+        conjunctions = tuple(tuple(self.compile_condition(cond) for cond in conj.cond) for conj in expr.conj)
+        if len(conjunctions) == 1:
+            conditions = conjunctions[0]
+            if len(conditions) == 1:
+                return conditions[0]
+            return lambda event: all(condition(event) for condition in conditions)
+        return lambda event: any(all(condition(event) for condition in conditions)
+                                 for conditions in conjunctions)
+
+    def compile_condition(self, cond) -> Callable[[Message], bool]:
+        match = cond.match
+        name = match.__class__.__name__
+        if name == "Expression":
+            check = self.compile_expression(match)
+        elif self.is_constant(match):
+            check = self._compile_map[name](self, match)
+        else:
+            # variables are resolved for every event
+            def check(event, match=match, process=self._cond_map[name]):
+                return process(self, match, event)
+        if cond.neg:
+            return lambda event: not check(event)
+        return check
 
-    def process_clause(self, clause, event, else_clause=False) -> Optional[Procedure]:
-        if not (else_clause or self.match_expression(clause.expr, event)):
-            return None
+    @staticmethod
+    def is_variable(value) -> bool:
+        return value.__class__.__name__ == "Variable"
 
-        self.logger.debug(
-            f"Matched event based on rule at {self.get_linecol(clause)}: {event}."
-        )
+    @classmethod
+    def is_constant(cls, match) -> bool:
+        """
+        If the key and the compared values of the match do not contain variables.
+        """
+        if cls.is_variable(match.key):
+            return False
+        value = getattr(match, "value", getattr(match, "date", None))
+        values = value.values if hasattr(value, "values") else (value, )
+        return not any(cls.is_variable(item) or cls.is_variable(getattr(item, "value", None)) for item in values)
+
+    def compile_exist_match(self, match):
+        key = match.key
+        if match.op == ":notexists":
+            return lambda event: key not in event
+        return lambda event: key in event
+
+    def compile_single_string_match(self, match):
+        key, op, value = match.key, match.op, match.value.value
+        missing = op in {"!=", "!~"}
+        convert = op not in ("==", "!=")
+        if op in ("=~", "!~"):
+            search = re.compile(value).search
+            if op == "=~":
+                def compare(lhs):
+                    return search(lhs) is not None
+            else:
+                def compare(lhs):
+                    return search(lhs) is None
+        elif op == ":contains":
+            def compare(lhs):
+                return lhs.find(value) >= 0
+        else:
+            compare = functools.partial(self._string_op_map[op], value)
+
+        def single_string_match(event):
+            if key not in event:
+                return missing
+            lhs = event[key]
+            if convert and not isinstance(lhs, str):
+                lhs = json.dumps(lhs) if isinstance(lhs, dict) else str(lhs)
+            return compare(lhs)
+        return single_string_match
+
+    def compile_multi_string_match(self, match):
+        key, op = match.key, match.op
+        values = [value.value for value in match.value.values]
+        if op == ":in":
+            return self.compile_membership(key, values)
+        if op == ":regexin":
+            searches = tuple(re.compile(value).search for value in values)
+
+            def regexin(event):
+                if key not in event:
+                    return False
+                lhs = event[key]
+                return any(search(lhs) is not None for search in searches)
+            return regexin
+
+        def containsany(event):
+            if key not in event:
+                return False
+            lhs = event[key]
+            return any(lhs.find(value) >= 0 for value in values)
+        return containsany
 
-        for procedure in (
-            self.process_statement(statement, event) for statement in clause.statements
-        ):
-            if procedure != Procedure.CONTINUE:
-                return procedure
+    @staticmethod
+    def compile_membership(key, values):
+        value_set = frozenset(values)
 
-        if else_clause:
-            return None
+        def membership(event):
+            if key not in event:
+                return False
+            lhs = event[key]
+            try:
+                return lhs in value_set
+            except TypeError:  # unhashable
+                return lhs in values
+        return membership
 
-        return Procedure.CONTINUE
+    def compile_single_numeric_match(self, match):
+        key, op, value = match.key, self._numeric_op_map[match.op], match.value.value
+        return lambda event: key in event and op(event[key], value)
 
-    def match_expression(self, expr, event) -> bool:
-        return any(self.process_conjunction(conj, event) for conj in expr.conj)
+    def compile_multi_numeric_match(self, match):
+        return self.compile_membership(match.key, [value.value for value in match.value.values])
 
-    def process_conjunction(self, conj, event) -> bool:
-        return all(self.process_condition(cond, event) for cond in conj.cond)
+    def compile_ip_range_match(self, match):
+        key = match.key
+        name = match.range.__class__.__name__
+        if name == "SingleIpRange":
+            ranges = (match.range, )
+        elif name == "IpRangeList":
+            ranges = match.range.values
+        else:
+            raise TextXSemanticError(f"Unhandled type: {name}")
+        networks = IPTrie(ip_range.value for ip_range in ranges)
+
+        def ip_range_match(event):
+            if key not in event:
+                return False
+            try:
+                addr = ipaddress.ip_address(event[key])
+            except ValueError:
+                self.logger.warning("Could not parse IP address %s=%s in %s.", key, event[key], event)
+                return False
+            return addr in networks
+        return ip_range_match
+
+    def compile_date_match(self, match):
+        key, op = match.key, self._date_op_map[match.op]
+        try:
+            base_time = self.parse_timeattr(match.date.value)
+        except ValueError:
+            # invalid time specifications raise an error when the condition is evaluated
+            return lambda event: self.process_date_match(key, match.op, match.date, event)
+
+        def date_match(event):
+            if key not in event:
+                return False
+            try:
+                event_time = DateTime.from_isoformat(event[key], True)
+            except ValueError:
+                self.logger.warning("Could not parse %s=%s at %s.", key, event[key], event)
+                return False
+            if isinstance(base_time, timedelta):
+                return op(event_time, datetime.now(tz=timezone.utc) - base_time)
+            return op(event_time, base_time)
+        return date_match
 
-    def process_condition(self, cond, event) -> bool:
-        name = cond.match.__class__.__name__
-        ret = self._cond_map[name](self, cond.match, event)
-        return not ret if cond.neg else ret
+    def compile_list_match(self, match):
+        key, op = match.key, match.op
+        rhs = match.value.values
+        if op == ":equals":
+            return lambda event: key in event and isinstance(event[key], list) and event[key] == rhs
+        compare, rhs_set = self._list_op_map[op], set(rhs)
+        return lambda event: key in event and isinstance(event[key], list) and compare(set(event[key]), rhs_set)
+
+    def compile_bool_match(self, match):
+        key, op, value = match.key, self._bool_op_map[match.op], match.value
+        return lambda event: key in event and isinstance(event[key], bool) and op(event[key], value)
+
+    _compile_map: Dict[str, Callable[["SieveExpertBot", object], Callable[[Message], bool]]] = {
+        "ExistMatch": compile_exist_match,
+        "SingleStringMatch": compile_single_string_match,
+        "MultiStringMatch": compile_multi_string_match,
+        "SingleNumericMatch": compile_single_numeric_match,
+        "MultiNumericMatch": compile_multi_numeric_match,
+        "IpRangeMatch": compile_ip_range_match,
+        "DateMatch": compile_date_match,
+        "ListMatch": compile_list_match,
+        "BoolMatch": compile_bool_match,
+    }
 
     def process_exist_match(self, key, op, event) -> bool:
         ret = key in event
@@ -456,55 +685,69 @@ def compute_basic_math(self, action, event) -> str:
 
         return self._basic_math_op_map[action.operator](date, delta).isoformat()
 
-    def process_action(self, action, event) -> Procedure:
+    def compile_action(self, action) -> Callable[[Message], Procedure]:
         name = action.__class__.__name__
         if action == "drop":
-            return Procedure.DROP
+            return lambda event: Procedure.DROP
         elif action == "keep":
-            return Procedure.KEEP
+            return lambda event: Procedure.KEEP
         elif name == "PathAction":
-            event.path = action.path
+            paths = getattr(action.path, "values", None)
+            paths = tuple(path.value for path in paths) if paths is not None else (action.path.value, )
+
+            def perform(event):
+                event.path = paths
         elif name == "AddAction":
-            if action.key not in event:
-                value = action.value
-                if action.operator != "=":
-                    value = self.compute_basic_math(action, event)
-                event.add(action.key, value)
+            def perform(event):
+                if action.key not in event:
+                    value = action.value
+                    if action.operator != "=":
+                        value = self.compute_basic_math(action, event)
+                    event.add(action.key, value)
         elif name == "AddForceAction":
-            value = self.resolve_value(action.value)
-            if action.operator != "=":
-                value = self.compute_basic_math(action, event)
-            event.add(action.key, value, overwrite=True)
-        elif name == "UpdateAction":
-            if action.key in event:
-                value = action.value
+            def perform(event):
+                value = self.resolve_value(action.value)
                 if action.operator != "=":
                     value = self.compute_basic_math(action, event)
-                event.change(action.key, value)
+                event.add(action.key, value, overwrite=True)
+        elif name == "UpdateAction":
+            def perform(event):
+                if action.key in event:
+                    value = action.value
+                    if action.operator != "=":
+                        value = self.compute_basic_math(action, event)
+                    event.change(action.key, value)
         elif name == "RemoveAction":
-            if action.key in event:
-                del event[action.key]
+            def perform(event):
+                if action.key in event:
+                    del event[action.key]
         elif name == "AppendAction":
-            if action.key not in event:
-                event.add(action.key, [action.value])
-            # silently ignore existing non-list values
-            elif isinstance(event[action.key], list):
-                event[action.key].append(action.value)
+            def perform(event):
+                if action.key not in event:
+                    event.add(action.key, [action.value])
+                # silently ignore existing non-list values
+                elif isinstance(event[action.key], list):
+                    event[action.key].append(action.value)
         elif name == "AppendForceAction":
-            if action.key not in event:
-                event.add(action.key, [action.value])
-            elif isinstance(event[action.key], list):
-                event[action.key].append(action.value)
-            else:
-                event.add(action.key, [event[action.key], action.value], overwrite=True)
+            def perform(event):
+                if action.key not in event:
+                    event.add(action.key, [action.value])
+                elif isinstance(event[action.key], list):
+                    event[action.key].append(action.value)
+                else:
+                    event.add(action.key, [event[action.key], action.value], overwrite=True)
         elif name == "VarSetAction":
-            if action.key not in event:
-                raise KeyError(f"{action.key} not present in event.")
-            self.variables[action.var.value] = event[action.key]
+            def perform(event):
+                if action.key not in event:
+                    raise KeyError(f"{action.key} not present in event.")
+                self.variables[action.var.value] = event[action.key]
         else:
             raise TextXSemanticError(f"unknown name {name}.")
 
-        return Procedure.CONTINUE
+        def action_statement(event):
+            perform(event)
+            return Procedure.CONTINUE
+        return action_statement
 
     @staticmethod
     def validate_ip_range(ip_range) -> None:
@@ -560,6 +803,23 @@ def validate_string_match(str_match) -> None:
                 for val in str_match.value.values:
                     SieveExpertBot.validate_ip_address(val)
 
+        # validate regular expressions
+        if str_match.op in ("=~", "!~"):
+            SieveExpertBot.validate_regex(str_match.value)
+        elif str_match.op == ":regexin":
+            for val in str_match.value.values:
+                SieveExpertBot.validate_regex(val)
+
+    @staticmethod
+    def validate_regex(value) -> None:
+        if SieveExpertBot.is_variable(value.value):
+            return
+        try:
+            re.compile(value.value)
+        except re.error as exc:
+            position = SieveExpertBot.get_linecol(value, as_dict=True)
+            raise TextXSemanticError(f"Invalid regular expression: {value.value}: {exc}.", **position)
+
     @staticmethod
     def validate_ip_address(ipaddr) -> None:
         try:
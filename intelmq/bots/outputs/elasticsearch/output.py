@@ -10,9 +10,10 @@
 * Support client_cert and client_key parameters, see https://github.com/certtools/intelmq/pull/1406
 """
 
+import time
 from collections.abc import Mapping
 from datetime import datetime
-from json import loads
+from json import dumps, loads
 
 from intelmq.lib.bot import OutputBot
 from intelmq.lib.exceptions import MissingDependencyError
@@ -30,6 +31,8 @@
     'monthly': '%Y-%m',
     'yearly': '%Y'
 }
+# status codes of bulk items which are worth retrying
+RETRY_STATUS = {429, 502, 503, 504}
 
 
 def replace_keys(obj, key_char='.', replacement='_'):
@@ -57,6 +60,7 @@ def get_event_date(event_dict: dict) -> datetime.date:
 
 class ElasticsearchOutputBot(OutputBot):
     """Send events to an Elasticsearch database server"""
+    bulk_max_bytes: int = 10485760
     elastic_host: str = '127.0.0.1'  # TODO: could be ipadd
     elastic_index: str = 'intelmq'
     elastic_port: int = 9200
@@ -101,6 +105,83 @@ def init(self):
 
     def process(self):
         event = self.receive_message()
+        index, event_dict = self.prepare_document(event, default_date=datetime.today().date())
+
+        self.es.index(index=index, body=event_dict)
+        self.acknowledge_message()
+
+    def process_batch(self, messages):
+        """
+        Indexes the events with the bulk API, in requests of at most `bulk_max_bytes` bytes.
+
+        Documents rejected with a temporary error (e.g. 429 Too Many Requests) are sent again,
+        up to `error_max_retries` times after `error_retry_delay` seconds.
+        Documents which can still not be indexed are dumped and sent to the `_on_error` path, if configured,
+        after all requests succeeded. If a request fails, no document is handled twice when the batch
+        is processed again one by one.
+        """
+        default_date = datetime.today().date()
+        pending = []
+        for message in messages:
+            index, event_dict = self.prepare_document(message, default_date=default_date)
+            action = dumps({'index': {'_index': index}})
+            pending.append((message, f'{action}\n{dumps(event_dict)}\n'))
+
+        rejected = []
+        for attempt in range(self.error_max_retries + 1):
+            if attempt:
+                self.logger.info('Elasticsearch rejected %d documents temporarily, sending them again in %s seconds.',
+                                 len(pending), self.error_retry_delay)
+                time.sleep(self.error_retry_delay)
+            retry = []
+            for message, document, status, error in self.send_bulk(pending):
+                if status in RETRY_STATUS:
+                    retry.append((message, document))
+                else:
+                    rejected.append((message, status, error))
+            pending = retry
+            if not pending:
+                break
+        rejected.extend((message, None, 'Too many retries.') for message, _ in pending)
+        for message, status, error in rejected:
+            self.handle_rejected(message, status, error)
+
+    def send_bulk(self, documents: list):
+        """
+        Sends the documents, pairs of message and action with source, with as few bulk requests as possible.
+
+        Yields:
+            The message, the document, the status and the error of the rejected documents
+        """
+        start = 0
+        while start < len(documents):
+            size, end = 0, start
+            while end < len(documents) and (end == start or size + len(documents[end][1]) <= self.bulk_max_bytes):
+                size += len(documents[end][1])
+                end += 1
+            response = self.es.bulk(body=''.join(document for _, document in documents[start:end]))
+            if response.get('errors'):
+                for (message, document), item in zip(documents[start:end], response['items']):
+                    result = item['index']
+                    if 'error' in result:
+                        yield message, document, result['status'], result['error']
+            start = end
+
+    def handle_rejected(self, message, status, error):
+        """
+        Dumps the message of a document rejected by Elasticsearch and sends it to the `_on_error` path, if configured.
+        """
+        self.logger.error('Elasticsearch rejected the document with status %s: %r.', status, error)
+        if self.error_dump_message:
+            self._dump_message([f'Elasticsearch rejected the document with status {status}: {error!r}'],
+                               message=message)
+        if '_on_error' in self.destination_queues:
+            self.send_message(message, path='_on_error')
+
+    def prepare_document(self, event, default_date: datetime.date = None):
+        """
+        Returns the index and the document of the event.
+        """
         event_dict = event.to_dict(hierarchical=False)
 
         for field in self.flatten_fields:
@@ -122,9 +203,7 @@ def process(self):
             event_dict = replace_keys(event_dict,
                                       replacement=self.replacement_char)
 
-        self.es.index(index=self.get_index(event_dict, default_date=datetime.today().date()),
-                      body=event_dict)
-        self.acknowledge_message()
+        return self.get_index(event_dict, default_date=default_date), event_dict
 
     def should_rotate(self):
         return self.rotate_index and ROTATE_OPTIONS.get(self.rotate_index)
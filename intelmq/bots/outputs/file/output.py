@@ -5,29 +5,52 @@
 # -*- coding: utf-8 -*-
 import datetime
 import os
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from pathlib import Path
 
 from intelmq.lib.bot import OutputBot
 
+FSYNC_POLICIES = ('none', 'batch', 'event')
+
+
+def parse_time(value: str) -> datetime.datetime:
+    """
+    Parses a time of the harmonization type DateTime (in UTC) to a naive datetime object.
+    """
+    if value.endswith('+00:00'):
+        try:
+            return datetime.datetime.fromisoformat(value[:-6])
+        except ValueError:
+            pass
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%S+00:00')
+    except ValueError:
+        return datetime.datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f+00:00')
+
 
 class FileOutputBot(OutputBot):
     """Write events to a file"""
     _file = None
+    _files = {}
     encoding_errors_mode = 'strict'
     file: str = "/opt/intelmq/var/lib/bots/file-output/events.txt"  # TODO: should be pathlib.Path
     format_filename: bool = False
+    fsync: str = 'none'
     hierarchical_output: bool = False
     keep_raw_field: bool = False
+    max_open_files: int = 16
     message_jsondict_as_string: bool = False
     message_with_type: bool = False
     single_key: bool = False
     _is_multithreadable = False
 
     def init(self):
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid value {self.fsync!r} of parameter 'fsync', possible values are {FSYNC_POLICIES}.")
+
         # needs to be done here, because in process() FileNotFoundError handling we call init(),
         # otherwise the file would not be opened again
-        self._file = None
+        self.close_files()
 
         self.logger.debug("Opening %r file.", self.file)
         self.errors = self.encoding_errors_mode
@@ -36,8 +59,16 @@ def init(self):
         self.logger.info("File %r is open.", self.file)
 
     def open_file(self, filename: str = None):
-        if self._file is not None:
-            self._file.close()
+        """
+        Makes the file the current one. Up to `max_open_files` files are kept open,
+        the least recently used one is closed if another file is opened.
+        """
+        if filename in self._files:
+            self._files.move_to_end(filename)
+            self._file = self._files[filename]
+            return
+        if len(self._files) >= max(self.max_open_files, 1):
+            self.close_file(next(iter(self._files)))
         try:
             self._file = open(filename, mode='a', encoding='utf-8', errors=self.errors)
         except FileNotFoundError:  # directory does not exist
@@ -49,50 +80,88 @@ def open_file(self, filename: str = None):
                 self.stop()
             else:
                 self._file = open(filename, mode='a', encoding='utf-8', errors=self.errors)
+        self._files[filename] = self._file
 
-    def process(self):
-        event = self.receive_message()
+    def close_file(self, filename: str):
+        file = self._files.pop(filename)
+        if file in self._unflushed:
+            self._unflushed.remove(file)
+            self.sync_file(file)
+        file.close()
+        if file is self._file:
+            self._file = None
+
+    def close_files(self):
+        for filename in list(self._files):
+            self.close_file(filename)
+        self._files = OrderedDict()
+        self._unflushed = set()
+        self._file = None
+
+    def sync_file(self, file):
+        file.flush()
+        if self.fsync != 'none':
+            os.fsync(file.fileno())
+
+    def flush_files(self):
+        """
+        Flushes all written files and, depending on `fsync`, writes them to disk.
+        """
+        for file in self._unflushed:
+            self.sync_file(file)
+        self._unflushed.clear()
+
+    def write_event(self, event):
         if self.format_filename:
             ev = defaultdict(None)
             ev.update(event)
             # remove once #671 is done
             if 'time.observation' in ev:
-                try:
-                    ev['time.observation'] = datetime.datetime.strptime(ev['time.observation'],
-                                                                        '%Y-%m-%dT%H:%M:%S+00:00')
-                except ValueError:
-                    ev['time.observation'] = datetime.datetime.strptime(ev['time.observation'],
-                                                                        '%Y-%m-%dT%H:%M:%S.%f+00:00')
+                ev['time.observation'] = parse_time(ev['time.observation'])
             if 'time.source' in ev:
-                try:
-                    ev['time.source'] = datetime.datetime.strptime(ev['time.source'],
-                                                                   '%Y-%m-%dT%H:%M:%S+00:00')
-                except ValueError:
-                    ev['time.source'] = datetime.datetime.strptime(ev['time.source'],
-                                                                   '%Y-%m-%dT%H:%M:%S.%f+00:00')
+                ev['time.source'] = parse_time(ev['time.source'])
             filename = self.file.format(event=ev)
             if not self._file or filename != self._file.name:
                 self.open_file(filename)
 
-        event_data = self.export_event(event, return_type=str)
+        self._file.write(self.export_event(event, return_type=str) + "\n")
+        if self.fsync == 'event':
+            self.sync_file(self._file)
+        else:
+            self._unflushed.add(self._file)
+
+    def process(self):
+        event = self.receive_message()
 
         try:
-            self._file.write(event_data)
-            self._file.write("\n")
-            self._file.flush()
+            self.write_event(event)
+            self.flush_files()
         except FileNotFoundError:
             self.init()
         else:
             self.acknowledge_message()
 
+    def process_batch(self, messages):
+        """
+        Writes the events and flushes the files once for the whole batch.
+        """
+        try:
+            for message in messages:
+                self.write_event(message)
+            self.flush_files()
+        except FileNotFoundError:
+            self.init()
+            raise
+
     def shutdown(self):
-        if self._file:
-            self._file.close()
+        self.close_files()
 
     @staticmethod
     def check(parameters):
         if 'file' not in parameters:
             return [["error", "Parameter 'file' not given."]]
+        if parameters.get('fsync', 'none') not in FSYNC_POLICIES:
+            return [["error", "Invalid value %r of parameter 'fsync', possible values are %s." % (parameters['fsync'], FSYNC_POLICIES)]]
         dirname = os.path.dirname(parameters['file'])
         if not os.path.exists(dirname) and '{ev' not in dirname:
             path = Path(dirname)
@@ -72,15 +72,26 @@ def create_unique_file(self):
 
     def process(self):
         event = self.receive_message()
-        event_data = self.export_event(event, return_type=str)
+        self.write_file(self.export_event(event, return_type=str))
+        self.acknowledge_message()
+
+    def process_batch(self, messages):
+        """ Writes the events of the batch as JSON lines into one file. """
+        self.write_file(''.join(self.export_event(message, return_type=str) + "\n" for message in messages))
 
+    def write_file(self, data: str):
+        """ Writes the data into a new file in the tmp dir and renames it into the final dir. """
         # Create file in tmp dir
         f, name = self.create_unique_file()
-        f.write(event_data)
-        f.close()
+        try:
+            f.write(data)
+            f.close()
+        except BaseException:
+            f.close()
+            os.remove(path.join(self.tmp, name))
+            raise
         # Rename atomically into the final dir
         os.rename(path.join(self.tmp, name), path.join(self.dir, name))
-        self.acknowledge_message()
 
 
 BOT = FilesOutputBot
@@ -3,24 +3,37 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
 # -*- coding: utf-8 -*-
+import time
+from typing import List, Optional
 
 import redis
 
 from intelmq.lib.bot import OutputBot
 
 
+MAX_LENGTH_POLICIES = ('trim', 'wait')
+
+
 class RedisOutputBot(OutputBot):
     """Send events to a Redis database"""
     hierarchical_output = False
     redis_db: int = 2
+    redis_max_length: Optional[int] = None
+    redis_max_length_policy: str = 'trim'
     redis_password: str = None
     redis_queue: str = None
     redis_server_ip = "127.0.0.1"
     redis_server_port = 6379
     redis_timeout = 5000
     with_type = True
+    # seconds between the checks of the list length if it is full and the policy is 'wait'
+    _wait_interval = 1
 
     def init(self):
+        if self.redis_max_length_policy not in MAX_LENGTH_POLICIES:
+            raise ValueError(f"Invalid value {self.redis_max_length_policy!r} of parameter 'redis_max_length_policy', "
+                             f"possible values are {MAX_LENGTH_POLICIES}.")
+
         self.host = self.redis_server_ip
         self.port = int(self.redis_server_port)
         self.db = int(self.redis_db)
@@ -39,16 +52,46 @@ def init(self):
 
     def process(self):
         event = self.receive_message()
+        self.push([event.to_json(hierarchical=self.hierarchical_output,
+                                 with_type=self.with_type)])
+        self.acknowledge_message()
 
-        try:
-            self.output.lpush(self.queue,
-                              event.to_json(hierarchical=self.hierarchical_output,
-                                            with_type=self.with_type))
-        except Exception:
-            self.logger.exception('Failed to send message. Reconnecting.')
-            self.connect()
+    def process_batch(self, messages):
+        """
+        Pushes the events of the batch with one LPUSH.
+        On errors, the events are processed one by one with the bot's error handling.
+        """
+        self.push([message.to_json(hierarchical=self.hierarchical_output, with_type=self.with_type)
+                   for message in messages])
+
+    def push(self, values: List[str]):
+        """
+        Pushes the values to the list with one request, respecting `redis_max_length`.
+        """
+        if not self.redis_max_length:
+            self.output.lpush(self.queue, *values)
+        elif self.redis_max_length_policy == 'trim':
+            # push and remove the oldest values atomically
+            pipeline = self.output.pipeline(transaction=True)
+            pipeline.lpush(self.queue, *values)
+            pipeline.ltrim(self.queue, 0, self.redis_max_length - 1)
+            pipeline.execute()
         else:
-            self.acknowledge_message()
+            self.wait_for_space()
+            self.output.lpush(self.queue, *values)
+
+    def wait_for_space(self):
+        """
+        Blocks while the list holds `redis_max_length` or more values.
+        """
+        length = self.output.llen(self.queue)
+        if length < self.redis_max_length:
+            return
+        self.logger.warning('List %r holds %d values, waiting until it is shorter than %d.',
+                            self.queue, length, self.redis_max_length)
+        while self.output.llen(self.queue) >= self.redis_max_length:
+            time.sleep(self._wait_interval)
+        self.logger.info('List %r is shorter than %d again, continuing.', self.queue, self.redis_max_length)
 
     def connect(self):
         try:
@@ -61,5 +104,11 @@ def connect(self):
             self.logger.info("Connected successfully to Redis %s at %s:%s!",
                              info['redis_version'], self.host, self.port)
 
+    @staticmethod
+    def check(parameters):
+        if parameters.get('redis_max_length_policy', 'trim') not in MAX_LENGTH_POLICIES:
+            return [["error", "Invalid value %r of parameter 'redis_max_length_policy', possible values are %s."
+                     "" % (parameters['redis_max_length_policy'], MAX_LENGTH_POLICIES)]]
+
 
 BOT = RedisOutputBot
@@ -39,23 +39,86 @@ class SQLOutputBot(OutputBot, SQLMixin):
 
     def init(self):
         super().init()
+        if self.batch_size > 1:
+            # the events of a batch are inserted in one transaction
+            self.autocommit = False
+            if self._engine_name != self.SQLITE:
+                self.con.autocommit = False
 
     def process(self):
-        event = self.receive_message().to_dict(jsondict_as_string=self.jsondict_as_string)
+        keys, values = self.prepare_row(self.receive_message())
+        query = self.insert_query(keys)
+
+        try:
+            executed = self.execute(query, values, rollback=not self.fail_on_errors)
+        except Exception:
+            if not self.autocommit:
+                # end the failed transaction, the following events are inserted in new ones
+                self.rollback()
+            raise
+        if executed:
+            self.con.commit()
+            self.acknowledge_message()
+
+    def process_batch(self, messages):
+        """
+        Inserts the events grouped by their columns, with one statement per group, and commits them at once.
+        If this fails, the events are processed one by one by the bot's error handling.
+        """
+        rows = {}
+        for message in messages:
+            keys, values = self.prepare_row(message)
+            rows.setdefault(keys, []).append(values)
+
+        self.insert_rows(rows)
+
+    def insert_rows(self, rows: dict):
+        """
+        Inserts the rows, a list of values per tuple of column names, in one transaction.
+        Errors of the database driver are raised after the transaction has been rolled back.
+        """
+        try:
+            for keys, values in rows.items():
+                self.execute(self.insert_query(keys, many=True), values,
+                             rollback=not self.fail_on_errors, many=True, reraise=True)
+            self.con.commit()
+        except Exception:
+            # e.g. invalid values, roll back the inserted groups before the events are processed one by one
+            self.rollback()
+            raise
+
+    def rollback(self):
+        """
+        Rolls back the current transaction, ignoring errors, e.g. of a closed connection.
+        """
+        try:
+            self.con.rollback()
+        except Exception:
+            self.logger.debug('Rollback failed.', exc_info=True)
+
+    def prepare_row(self, event):
+        """
+        Returns the column names and the values of the event.
+        """
+        event = event.to_dict(jsondict_as_string=self.jsondict_as_string)
 
         key_names = self.fields
         if key_names is None:
             key_names = event.keys()
-        valid_keys = [key for key in key_names if key in event]
-        keys = '", "'.join(valid_keys)
-        values = self.prepare_values(itemgetter_tuple(*valid_keys)(event))
-        fvalues = len(values) * f'{self.format_char}, '
-        query = ('INSERT INTO {table} ("{keys}") VALUES ({values})'
-                 ''.format(table=self.table, keys=keys, values=fvalues[:-2]))
-
-        if self.execute(query, values, rollback=not self.fail_on_errors):
-            self.con.commit()
-            self.acknowledge_message()
+        valid_keys = tuple(key for key in key_names if key in event)
+        return valid_keys, self.prepare_values(itemgetter_tuple(*valid_keys)(event))
+
+    def insert_query(self, keys, many: bool = False) -> str:
+        """
+        Returns the INSERT statement for the columns. If `many` is true, the statement is
+        meant for `execute(..., many=True)`, with PostgreSQL it has a single placeholder for all rows.
+        """
+        if many and self._engine_name == self.POSTGRESQL:
+            values = '%s'
+        else:
+            values = '({})'.format(', '.join(len(keys) * [self.format_char]))
+        return 'INSERT INTO {table} ("{keys}") VALUES {values}'.format(table=self.table, keys='", "'.join(keys),
+                                                                       values=values)
 
     def prepare_values(self, values):
         if self._engine_name == self.POSTGRESQL:
@@ -9,9 +9,11 @@
 Copyright (C) 2016 by Bundesamt für Sicherheit in der Informationstechnik
 Software engineering by Intevation GmbH
 """
+import json
+
 from intelmq.lib.bot import ParserBot
 from intelmq.lib.message import MessageFactory
-from intelmq.lib.utils import base64_decode
+from intelmq.lib.utils import base64_decode, base64_decode_stream, iter_json_array
 
 
 class JSONParserBot(ParserBot):
@@ -21,7 +23,10 @@ class JSONParserBot(ParserBot):
     def process(self):
         report = self.receive_message()
         if self.splitlines:
-            lines = base64_decode(report['raw']).splitlines()
+            lines = (line.rstrip('\r\n') for line in base64_decode_stream(report['raw']))
+        elif base64_decode_stream(report['raw']).read(4096).lstrip().startswith('['):
+            # a JSON array of events, parsed element by element
+            lines = (json.dumps(element) for element in iter_json_array(base64_decode_stream(report['raw'])))
         else:
             lines = [base64_decode(report['raw'])]
 
@@ -208,12 +208,12 @@ class MicrosoftCTIPParserBot(ParserBot):
     overwrite: bool = True  # overwrite existing fields
 
     def parse(self, report):
-        raw_report = utils.base64_decode(report.get("raw"))
-        if raw_report.startswith('['):
+        first_character = utils.base64_decode_stream(report.get("raw")).read(1)
+        if first_character == '[':
             # Interflow
             self.recover_line = self.recover_line_json
             yield from self.parse_json(report)
-        elif raw_report.startswith('{'):
+        elif first_character == '{':
             # Azure
             self.recover_line = self.recover_line_json_stream
             yield from self.parse_json_stream(report)
@@ -84,9 +84,11 @@
 import json
 import tempfile
 import time
-from typing import Optional, Dict, Tuple, Any
+from collections import Counter
+from typing import Optional, Dict, Tuple, Any, List, Sequence
 
 import intelmq.lib.harmonization as harmonization
+from intelmq.lib.exceptions import InvalidKey, InvalidValue
 from intelmq.lib.utils import create_request_session
 from intelmq import VAR_STATE_PATH
 
@@ -107,6 +109,7 @@ class __Container:
 __config.test_mode = False
 __config.feedname_mapping = {}
 __config.filename_mapping = {}
+__config.converters = {}
 
 
 def set_logger(logger):
@@ -328,6 +331,147 @@ def extract_cve_from_tag(tag: str) -> Optional[str]:
 }
 
 
+class RowConverter:
+    """
+    The mapping of a feed compiled for the columns of a report.
+
+    The conversion functions are resolved, the mapping targets classified and the columns
+    which are not mapped by the feed's configuration (and thus always go to extra) determined
+    only once, instead of for every row.
+    """
+
+    def __init__(self, feedname: str, conf: Dict[str, Any], fieldnames: Sequence[str], logger):
+        self.feedname = feedname
+        self.logger = logger
+        self.constant_fields = conf.get('constant_fields', {})
+        columns = Counter(fieldnames)
+        # required fields: (intelmqkey, shadowkey, function name, function, function takes the row)
+        self.required_fields = []
+        for item in conf.get('required_fields'):
+            intelmqkey, shadowkey = item[:2]
+            if shadowkey not in columns:
+                raise ValueError('Required column {!r} not found in feed {!r}. Possible change in data'
+                                 ' format or misconfiguration.'.format(shadowkey, feedname))
+            function_name = item[2] if len(item) > 2 else None
+            function = functions[function_name] if function_name is not None else None
+            self.required_fields.append((intelmqkey, shadowkey, function_name, function,
+                                         len(item) == 4 and bool(item[3])))
+        # optional fields: (intelmqkey, shadowkey, function name, function, function takes the row,
+        #                   key in extra or None, column is ignored)
+        self.optional_fields = []
+        for item in conf.get('optional_fields'):
+            intelmqkey, shadowkey = item[:2]
+            if shadowkey not in columns:
+                self.logger.warning('Optional key {!r} not found in feed {!r}. Possible change in data'
+                                    ' format or misconfiguration.'.format(shadowkey, feedname))
+                continue
+            function_name = item[2] if len(item) > 2 else None
+            if intelmqkey == 'extra.':
+                extra_key = shadowkey
+            elif intelmqkey and intelmqkey.startswith('extra.'):
+                extra_key = intelmqkey.replace('extra.', '', 1)
+            else:
+                extra_key = None
+            self.optional_fields.append((intelmqkey, shadowkey, function_name, functions.get(function_name),
+                                         len(item) == 4 and bool(item[3]), extra_key, intelmqkey is False))
+        # number of occurrences in the header of the mapped columns
+        self.mapped_columns = {shadowkey: columns[shadowkey]
+                               for _, shadowkey, *_ in self.required_fields + self.optional_fields}
+        # columns which are always added to extra if not empty
+        self.unmapped_columns = [column for column in columns if column not in self.mapped_columns]
+
+    def __convert(self, shadowkey: str, function_name: str, function, with_row: bool,
+                  raw_value: str, row: Dict[str, str]):
+        try:
+            if with_row:
+                return function(raw_value, row)
+            return function(raw_value)
+        except Exception:
+            """ fail early and often in this case. We want to be able to convert everything """
+            self.logger.error('Could not convert shadowkey: %r in feed %r, '
+                              'value: %r via conversion function %r.',
+                              shadowkey, self.feedname, raw_value, function_name)
+            raise
+
+    def convert(self, row: Dict[str, str], event) -> Dict[str, Any]:
+        """
+        Adds the mapped and constant fields of the row to the event.
+
+        Returns:
+            The fields for extra, including all columns which could not be added to the event.
+        """
+        extra = {}
+        # Each time a column was successfully added, its count is decremented.
+        # A column used multiple times is counted again.
+        # At the end, all remaining columns are added to extra.
+        remaining = self.mapped_columns.copy()
+
+        # Fail hard if a required field can't be added
+        for intelmqkey, shadowkey, function_name, function, with_row in self.required_fields:
+            if not remaining[shadowkey]:
+                remaining[shadowkey] = 1
+            value = raw_value = row.get(shadowkey)
+            if function is not None and raw_value is not None:
+                value = self.__convert(shadowkey, function_name, function, with_row, raw_value, row)
+            if value is not None:
+                try:
+                    event.add(intelmqkey, value)
+                except InvalidKey:
+                    self.logger.warning('Key not found in IDF %r.', intelmqkey)
+                remaining[shadowkey] -= 1
+
+        # The value is added to extra if an optional field can't be added
+        for (intelmqkey, shadowkey, function_name, function, with_row,
+             extra_key, ignore) in self.optional_fields:
+            if not remaining[shadowkey]:
+                remaining[shadowkey] = 1
+            value = raw_value = row.get(shadowkey)
+            if function is not None and raw_value is not None:
+                value = self.__convert(shadowkey, function_name, function, with_row, raw_value, row)
+            if value is not None:
+                if extra_key is not None:
+                    extra[extra_key] = value
+                elif not ignore:
+                    try:
+                        event.add(intelmqkey, value)
+                    except InvalidValue:
+                        self.logger.debug('Could not add key %r in feed %r, adding it to extras.',
+                                          shadowkey, self.feedname)
+                        continue
+                    except InvalidKey:
+                        extra[intelmqkey] = value
+            remaining[shadowkey] -= 1
+
+        event.update(self.constant_fields)
+
+        # Add everything which could not be resolved to extra.
+        for column in self.unmapped_columns:
+            value = row[column]
+            if value != "":
+                extra[column] = value
+        for column, count in remaining.items():
+            if count:
+                value = row[column]
+                if value != "":
+                    extra[column] = value
+        return extra
+
+
+def get_row_converter(feedname: str, conf: Dict[str, Any], fieldnames: List[str]) -> RowConverter:
+    """
+    Returns the converter of the feed for the columns, compiled once per feed and columns.
+
+    Raises:
+        ValueError: If a required column is missing.
+    """
+    key = (feedname, tuple(fieldnames))
+    try:
+        return __config.converters[key]
+    except KeyError:
+        converter = __config.converters[key] = RowConverter(feedname, conf, fieldnames, __config.logger)
+        return converter
+
+
 def reload():
     """ reload the configuration if it has changed """
     mtime = 0.0
@@ -345,6 +489,7 @@ def reload():
 
     __config.feedname_mapping.clear()
     __config.filename_mapping.clear()
+    __config.converters.clear()
     if os.path.isfile(__config.schema_active):
         with open(__config.schema_active) as fh:
             schema = json.load(fh)
@@ -20,13 +20,11 @@
         feed.name and does not override it with the corresponding feed name.
     feedname: The fixed feed name to use if it should not automatically detected.
 """
-import copy
 import re
 import os
 import tempfile
 
 from intelmq.lib.bot import ParserBot
-from intelmq.lib.exceptions import InvalidKey, InvalidValue
 from intelmq.bin.intelmqctl import IntelMQController
 import intelmq.lib.utils as utils
 import intelmq.bots.parsers.shadowserver._config as config
@@ -105,15 +103,8 @@ def parse(self, report):
     def parse_line(self, row, report):
 
         conf = self._sparser_config
-
-        # we need to copy here...
-        fields = copy.copy(self.csv_fieldnames)
-        # We will use this variable later.
-        # Each time a field was successfully added to the
-        # intelmq-event, this field will be removed from
-        # the fields array.
-        # at the end, all remaining fields are added to the
-        # extra field.
+        # the mapping compiled for the feed and the columns of the report
+        converter = config.get_row_converter(self.feedname, conf, self.csv_fieldnames)
 
         event = self.new_event(report)
         # set feed.name and code, honor the overwrite parameter
@@ -122,119 +113,13 @@ def parse_line(self, row, report):
         # set feed.documentation to a report url
         event.add('feed.documentation', conf.get('url'), overwrite=False)
 
-        extra = {}  # The Json-Object which will be populated with the
-        # fields that could not be added to the standard intelmq fields
-        # the parser is going to write this information into an object
-        # one level below the "extra root"
+        # Add the required, optional and constant fields.
+        # extra holds the fields that could not be added to the standard intelmq fields
         # e.g.: extra {'cc_dns': '127.0.0.1'}
-
-        # Iterate Config, add required fields.
-        # Fail hard if not possible:
-        for item in conf.get('required_fields'):
-            intelmqkey, shadowkey = item[:2]
-            if shadowkey not in fields:
-                if shadowkey not in row:  # key does not exist in data (not even in the header)
-                    raise ValueError('Required column {!r} not found in feed {!r}. Possible change in data'
-                                     ' format or misconfiguration.'.format(shadowkey, self.feedname))
-                else:  # key is used twice
-                    fields.append(shadowkey)
-            if len(item) > 2:
-                conv_func = item[2]
-            else:
-                conv_func = None
-
-            raw_value = row.get(shadowkey)
-
-            value = raw_value
-
-            if conv_func is not None and raw_value is not None:
-                try:
-                    if len(item) == 4 and item[3]:
-                        value = config.functions[conv_func](raw_value, row)
-                    else:
-                        value = config.functions[conv_func](raw_value)
-                except Exception:
-                    """ fail early and often in this case. We want to be able to convert everything """
-                    self.logger.error('Could not convert shadowkey: %r in feed %r, '
-                                      'value: %r via conversion function %r.',
-                                      shadowkey, self.feedname, raw_value, conv_func)
-                    raise
-
-            if value is not None:
-                try:
-                    event.add(intelmqkey, value)
-                except InvalidKey:
-                    self.logger.warning('Key not found in IDF %r.', intelmqkey)
-                fields.remove(shadowkey)
-
-        # Now add optional fields.
-        # This action may fail, the value is added to
-        # extra if an add operation failed
-        for item in conf.get('optional_fields'):
-            intelmqkey, shadowkey = item[:2]
-            if shadowkey not in fields:
-                if shadowkey not in row:  # key does not exist in data (not even in the header)
-                    self.logger.warning('Optional key {!r} not found in feed {!r}. Possible change in data'
-                                        ' format or misconfiguration.'.format(shadowkey, self.feedname))
-                    continue
-                else:  # key is used twice
-                    fields.append(shadowkey)
-            if len(item) > 2:
-                conv_func = item[2]
-            else:
-                conv_func = None
-            raw_value = row.get(shadowkey)
-            value = raw_value
-
-            if conv_func is not None and raw_value is not None and conv_func in config.functions:
-                try:
-                    if len(item) == 4 and item[3]:
-                        value = config.functions[conv_func](raw_value, row)
-                    else:
-                        value = config.functions[conv_func](raw_value)
-                except Exception:
-                    """ fail early and often in this case. We want to be able to convert everything """
-                    self.logger.error('Could not convert shadowkey: %r in feed %r, '
-                                      'value: %r via conversion function %r.',
-                                      shadowkey, self.feedname, raw_value, conv_func)
-                    raise
-
-            if value is not None:
-                if intelmqkey == 'extra.':
-                    extra[shadowkey] = value
-                    fields.remove(shadowkey)
-                    continue
-                elif intelmqkey and intelmqkey.startswith('extra.'):
-                    extra[intelmqkey.replace('extra.', '', 1)] = value
-                    fields.remove(shadowkey)
-                    continue
-                elif intelmqkey is False:
-                    # ignore it explicitly
-                    fields.remove(shadowkey)
-                    continue
-                try:
-                    event.add(intelmqkey, value)
-                    fields.remove(shadowkey)
-                except InvalidValue:
-                    self.logger.debug('Could not add key %r in feed %r, adding it to extras.',
-                                      shadowkey, self.feedname)
-                except InvalidKey:
-                    extra[intelmqkey] = value
-                    fields.remove(shadowkey)
-            else:
-                fields.remove(shadowkey)
-
-        # Now add additional constant fields.
-        event.update(conf.get('constant_fields', {}))
+        extra = converter.convert(row, event)
 
         event.add('raw', self.recover_line())
 
-        # Add everything which could not be resolved to extra.
-        for f in fields:
-            val = row[f]
-            if not val == "":
-                extra[f] = val
-
         if extra:
             event.add('extra', extra)
 
@@ -12,7 +12,6 @@
 import argparse
 import atexit
 import csv
-import fcntl
 import inspect
 import io
 import json
@@ -26,10 +25,10 @@
 import traceback
 import types
 import warnings
-from collections import defaultdict
+from collections import defaultdict, deque
 from copy import deepcopy
 from datetime import datetime, timedelta
-from typing import Any, List, Optional, Union, Tuple
+from typing import Any, Iterator, List, Optional, Union, Tuple
 from pkg_resources import resource_filename
 
 import intelmq.lib.message as libmessage
@@ -37,7 +36,8 @@
                      DEFAULT_LOGGING_LEVEL,
                      HARMONIZATION_CONF_FILE,
                      RUNTIME_CONF_FILE, __version__)
-from intelmq.lib import cache, exceptions, utils
+from intelmq.lib import cache, codec, dump, exceptions, utils
+from intelmq.lib.histogram import Histogram
 from intelmq.lib.pipeline import PipelineFactory, Pipeline
 from intelmq.lib.utils import RewindableFileHandle, base64_decode
 from intelmq.lib.datatypes import BotType, Dict39
@@ -78,7 +78,10 @@ class Bot:
     name: Optional[str] = None
     # Imported from the legacy defaults.conf
     accuracy: int = 100
+    batch_linger: float = 0
+    batch_size: int = 1
     destination_pipeline_broker: str = "redis"
+    destination_pipeline_codec: str = "json"
     destination_pipeline_db: int = 2
     destination_pipeline_host: str = "127.0.0.1"
     destination_pipeline_password: Optional[str] = None
@@ -96,6 +99,7 @@ class Bot:
     http_user_agent: str = "Mozilla/5.0 (Windows NT 6.1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/41.0.2228.0 Safari/537.36"
     http_verify_cert: Union[bool, str] = True
     https_proxy: Optional[str] = None
+    instances_processes: int = 0
     instances_threads: int = 0
     load_balance: bool = False
     log_processed_messages_count: int = 500
@@ -111,6 +115,7 @@ class Bot:
     source_pipeline_host: str = "127.0.0.1"
     source_pipeline_password: Optional[str] = None
     source_pipeline_port: int = 6379
+    source_pipeline_trusted: bool = False
     source_queue: Optional[str] = None
     ssl_ca_certificate: Optional[str] = None
     statistics_database: int = 3
@@ -134,6 +139,8 @@ def __init__(self, bot_id: str, start: bool = False, sighup_event=None,
                  source_queue: Optional[str] = None, standalone: bool = False):
 
         self.__log_buffer: list = []
+        # received, but not yet acknowledged messages of a batch, see `process_batch`
+        self.__batch: deque = deque()
 
         self.__error_retries_counter: int = 0
         self.__source_pipeline: Optional[Pipeline] = None
@@ -154,6 +161,10 @@ def __init__(self, bot_id: str, start: bool = False, sighup_event=None,
                                   "path": defaultdict(int),  # number of messages sent to queues since last report to redis
                                   "path_total": defaultdict(int)  # number of messages sent to queues since beginning
                                   }
+        # durations of the stages per processed message or batch since the beginning, see `__record_latency`
+        self.__latency = {stage: Histogram() for stage in ('receive', 'process', 'send')}
+        # seconds spent in the pipelines during the current message or batch
+        self.__pipeline_seconds = {'receive': 0.0, 'send': 0.0}
 
         try:
             version_info = sys.version.splitlines()[0].strip()
@@ -172,7 +183,11 @@ def __init__(self, bot_id: str, start: bool = False, sighup_event=None,
             self.__load_configuration()
 
             if self.__instance_id:
-                self.is_multithreaded = True
+                if threading.current_thread() != threading.main_thread():
+                    self.is_multithreaded = True
+                elif int(self.__instance_id) >= int(self.instances_processes or 0):
+                    raise ValueError(f'Invalid bot instance {bot_id!r}, the parameter instances_processes '
+                                     f'is {self.instances_processes!r}.')
             self.__init_logger()
         except Exception:
             self.__log('critical', traceback.format_exc())
@@ -192,7 +207,7 @@ def __init__(self, bot_id: str, start: bool = False, sighup_event=None,
                 self._is_multithreadable = False
 
             """ Multithreading """
-            if (self.instances_threads > 1 and not self.is_multithreaded and
+            if (self.instances_threads > 1 and not self.__instance_id and
                self._is_multithreadable and not disable_multithreading):
                 self.logger.handlers = []
                 num_instances = int(self.instances_threads)
@@ -242,7 +257,7 @@ def handle_sighup_signal_threading(signum: int,
 
             # only the main thread registers the signal handlers
             # in library-mode, handle no signals to not interfere with the caller
-            if not self.__instance_id and self._standalone:
+            if not self.is_multithreaded and self._standalone:
                 self.__sighup = threading.Event()
                 signal.signal(signal.SIGHUP, self.__handle_sighup_signal)
                 # system calls should not be interrupted, but restarted
@@ -272,6 +287,7 @@ def catch_shutdown():
                                          password=self.statistics_password,
                                          ttl=None,
                                          )
+        self.__register_instance()
         if start:
             self.start()
 
@@ -350,6 +366,7 @@ def start(self, starting: bool = True, error_on_pipeline: bool = True,
                 starting: bool = False
                 error_on_message: bool = False
                 message_to_dump: Optional[dict] = None
+                processed_messages: int = 1
 
                 if error_on_pipeline:
                     try:
@@ -360,7 +377,16 @@ def start(self, starting: bool = True, error_on_pipeline: bool = True,
                         error_on_pipeline = False
 
                 self.__handle_sighup()
-                self.process()
+                self.__pipeline_seconds['receive'] = self.__pipeline_seconds['send'] = 0.0
+                iteration_start = time.perf_counter()
+                if self.__batch_processing:
+                    processed_messages = self.__process_batch()
+                else:
+                    self.process()
+                if self.__destination_pipeline:
+                    # e.g. collectors do not acknowledge messages
+                    self.__flush_destination()
+                self.__record_latency(time.perf_counter() - iteration_start)
                 self.__error_retries_counter = 0  # reset counter
 
             except exceptions.PipelineError as exc:
@@ -471,7 +497,7 @@ def start(self, starting: bool = True, error_on_pipeline: bool = True,
                             # https://lists.cert.at/pipermail/intelmq-users/2018-October/000085.html
                             pass
                 else:
-                    self.__message_counter["success"] += 1
+                    self.__message_counter["success"] += processed_messages
                     do_rate_limit = True
 
                     # no errors, check for run mode: scheduled
@@ -494,6 +520,61 @@ def start(self, starting: bool = True, error_on_pipeline: bool = True,
             self.__stats()
             self.__handle_sighup()
 
+    @property
+    def __batch_processing(self) -> bool:
+        """
+        Batch processing is used if the bot implements `process_batch` and `batch_size` is larger than 1.
+        """
+        return (self.batch_size > 1 and self.__source_pipeline is not None and
+                type(self).process_batch is not Bot.process_batch)
+
+    def process_batch(self, messages: List[libmessage.Message]):
+        """
+        Optional hook for bots which can process multiple messages at once, e.g. to amortise I/O.
+
+        If implemented and the parameter `batch_size` is larger than 1, it is called with up to
+        `batch_size` messages instead of `process`. If fewer messages are available, the bot waits up to
+        `batch_linger` seconds for further ones. The bot must not receive or
+        acknowledge messages itself, all messages are acknowledged after this method returned.
+
+        If this method raises an exception, the messages of the batch are processed one by one
+        with the usual error handling (retries, dumping, `_on_error` path) by calling
+        this method with a single message each.
+
+        Parameters:
+            messages: The received messages
+        """
+        raise NotImplementedError
+
+    def __process_batch(self) -> int:
+        """
+        Receives a batch of messages and passes it to `process_batch`.
+
+        Returns:
+            The number of successfully processed messages
+        """
+        if not self.__batch:
+            receive_start = time.perf_counter()
+            self.__batch.extend(self.__source_pipeline.receive_batch(self.batch_size, self.batch_linger))
+            self.__pipeline_seconds['receive'] += time.perf_counter() - receive_start
+            self.logger.debug('Received batch of %d messages.', len(self.__batch))
+            try:
+                messages = [self.__unserialize_message(message) for message in self.__batch]
+                self.process_batch(messages)
+            except exceptions.PipelineError:
+                raise
+            except Exception as exc:
+                self.logger.warning('Processing the batch of %d messages failed (%s), processing them one by one now.',
+                                    len(self.__batch), utils.error_message_from_exc(exc))
+            else:
+                for _ in messages:
+                    self.acknowledge_message()
+                return len(messages)
+
+        self.process_batch([self.receive_message()])
+        self.acknowledge_message()
+        return 1
+
     def __stats(self, force: bool = False):
         """
         Flush stats to redis
@@ -520,10 +601,32 @@ def __stats(self, force: bool = False):
                                    self.__message_counter["success"])
             self.__stats_cache.set(".".join((self.__bot_id_full, "stats", "failure")),
                                    self.__message_counter["failure"])
+            for stage, histogram in self.__latency.items():
+                if histogram.count:
+                    self.__stats_cache.set(".".join((self.__bot_id_full, "latency", stage)),
+                                           json.dumps(histogram.to_dict()))
             self.__message_counter["stats_timestamp"] = datetime.now()
         except Exception:
             self.logger.debug('Failed to write statistics to cache, check your `statistics_*` settings.', exc_info=True)
 
+    def __record_latency(self, duration: float):
+        """
+        Records the durations of the stages of a processed message or batch:
+        the time waiting for the messages of the source pipeline (receive),
+        sending the messages to the destination pipeline (send) and the remaining time (process).
+        """
+        receive, send = self.__pipeline_seconds['receive'], self.__pipeline_seconds['send']
+        if self.__source_pipeline:
+            self.__latency['receive'].record(receive)
+        if self.__destination_pipeline:
+            self.__latency['send'].record(send)
+        self.__latency['process'].record(max(duration - receive - send, 0.0))
+
+    def __flush_destination(self):
+        send_start = time.perf_counter()
+        self.__destination_pipeline.flush()
+        self.__pipeline_seconds['send'] += time.perf_counter() - send_start
+
     def __reset_total_path_stats(self):
         """Initially set destination paths to 0 to reset them in stats cache"""
         if not self.destination_queues:
@@ -586,6 +689,7 @@ def stop(self, exitcode: int = 1):
                                                               self.__message_counter["since"]))
 
         self.__stats(force=True)
+        self.__register_instance(register=False)
         self.__disconnect_pipelines()
 
         if self.logger:
@@ -613,16 +717,41 @@ def __print_log_buffer(self):
         self.__log_buffer = []
 
     def __check_bot_id(self, name: str) -> Tuple[str, str, str]:
+        """
+        The instance ID is the number of the thread or, in the main thread, of the process.
+        """
         res = re.fullmatch(r'([0-9a-zA-Z\-]+)(\.[0-9]+)?', name)
         if res:
-            if not (res.group(2) and threading.current_thread() == threading.main_thread()):
-                return name, res.group(1), res.group(2)[1:] if res.group(2) else None
+            return name, res.group(1), res.group(2)[1:] if res.group(2) else None
         self.__log('error',
                    "Invalid bot id, must match '"
                    r"[^0-9a-zA-Z\-]+'.")
         self.stop()
         return False, False, False
 
+    @property
+    def __process_instance_id(self) -> Optional[str]:
+        """
+        The instance ID if the bot runs in multiple processes, see `instances_processes`.
+        """
+        return None if self.is_multithreaded else self.__instance_id
+
+    def __register_instance(self, register: bool = True):
+        """
+        Adds the process instance to (or removes it from) the set `<bot_id>.instances` in the statistics cache,
+        so that the statistics of all instances can be found.
+        """
+        if not self.__stats_cache or self.__process_instance_id is None:
+            return
+        try:
+            if register:
+                self.__stats_cache.redis.sadd(f'{self.__bot_id}.instances', self.__process_instance_id)
+            else:
+                self.__stats_cache.redis.srem(f'{self.__bot_id}.instances', self.__process_instance_id)
+        except Exception:
+            self.logger.debug('Failed to register the instance in the cache, check your `statistics_*` settings.',
+                              exc_info=True)
+
     def __connect_pipelines(self):
         pipeline_args = {key: getattr(self, key) for key in dir(self) if not inspect.ismethod(getattr(self, key)) and (key.startswith('source_pipeline_') or key.startswith('destination_pipeline'))}
         if self.source_queue is not None:
@@ -632,10 +761,12 @@ def __connect_pipelines(self):
                                                             queues=self.source_queue,
                                                             pipeline_args=pipeline_args,
                                                             load_balance=self.load_balance,
-                                                            is_multithreaded=self.is_multithreaded)
+                                                            is_multithreaded=self.is_multithreaded,
+                                                            instance_id=self.__process_instance_id)
 
             self.__source_pipeline.connect()
             self.__current_message = None
+            self.__batch.clear()
             self.logger.info("Connected to source queue.")
 
         if self.destination_queues:
@@ -697,12 +828,12 @@ def send_message(self, *messages, path: str = "_default", auto_add=None,
             # Message counter end
 
             if self.__pipeline_serialize_messages:
-                raw_message = libmessage.MessageFactory.serialize(message)
-                self.__destination_pipeline.send(raw_message, path=path,
-                                                 path_permissive=path_permissive)
-            else:
-                self.__destination_pipeline.send(message, path=path,
-                                                 path_permissive=path_permissive)
+                message = libmessage.MessageFactory.serialize(message,
+                                                              codec=codec.get_codec(self.destination_pipeline_codec))
+            send_start = time.perf_counter()
+            self.__destination_pipeline.send(message, path=path,
+                                             path_permissive=path_permissive)
+            self.__pipeline_seconds['send'] += time.perf_counter() - send_start
 
     def receive_message(self) -> libmessage.Message:
         """
@@ -716,10 +847,17 @@ def receive_message(self) -> libmessage.Message:
             self.logger.debug("Reusing existing current message as incoming.")
             return self.__current_message
 
+        if self.__batch:
+            # the remaining messages of a failed batch, which are processed one by one
+            self.__current_message = self.__unserialize_message(self.__batch[0])
+            return self.__current_message
+
         self.logger.debug('Waiting for incoming message.')
         message = None
         while not message:
+            receive_start = time.perf_counter()
             message = self.__source_pipeline.receive()
+            self.__pipeline_seconds['receive'] += time.perf_counter() - receive_start
             if not message:
                 self.logger.warning('Empty message received. Some previous bot sent invalid data.')
                 self.__handle_sighup()
@@ -733,17 +871,7 @@ def receive_message(self) -> libmessage.Message:
             self.__handle_sighup()
             return self.receive_message()
 
-        try:
-            if self.__pipeline_serialize_messages:
-                self.__current_message = libmessage.MessageFactory.unserialize(message,
-                                                                               harmonization=self.harmonization)
-            else:
-                self.__current_message = message
-
-        except exceptions.InvalidKey as exc:
-            # In case a incoming message is malformed an does not conform with the currently
-            # loaded harmonization, stop now as this will happen repeatedly without any change
-            raise exceptions.ConfigurationError('harmonization', exc.args[0])
+        self.__current_message = self.__unserialize_message(message)
 
         if self.logger.isEnabledFor(logging.DEBUG):
             if 'raw' in self.__current_message and len(self.__current_message['raw']) > 400:
@@ -755,14 +883,36 @@ def receive_message(self) -> libmessage.Message:
 
         return self.__current_message
 
+    def __unserialize_message(self, message: Union[bytes, str, libmessage.Message]) -> libmessage.Message:
+        """
+        Converts a message as received from the pipeline to a Message object.
+        """
+        if not self.__pipeline_serialize_messages:
+            return message
+        try:
+            return libmessage.MessageFactory.unserialize(message,
+                                                         harmonization=self.harmonization,
+                                                         trusted=self.source_pipeline_trusted)
+        except exceptions.InvalidKey as exc:
+            # In case a incoming message is malformed an does not conform with the currently
+            # loaded harmonization, stop now as this will happen repeatedly without any change
+            raise exceptions.ConfigurationError('harmonization', exc.args[0])
+
     def acknowledge_message(self):
         """
         Acknowledges that the last message has been processed, if any.
 
         For bots without source pipeline (collectors), this is a no-op.
+
+        Messages buffered by the destination pipeline are sent before, so that
+        a message is never acknowledged before its results have been sent.
         """
+        if self.__destination_pipeline:
+            self.__flush_destination()
         if self.__source_pipeline:
             self.__source_pipeline.acknowledge()
+        if self.__batch:
+            self.__batch.popleft()
 
         # free memory of last message
         self.__current_message = None
@@ -775,48 +925,19 @@ def _dump_message(self, error_traceback, message: dict):
 
         dump_file = os.path.join(self.logging_path, self.__bot_id + ".dump")
 
-        timestamp = datetime.utcnow()
-        timestamp: str = timestamp.isoformat()
-        new_dump_data: dict = {}
-        new_dump_data[timestamp]: dict = {}
-        new_dump_data[timestamp]["bot_id"] = self.__bot_id
-        new_dump_data[timestamp]["source_queue"] = self.source_queue
-        new_dump_data[timestamp]["traceback"] = error_traceback
+        record: dict = {"timestamp": datetime.utcnow().isoformat(),
+                        "bot_id": self.__bot_id,
+                        "source_queue": self.source_queue,
+                        "traceback": error_traceback}
 
         if isinstance(message, bytes):
             # decoding errors
-            new_dump_data[timestamp]["message"] = utils.base64_encode(message)
-            new_dump_data[timestamp]["message_type"] = 'base64'
+            record["message"] = utils.base64_encode(message)
+            record["message_type"] = 'base64'
         else:
-            new_dump_data[timestamp]["message"] = message.serialize()
+            record["message"] = message.serialize()
 
-        if os.path.exists(dump_file):
-            # existing dump
-            mode = 'r+'
-        else:
-            # new dump file
-            mode = 'w'
-        with open(dump_file, mode) as fp:
-            for i in range(60):
-                try:
-                    fcntl.flock(fp, fcntl.LOCK_EX | fcntl.LOCK_NB)
-                except BlockingIOError:
-                    if i == 0:
-                        self.logger.warning('Dump file is locked, waiting up to 60s.')
-                    time.sleep(1)
-                else:
-                    break
-            else:
-                raise ValueError('Dump file was locked for more than 60s, giving up now.')
-            if mode == 'r+':
-                dump_data = json.load(fp)
-                dump_data.update(new_dump_data)
-            else:
-                dump_data = new_dump_data
-
-            fp.seek(0)
-
-            json.dump(dump_data, fp, indent=4, sort_keys=True)
+        dump.append(dump_file, record)
 
         self.logger.debug('Message dumped.')
 
@@ -877,6 +998,8 @@ def __load_configuration(self):
             self.__log_configuration_parameter("environment", option, value)
 
         self.__log_processed_messages_seconds = timedelta(seconds=self.log_processed_messages_seconds)
+        # fail early for unknown codecs and missing dependencies
+        codec.get_codec(self.destination_pipeline_codec)
 
         # The default source_queue should be "{bot-id}-queue",
         # but this can be overridden
@@ -1083,6 +1206,8 @@ class ParserBot(Bot):
 
     default_fields: Optional[dict] = {}
     copy_collector_provided_fields: Optional[list] = []
+    # the current report and the event created from it, see new_event
+    __event_template: Optional[Tuple[libmessage.Report, libmessage.Event]] = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -1094,11 +1219,16 @@ def __init__(self, *args, **kwargs):
 
         # validate default fields
         stop = False
+        # the default fields with their sanitized values, as stored in the events
+        self.__default_fields: List[Tuple[str, dict]] = []
         if self.default_fields:
             dummy_event = self.new_event()
             for key, value in self.default_fields.items():
                 try:
                     dummy_event.add(key, value, raise_failure=True)
+                    sanitized = self.new_event()
+                    if sanitized.add(key, value):
+                        self.__default_fields.append((key, dict(sanitized)))
 
                 except exceptions.InvalidValue:
                     self.logger.error("Invalid value of key '%s' in default_fields parameter.", key)
@@ -1128,7 +1258,65 @@ def _get_io_and_save_line_ending(self, raw: str) -> io.StringIO:
             self._line_ending = '\r\n'
         return data_io
 
+    def _get_lines_and_save_line_ending(self, report: libmessage.Report) -> Iterator[str]:
+        """
+        Decodes the raw data of the report lazily and yields its lines, including the line endings.
+
+        The lines are the same as those of the stripped report without null characters, but the
+        decoded report is never held in memory as a whole. The line ending is saved in
+        self._line_ending as in `_get_io_and_save_line_ending`, mixed line endings result in \\r\\n.
+        """
+        self._line_ending = '\r\n'
+        first_line_ending = None
+        previous = None
+        # lines consisting of whitespace only, dropped at the end of the report
+        whitespace_lines = []
+
+        for line in utils.base64_decode_stream(report.get("raw")):
+            if '\x00' in line:
+                line = line.replace('\x00', '')
+            if previous is None:
+                line = line.lstrip()
+                if not line:
+                    continue
+            elif line.isspace() or not line:
+                whitespace_lines.append(line)
+                continue
+            if previous is not None:
+                for complete_line in [previous] + whitespace_lines:
+                    line_ending = '\r\n' if complete_line.endswith('\r\n') else complete_line[-1]
+                    if line_ending in '\r\n':
+                        if first_line_ending is None:
+                            first_line_ending = self._line_ending = line_ending
+                        elif line_ending != first_line_ending:
+                            self._line_ending = '\r\n'
+                    yield complete_line
+                whitespace_lines.clear()
+            previous = line
+        if previous is not None:
+            yield previous.rstrip()
+
     def new_event(self, *args, **kwargs):
+        """
+        Creates a new event, for a report with its feed fields.
+
+        The fields of a report are validated only once, for its first event.
+        The following events of the same report are copies of this template.
+        """
+        if len(args) == 1 and not kwargs and isinstance(args[0], libmessage.Report):
+            if self.__event_template is None or self.__event_template[0] is not args[0]:
+                self.__event_template = (args[0], self.__new_event(args[0]))
+            return self.__event_template[1].clone()
+        return self.__new_event(*args, **kwargs)
+
+    def acknowledge_message(self):
+        """
+        Acknowledges the last message and frees the event template of the report.
+        """
+        self.__event_template = None
+        super().acknowledge_message()
+
+    def __new_event(self, *args, **kwargs):
         if self.copy_collector_provided_fields:
             kwargs['copy_collector_provided_fields'] = self.copy_collector_provided_fields
         return super().new_event(*args, **kwargs)
@@ -1138,9 +1326,7 @@ def parse_csv(self, report: libmessage.Report):
         A basic CSV parser.
         The resulting lines are lists.
         """
-        raw_report: str = utils.base64_decode(report.get("raw")).strip()
-        raw_report = raw_report.translate({0: None})
-        report_io = self._get_io_and_save_line_ending(raw_report)
+        report_io = self._get_lines_and_save_line_ending(report)
         if self._ignore_lines_starting:
             self._handle = RewindableFileHandle(report_io, condition=self._line_filtering_condition)
         else:
@@ -1155,9 +1341,7 @@ def parse_csv_dict(self, report: libmessage.Report):
         A basic CSV Dictionary parser.
         The resulting lines are dictionaries with the column names as keys.
         """
-        raw_report: str = utils.base64_decode(report.get("raw")).strip()
-        raw_report: str = raw_report.translate({0: None})
-        report_io = self._get_io_and_save_line_ending(raw_report)
+        report_io = self._get_lines_and_save_line_ending(report)
         if self._ignore_lines_starting:
             self._handle = RewindableFileHandle(report_io, condition=self._line_filtering_condition)
         else:
@@ -1175,16 +1359,18 @@ def parse_csv_dict(self, report: libmessage.Report):
     def parse_json(self, report: libmessage.Report):
         """
         A basic JSON parser. Assumes a *list* of objects as input to be yield.
+
+        The list is parsed incrementally, its elements are yielded one by one
+        without decoding the whole report first.
         """
-        raw_report: str = utils.base64_decode(report.get("raw"))
-        yield from json.loads(raw_report)
+        yield from utils.iter_json_array(utils.base64_decode_stream(report.get("raw")))
 
     def parse_json_stream(self, report: libmessage.Report):
         """
         A JSON Stream parses (one JSON data structure per line)
         """
-        raw_report: str = utils.base64_decode(report.get("raw"))
-        for line in raw_report.splitlines():
+        for line in utils.base64_decode_stream(report.get("raw")):
+            line = line.rstrip('\r\n')
             self._current_line = line
             yield json.loads(line)
 
@@ -1204,7 +1390,7 @@ def parse(self, report: libmessage.Report):
             recover_line = ParserBot.recover_line_csv
 
         """
-        for line in utils.base64_decode(report.get("raw")).splitlines():
+        for line in utils.base64_decode_stream(report.get("raw")):
             line = line.strip()
             if self._line_filtering_condition(line):
                 self._current_line = line
@@ -1246,10 +1432,11 @@ def process(self):
                 else:
                     events: list[libmessage.Event] = [value]
 
-                if self.default_fields:
+                if self.__default_fields:
                     for event in events:
-                        for key, value in self.default_fields.items():
-                            event.add(key, value, overwrite=False)
+                        for key, values in self.__default_fields:
+                            if key not in event:
+                                event.update_trusted(values)
 
             except Exception:
                 self.logger.exception('Failed to parse line.')
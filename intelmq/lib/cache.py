@@ -58,10 +58,7 @@ def set(self, key: str, value: Any, ttl: Optional[int] = None):
             ttl = self.ttl
         if isinstance(value, str):
             value = utils.encode(value)
-        # backward compatibility (Redis v2.2)
-        self.redis.set(key, value)
-        if ttl:
-            self.redis.expire(key, ttl)
+        self.redis.set(key, value, ex=int(ttl) if ttl else None)
 
     def flush(self):
         """
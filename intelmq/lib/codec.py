@@ -0,0 +1,193 @@
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Codecs for the serialization of messages in the pipelines.
+
+The codec is chosen by the sending bot with the parameter `destination_pipeline_codec`.
+JSON-encoded messages have no marker, the binary codecs prefix the data with a version byte.
+The receiving side detects the codec of each message on its own, so queues can hold
+messages of different codecs, e.g. during the migration of a deployment.
+"""
+import base64
+import binascii
+import json
+import threading
+from typing import Union
+
+from intelmq.lib import exceptions, utils
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+__all__ = ['Codec', 'JSONCodec', 'MsgpackCodec', 'MsgpackZstdCodec', 'CODECS', 'get_codec', 'decode',
+           'is_binary']
+
+
+class Codec:
+    """
+    Base class of the codecs, converting messages from dictionaries to the format
+    of the pipeline and back.
+    """
+    #: name as used in the parameter `destination_pipeline_codec`
+    name: str = None
+    #: version byte prefixed to the encoded messages, None for text codecs
+    marker: bytes = None
+
+    def encode(self, message: dict, message_type: str) -> Union[bytes, str]:
+        """
+        Encodes the message with its type, given as '__type'.
+        """
+        raise NotImplementedError
+
+    def decode(self, data: Union[bytes, str]) -> dict:
+        """
+        Decodes the data, including the marker if any.
+        """
+        raise NotImplementedError
+
+
+class JSONCodec(Codec):
+    name = 'json'
+
+    def encode(self, message: dict, message_type: str) -> str:
+        message['__type'] = message_type
+        try:
+            return json.dumps(message)
+        finally:
+            del message['__type']
+
+    def decode(self, data: Union[bytes, str]) -> dict:
+        return json.loads(utils.decode(data))
+
+
+class MsgpackCodec(Codec):
+    """
+    MessagePack, a compact binary format.
+
+    Values of the harmonization type Base64 (e.g. `raw`) are stored as the decoded bytes,
+    as extension type `EXT_BASE64`, and are converted back to base64 strings when decoded.
+    """
+    name = 'msgpack'
+    marker = b'\x01'
+    EXT_BASE64 = 1
+
+    def __init__(self):
+        if msgpack is None:
+            raise exceptions.MissingDependencyError('msgpack')
+        self._packer = msgpack.Packer(autoreset=True, use_bin_type=True)
+
+    def _pack(self, message: dict, message_type: str) -> bytes:
+        data = dict(message)
+        schema = getattr(message, '_schema', None)
+        if schema is not None:
+            for key in schema.base64_keys.intersection(data):
+                try:
+                    data[key] = msgpack.ExtType(self.EXT_BASE64, base64.b64decode(data[key], validate=True))
+                except (binascii.Error, TypeError, ValueError):
+                    # keep values which are not canonical base64 unchanged
+                    pass
+        data['__type'] = message_type
+        return self._packer.pack(data)
+
+    @classmethod
+    def _ext_hook(cls, code: int, data: bytes):
+        if code == cls.EXT_BASE64:
+            return base64.b64encode(data).decode()
+        return msgpack.ExtType(code, data)
+
+    def _unpack(self, packed: bytes, data: bytes) -> dict:
+        try:
+            return msgpack.unpackb(packed, raw=False, ext_hook=self._ext_hook)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise exceptions.DecodingError(object=data) from exc
+
+    def encode(self, message: dict, message_type: str) -> bytes:
+        return self.marker + self._pack(message, message_type)
+
+    def decode(self, data: bytes) -> dict:
+        return self._unpack(memoryview(data)[1:], data)
+
+
+class MsgpackZstdCodec(MsgpackCodec):
+    """
+    zstd-compressed MessagePack, reduces the memory usage of the queues,
+    especially for messages with large `raw` fields.
+    """
+    name = 'msgpack-zstd'
+    marker = b'\x02'
+
+    def __init__(self):
+        super().__init__()
+        if zstandard is None:
+            raise exceptions.MissingDependencyError('zstandard')
+        self._compressor = zstandard.ZstdCompressor()
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def encode(self, message: dict, message_type: str) -> bytes:
+        return self.marker + self._compressor.compress(self._pack(message, message_type))
+
+    def decode(self, data: bytes) -> dict:
+        try:
+            uncompressed = self._decompressor.decompress(memoryview(data)[1:])
+        except zstandard.ZstdError as exc:
+            raise exceptions.DecodingError(object=data) from exc
+        return self._unpack(uncompressed, data)
+
+
+CODECS = {codec.name: codec for codec in (JSONCodec, MsgpackCodec, MsgpackZstdCodec)}
+_MARKERS = {codec.marker[0]: codec.name for codec in CODECS.values() if codec.marker}
+# instances per thread, as the (de)compressors must not be shared between threads.
+# The binary codecs are only created on first use as their dependencies are optional.
+_INSTANCES = threading.local()
+
+
+def get_codec(name: str) -> Codec:
+    """
+    Returns the instance of the codec with the given name, shared within the thread.
+
+    Raises:
+        intelmq.lib.exceptions.InvalidArgument: If the codec is unknown.
+        intelmq.lib.exceptions.MissingDependencyError: If the codec's library is not installed.
+    """
+    instances = getattr(_INSTANCES, 'codecs', None)
+    if instances is None:
+        instances = _INSTANCES.codecs = {}
+    try:
+        return instances[name]
+    except KeyError:
+        pass
+    if name not in CODECS:
+        raise exceptions.InvalidArgument('codec', got=name, expected=sorted(CODECS))
+    codec = instances[name] = CODECS[name]()
+    return codec
+
+
+def is_binary(data: Union[bytes, str]) -> bool:
+    """
+    If the data has been encoded by a binary codec.
+    """
+    return isinstance(data, bytes) and len(data) > 0 and data[0] in _MARKERS
+
+
+def decode(data: Union[bytes, str]) -> dict:
+    """
+    Decodes the data of any codec, detected by the version byte.
+
+    Raises:
+        intelmq.lib.exceptions.DecodingError: If the data is not valid UTF-8 (JSON)
+            or not valid for its binary codec.
+        ValueError: If the JSON is invalid.
+    """
+    if is_binary(data):
+        return get_codec(_MARKERS[data[0]]).decode(data)
+    return json.loads(utils.decode(data))
@@ -0,0 +1,184 @@
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Dump files of messages which could not be processed.
+
+The dump files hold one JSON record per line with the keys `timestamp`, `bot_id`, `source_queue`,
+`traceback`, `message` and optionally `message_type`. The bots append a record with a single
+write to the file opened with `O_APPEND`, they do not lock the file and do not read it.
+Records are identified by their offset in the file. Deleted records are overwritten with
+spaces in place, so that the offsets of the other records stay valid while bots append new ones.
+
+Dump files of previous versions hold one JSON dictionary with the timestamps as keys.
+They are converted to the new format on their first access.
+"""
+import fcntl
+import json
+import os
+import tempfile
+import time
+from typing import Iterator, Optional, Tuple
+
+__all__ = ['append', 'count', 'delete', 'is_legacy', 'migrate', 'read', 'remove_if_empty']
+
+
+def _lock(handle, timeout: int = 60):
+    """
+    Locks the file exclusively, waiting up to `timeout` seconds.
+
+    Raises:
+        ValueError: If the file is still locked after the timeout.
+    """
+    for _ in range(max(timeout, 1)):
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            time.sleep(1)
+        else:
+            return
+    raise ValueError(f'Dump file was locked for more than {timeout}s, giving up now.')
+
+
+def _is_legacy(handle) -> bool:
+    handle.seek(0)
+    first_line = handle.readline(16).strip()
+    handle.seek(0)
+    return first_line in (b'{', b'{}')
+
+
+def is_legacy(path: str) -> bool:
+    """
+    If the file is a dump file of previous versions (one JSON dictionary).
+    """
+    try:
+        with open(path, 'rb') as handle:
+            return _is_legacy(handle)
+    except FileNotFoundError:
+        return False
+
+
+def migrate(path: str, timeout: int = 60):
+    """
+    Converts a dump file of previous versions to JSON lines, the records are ordered by their timestamp.
+
+    The file is replaced atomically while holding the lock of the previous versions.
+    No-op if the file has already been converted in the meantime.
+
+    Raises:
+        ValueError: If the file is locked for more than `timeout` seconds.
+    """
+    with open(path, 'rb') as handle:
+        _lock(handle, timeout)
+        if os.fstat(handle.fileno()).st_ino != os.stat(path).st_ino or not _is_legacy(handle):
+            return
+        content = json.load(handle)
+        with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(path), prefix='.migrate-',
+                                         delete=False) as new_file:
+            try:
+                for timestamp in sorted(content):
+                    new_file.write(_encode({'timestamp': timestamp, **content[timestamp]}))
+                new_file.flush()
+                os.fchmod(new_file.fileno(), os.fstat(handle.fileno()).st_mode & 0o7777)
+                os.replace(new_file.name, path)
+            except BaseException:
+                os.remove(new_file.name)
+                raise
+
+
+def _encode(record: dict) -> bytes:
+    return json.dumps(record, sort_keys=True).encode() + b'\n'
+
+
+def _write(fd: int, data: bytes):
+    written = os.write(fd, data)
+    while written < len(data):
+        written += os.write(fd, data[written:])
+
+
+def append(path: str, record: dict):
+    """
+    Appends the record to the dump file, converting a dump file of previous versions first.
+    """
+    if is_legacy(path):
+        migrate(path)
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+    try:
+        _write(fd, _encode(record))
+    finally:
+        os.close(fd)
+
+
+def _lines(path: str) -> Iterator[Tuple[int, bytes]]:
+    """
+    Yields the offsets and the lines of all records which have not been deleted.
+    """
+    offset = 0
+    with open(path, 'rb') as handle:
+        for line in handle:
+            if line.strip():
+                yield offset, line
+            offset += len(line)
+
+
+def read(path: str) -> Iterator[Tuple[int, Optional[dict]]]:
+    """
+    Yields the offsets and the records of the dump file, None for invalid records,
+    e.g. an incompletely written line.
+    """
+    for offset, line in _lines(path):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield offset, record if isinstance(record, dict) else None
+
+
+def count(path: str) -> int:
+    """
+    Returns the number of records in the dump file.
+    """
+    if is_legacy(path):
+        with open(path, 'rb') as handle:
+            return len(json.load(handle))
+    return sum(1 for _ in _lines(path))
+
+
+def delete(path: str, offset: int):
+    """
+    Deletes the record at the given offset by overwriting it with spaces.
+    """
+    with open(path, 'r+b') as handle:
+        handle.seek(offset)
+        line = handle.readline()
+        if not line.endswith(b'\n'):
+            raise ValueError(f'No complete record at offset {offset}.')
+        os.pwrite(handle.fileno(), b' ' * (len(line) - 1), offset)
+
+
+def remove_if_empty(path: str) -> bool:
+    """
+    Removes the dump file if it does not hold any records.
+
+    The file is renamed first, records appended by bots in the meantime are written back.
+
+    Returns:
+        If the file has been removed.
+    """
+    if any(True for _ in _lines(path)):
+        return False
+    removed_path = f'{path}.removed'
+    os.rename(path, removed_path)
+    try:
+        remaining = [line for _, line in _lines(removed_path)]
+        if remaining:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+            try:
+                _write(fd, b''.join(remaining))
+            finally:
+                os.close(fd)
+    finally:
+        os.remove(removed_path)
+    return not remaining
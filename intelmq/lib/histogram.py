@@ -0,0 +1,128 @@
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Histograms of durations with logarithmic buckets, used for the latency statistics of the bots.
+
+The durations are counted in microseconds. Durations below 16µs are counted exactly,
+every larger power of two is divided into 8 buckets of equal width, so the
+relative error of the percentiles is at most 12.5%, with a fixed memory usage.
+Durations longer than about 2^40µs (12 days) are counted in the last bucket.
+"""
+import math
+from typing import Dict, Tuple
+
+__all__ = ['Histogram', 'bucket_index', 'bucket_bounds']
+
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+LINEAR_BUCKETS = 2 * SUB_BUCKETS
+MAX_SHIFT = 40
+BUCKETS = LINEAR_BUCKETS + MAX_SHIFT * SUB_BUCKETS
+
+
+def bucket_index(value: int) -> int:
+    """
+    Returns the index of the bucket for the value in microseconds.
+    """
+    if value < LINEAR_BUCKETS:
+        return max(value, 0)
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return min(LINEAR_BUCKETS + (shift - 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS, BUCKETS - 1)
+
+
+def bucket_bounds(index: int) -> Tuple[int, int]:
+    """
+    Returns the lowest and highest value in microseconds counted in the bucket.
+    """
+    if index < LINEAR_BUCKETS:
+        return index, index
+    shift, sub_bucket = divmod(index - LINEAR_BUCKETS, SUB_BUCKETS)
+    lower = (sub_bucket + SUB_BUCKETS) << (shift + 1)
+    return lower, lower + (1 << (shift + 1)) - 1
+
+
+class Histogram:
+    """
+    Counts durations in logarithmic buckets, see the module documentation.
+
+    The durations are given and returned in seconds.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0  # in microseconds
+        self.maximum = 0  # in microseconds
+
+    def record(self, duration: float):
+        value = int(duration * 1e6)
+        self.buckets[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other: 'Histogram'):
+        """
+        Adds the counts of the other histogram, e.g. of another instance of the bot.
+        """
+        for index, count in enumerate(other.buckets):
+            self.buckets[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count / 1e6 if self.count else 0.0
+
+    @property
+    def max(self) -> float:
+        return self.maximum / 1e6
+
+    def percentile(self, percent: float) -> float:
+        """
+        Returns the upper bound of the bucket holding the percentile, at most the maximum.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(percent / 100 * self.count), 1)
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bucket_bounds(index)[1], self.maximum) / 1e6
+        return self.max
+
+    def to_dict(self) -> Dict:
+        """
+        Returns the histogram as JSON-serializable dictionary, only with the non-empty buckets.
+        """
+        return {'count': self.count,
+                'total': self.total,
+                'max': self.maximum,
+                'buckets': {str(index): count for index, count in enumerate(self.buckets) if count}}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Histogram':
+        histogram = cls()
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.maximum = data['max']
+        for index, count in data['buckets'].items():
+            histogram.buckets[int(index)] = count
+        return histogram
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Returns the count, mean, percentiles and maximum, the durations in seconds.
+        """
+        return {'count': self.count,
+                'mean': self.mean,
+                'p50': self.percentile(50),
+                'p90': self.percentile(90),
+                'p99': self.percentile(99),
+                'max': self.max}
@@ -0,0 +1,137 @@
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Prefix tries for matching IP addresses against many networks.
+
+The networks are stored as integers in a path-compressed binary trie per IP version,
+so a lookup takes at most as many steps as there are nested networks, independent of
+the number of networks in the trie.
+"""
+import ipaddress
+from typing import Any, Iterable, Iterator, Optional, Tuple, Union
+
+__all__ = ['IPTrie']
+
+Address = Union[str, ipaddress.IPv4Address, ipaddress.IPv6Address]
+Network = Union[str, ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+class _Node:
+    __slots__ = ('prefix', 'length', 'entry', 'children')
+
+    def __init__(self, prefix: int, length: int, entry: Optional[Tuple] = None):
+        self.prefix = prefix
+        self.length = length
+        self.entry = entry
+        self.children = [None, None]
+
+
+class IPTrie:
+    """
+    Maps IPv4 and IPv6 networks to values and finds the longest matching network of an address.
+
+    Networks and addresses are given as strings or `ipaddress` objects, host bits of networks are ignored.
+    Invalid networks and addresses raise a ValueError.
+
+    Example:
+        >>> trie = IPTrie(['10.0.0.0/8', '2001:db8::/32'])
+        >>> trie.add('10.1.0.0/16', 'customer A')
+        >>> '10.1.2.3' in trie
+        True
+        >>> trie.lookup('10.1.2.3')
+        (IPv4Network('10.1.0.0/16'), 'customer A')
+        >>> trie.get('10.2.0.1')
+        IPv4Network('10.0.0.0/8')
+    """
+
+    def __init__(self, networks: Iterable[Network] = ()):
+        self._roots = {4: _Node(0, 0), 6: _Node(0, 0)}
+        self._bits = {4: 32, 6: 128}
+        self._size = 0
+        for network in networks:
+            self.add(network)
+
+    def add(self, network: Network, value: Any = None):
+        """
+        Adds the network, replacing the value of the same network. The value defaults to the network object.
+        """
+        network = ipaddress.ip_network(network, strict=False)
+        entry = (network, network if value is None else value)
+        bits = self._bits[network.version]
+        prefix, length = int(network.network_address), network.prefixlen
+        node = self._roots[network.version]
+        while True:
+            # the prefix of node is a prefix of the new network
+            if node.length == length:
+                if node.entry is None:
+                    self._size += 1
+                node.entry = entry
+                return
+            bit = (prefix >> (bits - node.length - 1)) & 1
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = _Node(prefix, length, entry)
+                self._size += 1
+                return
+            limit = min(child.length, length)
+            difference = child.prefix ^ prefix
+            common = limit if not difference else min(limit, bits - difference.bit_length())
+            if common == child.length:
+                node = child
+                continue
+            # split the edge to the child at the common prefix
+            split = _Node(prefix >> (bits - common) << (bits - common), common)
+            split.children[(child.prefix >> (bits - common - 1)) & 1] = child
+            if common == length:
+                split.entry = entry
+            else:
+                split.children[(prefix >> (bits - common - 1)) & 1] = _Node(prefix, length, entry)
+            node.children[bit] = split
+            self._size += 1
+            return
+
+    def lookup(self, address: Address) -> Optional[Tuple[Any, Any]]:
+        """
+        Returns the longest network containing the address and its value, None if there is none.
+        """
+        if isinstance(address, str):
+            address = ipaddress.ip_address(address)
+        bits = self._bits[address.version]
+        key = int(address)
+        node = self._roots[address.version]
+        best = None
+        while node is not None and not (key ^ node.prefix) >> (bits - node.length):
+            if node.entry is not None:
+                best = node.entry
+            if node.length == bits:
+                break
+            node = node.children[(key >> (bits - node.length - 1)) & 1]
+        return best
+
+    def get(self, address: Address, default: Any = None) -> Any:
+        """
+        Returns the value of the longest network containing the address, the default if there is none.
+        """
+        entry = self.lookup(address)
+        return default if entry is None else entry[1]
+
+    def __contains__(self, address: Address) -> bool:
+        return self.lookup(address) is not None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator:
+        """
+        Yields the networks, IPv4 before IPv6, each in the order of their addresses.
+        """
+        for version in (4, 6):
+            stack = [self._roots[version]]
+            while stack:
+                node = stack.pop()
+                if node.entry is not None:
+                    yield node.entry[0]
+                stack.extend(child for child in reversed(node.children) if child is not None)
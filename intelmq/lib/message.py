@@ -10,6 +10,7 @@
 """
 import hashlib
 import json
+import os
 import re
 import warnings
 from collections import defaultdict
@@ -19,12 +20,169 @@
 import intelmq.lib.exceptions as exceptions
 import intelmq.lib.harmonization
 from intelmq import HARMONIZATION_CONF_FILE
+from intelmq.lib import codec as libcodec
 from intelmq.lib import utils
 
-__all__ = ['Event', 'Message', 'MessageFactory', 'Report']
+__all__ = ['Event', 'HarmonizationSchema', 'Message', 'MessageFactory', 'Report']
 VALID_MESSSAGE_TYPES = ('Event', 'Message', 'Report')
 # '_' needs to be allowed at the beginning currently because of '__type'. Can be removed with IEP04 implemented.
 HARMONIZATION_KEY_FORMAT = re.compile(r'^[a-z_][a-z_0-9]+(\.[a-z_0-9]+)*$')
+# path -> (modification time, harmonization)
+_HARMONIZATION_CACHE: Dict[str, Tuple[int, dict]] = {}
+
+
+def _upgrade_harmonization(harmonization: dict) -> dict:
+    """
+    Applies the conversions of legacy harmonization configurations in place.
+    """
+    extra = harmonization.get('event', {}).get('extra')
+    if extra and extra.get('type') == 'JSON':
+        warnings.warn("Assuming harmonization type 'JSONDict' for harmonization field 'extra'. "
+                      "This assumption will be removed in version 3.0.", DeprecationWarning)
+        extra['type'] = 'JSONDict'
+    return harmonization
+
+
+def _load_cached_harmonization(path: str) -> dict:
+    """
+    Loads the harmonization configuration file, cached until the file is modified.
+    The cached dictionary is shared by all messages and must not be modified.
+
+    Raises:
+        ValueError: if the file is not found
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    cached = _HARMONIZATION_CACHE.get(path)
+    if mtime is not None and cached and cached[0] == mtime:
+        return cached[1]
+    harmonization = _upgrade_harmonization(utils.load_configuration(path))
+    if mtime is not None:
+        _HARMONIZATION_CACHE[path] = (mtime, harmonization)
+    return harmonization
+
+
+def load_harmonization() -> dict:
+    """
+    Loads the harmonization configuration file, falls back to the internal harmonization file.
+
+    The result is cached until the file is modified, the same dictionary is returned for all calls
+    and must not be modified.
+    """
+    try:
+        return _load_cached_harmonization(HARMONIZATION_CONF_FILE)
+    except ValueError:
+        # Fallback to internal harmonization file
+        return _load_cached_harmonization(resource_filename('intelmq', 'etc/harmonization.conf'))
+
+
+class _Field:
+    """
+    Validation and sanitation functions and constraints of a single harmonization field.
+    """
+    __slots__ = ('config', 'is_valid', 'sanitize', 'is_valid_subitem', 'sanitize_subitem',
+                 'length', 'regex', 'iregex')
+
+    def __init__(self, config: dict):
+        self.config = config
+        class_reference = getattr(intelmq.lib.harmonization, config['type'])
+        self.is_valid = class_reference.is_valid
+        self.sanitize = class_reference.sanitize
+        self.is_valid_subitem = getattr(class_reference, 'is_valid_subitem', None)
+        self.sanitize_subitem = getattr(class_reference, 'sanitize_subitem', None)
+        self.length = config.get('length')
+        self.regex = re.compile(config['regex']) if 'regex' in config else None
+        self.iregex = re.compile(config['iregex'], re.IGNORECASE) if 'iregex' in config else None
+
+
+class HarmonizationSchema:
+    """
+    The harmonization of one message type, compiled for fast validation.
+
+    Resolves the harmonization type classes and compiles the regular expressions once,
+    instead of on every added value. Use `HarmonizationSchema.get` to get the shared
+    instance for a harmonization configuration.
+    """
+    # id of the harmonization configuration -> schema
+    _cache: Dict[int, 'HarmonizationSchema'] = {}
+    _CACHE_SIZE = 64
+    _SUBKEYS_CACHE_SIZE = 10000
+
+    def __init__(self, config: dict):
+        for harm_key in config.keys():
+            if not HARMONIZATION_KEY_FORMAT.match(harm_key) and harm_key != '__type':
+                raise exceptions.InvalidKey("Harmonization key %r is invalid." % harm_key)
+        self.config = config
+        self.valid_keys = frozenset(config)
+        # fields holding binary data, which binary codecs transport undecoded
+        self.base64_keys = frozenset(key for key, field_config in config.items()
+                                     if field_config.get('type') == 'Base64')
+        self.fields = {key: _Field(field_config) for key, field_config in config.items()}
+        # subkeys of fields like 'extra', which have already been checked for validity
+        self._valid_subkeys = set()
+
+    @classmethod
+    def get(cls, config: dict) -> 'HarmonizationSchema':
+        """
+        Returns the schema for the harmonization configuration of one message type,
+        built only once per configuration object.
+        """
+        schema = cls._cache.get(id(config))
+        if schema is None or schema.config is not config:
+            if len(cls._cache) >= cls._CACHE_SIZE:
+                cls._cache.clear()
+            schema = cls._cache[id(config)] = cls(config)
+        return schema
+
+    def lookup(self, key: str) -> Tuple[Optional[_Field], bool]:
+        """
+        Returns the field definition for the key and if the key is a subitem (e.g. of 'extra').
+        The field is None for unknown keys.
+        """
+        field = self.fields.get(key)
+        if field is not None:
+            return field, False
+        return self.fields.get(key.split('.', 1)[0]), True
+
+    def is_valid_key(self, key: str) -> Tuple[bool, Optional[str]]:
+        if key in self.valid_keys or key == '__type' or key in self._valid_subkeys:
+            return True, None
+        field, subitem = self.lookup(key)
+        if field is None or field.is_valid_subitem is None:
+            return False, 'This key is not allowed by the harmonization configuration'
+        if not HARMONIZATION_KEY_FORMAT.match(key):
+            return False, f'Does not match regular expression {HARMONIZATION_KEY_FORMAT.pattern}'
+        if len(self._valid_subkeys) < self._SUBKEYS_CACHE_SIZE:
+            self._valid_subkeys.add(key)
+        return True, None
+
+    def is_valid_value(self, key: str, value: Any) -> tuple:
+        if key == '__type':
+            return (True, )
+        field, subitem = self.lookup(key)
+        if subitem:
+            validation = field.is_valid_subitem(value)
+        else:
+            validation = field.is_valid(value)
+        if not validation:
+            return (False, 'is_valid returned False.')
+        if field.length is not None:
+            length = len(str(value))
+            if not length <= field.length:
+                return (False, 'too long: {} > {}.'.format(length, field.length))
+        if field.regex is not None and not field.regex.search(str(value)):
+            return (False, 'regex did not match.')
+        if field.iregex is not None and not field.iregex.search(str(value)):
+            return (False, 'regex (case insensitive) did not match.')
+        return (True, )
+
+    def sanitize_value(self, key: str, value: Any) -> Any:
+        field, subitem = self.lookup(key)
+        if subitem:
+            return field.sanitize_subitem(value)
+        return field.sanitize(value)
 
 
 class MessageFactory:
@@ -35,7 +193,7 @@ class MessageFactory:
 
     @staticmethod
     def from_dict(message: dict, harmonization=None,
-                  default_type: Optional[str] = None) -> dict:
+                  default_type: Optional[str] = None, trusted: bool = False) -> dict:
         """
         Takes dictionary Message object, returns instance of correct class.
 
@@ -43,6 +201,8 @@ def from_dict(message: dict, harmonization=None,
             message: the message which should be converted to a Message object
             harmonization: a dictionary holding the used harmonization
             default_type: If '__type' is not present in message, the given type will be used
+            trusted: If the values have already been validated, only the keys are checked.
+                See Message.__init__
 
         See also:
             MessageFactory.unserialize
@@ -60,18 +220,21 @@ def from_dict(message: dict, harmonization=None,
         # don't modify the parameter
         message_copy = message.copy()
         del message_copy["__type"]
-        return class_reference(message_copy, auto=True, harmonization=harmonization)
+        return class_reference(message_copy, auto=True, harmonization=harmonization,
+                               trusted=trusted)
 
     @staticmethod
-    def unserialize(raw_message: str, harmonization: dict = None,
-                    default_type: Optional[str] = None) -> dict:
+    def unserialize(raw_message: Union[bytes, str], harmonization: dict = None,
+                    default_type: Optional[str] = None, trusted: bool = False) -> dict:
         """
-        Takes JSON-encoded Message object, returns instance of correct class.
+        Takes an encoded Message object (JSON or any other codec), returns instance of correct class.
 
         Parameters:
             message: the message which should be converted to a Message object
             harmonization: a dictionary holding the used harmonization
             default_type: If '__type' is not present in message, the given type will be used
+            trusted: If the values have already been validated, only the keys are checked.
+                See Message.__init__
 
         See also:
             MessageFactory.from_dict
@@ -79,17 +242,22 @@ def unserialize(raw_message: str, harmonization: dict = None,
         """
         message = Message.unserialize(raw_message)
         return MessageFactory.from_dict(message, harmonization=harmonization,
-                                        default_type=default_type)
+                                        default_type=default_type, trusted=trusted)
 
     @staticmethod
-    def serialize(message):
+    def serialize(message, codec: Optional[libcodec.Codec] = None) -> Union[bytes, str]:
         """
         Takes instance of message-derived class and makes JSON-encoded Message.
 
         The class is saved in __type attribute.
+
+        Parameters:
+            message: The message to serialize
+            codec: The codec to use, see intelmq.lib.codec. JSON by default.
         """
-        raw_message = Message.serialize(message)
-        return raw_message
+        if codec is None:
+            return Message.serialize(message)
+        return codec.encode(message, message.__class__.__name__)
 
 
 class Message(dict):
@@ -98,7 +266,16 @@ class Message(dict):
     _default_value_set = False
 
     def __init__(self, message: Union[dict, tuple] = (), auto: bool = False,
-                 harmonization: dict = None, **_) -> None:
+                 harmonization: dict = None, trusted: bool = False, **_) -> None:
+        """
+        Parameters:
+            message: The initial values of the message
+            auto: unused here
+            harmonization: Harmonization definition to use
+            trusted: The values of the message have already been validated, e.g. by the bot
+                which sent the message. Only the keys are checked against the harmonization,
+                the values are neither sanitized nor validated.
+        """
         try:
             classname = message['__type'].lower()
             del message['__type']
@@ -106,11 +283,9 @@ def __init__(self, message: Union[dict, tuple] = (), auto: bool = False,
             classname = self.__class__.__name__.lower()
 
         if harmonization is None:
-            try:
-                harmonization = utils.load_configuration(HARMONIZATION_CONF_FILE)
-            except ValueError:
-                # Fallback to internal harmonization file
-                harmonization = utils.load_configuration(resource_filename('intelmq', 'etc/harmonization.conf'))
+            harmonization = load_harmonization()
+        else:
+            _upgrade_harmonization(harmonization)
         try:
             self.harmonization_config = harmonization[classname]
         except KeyError:
@@ -119,14 +294,7 @@ def __init__(self, message: Union[dict, tuple] = (), auto: bool = False,
                                              expected=VALID_MESSSAGE_TYPES,
                                              docs=HARMONIZATION_CONF_FILE)
 
-        if (classname == 'event' and 'extra' in self.harmonization_config and
-           self.harmonization_config['extra']['type'] == 'JSON'):
-            warnings.warn("Assuming harmonization type 'JSONDict' for harmonization field 'extra'. "
-                          "This assumption will be removed in version 3.0.", DeprecationWarning)
-            self.harmonization_config['extra']['type'] = 'JSONDict'
-        for harm_key in self.harmonization_config.keys():
-            if not HARMONIZATION_KEY_FORMAT.match(harm_key) and harm_key != '__type':
-                raise exceptions.InvalidKey("Harmonization key %r is invalid." % harm_key)
+        self._schema = HarmonizationSchema.get(self.harmonization_config)
 
         super().__init__()
         if isinstance(message, dict):
@@ -135,10 +303,35 @@ def __init__(self, message: Union[dict, tuple] = (), auto: bool = False,
             self.iterable = dict(message)
         else:
             raise ValueError("Type %r of message can't be handled, must be dict or tuple.", type(message))
+        if trusted:
+            self.__add_trusted(self.iterable)
+            return
         for key, value in self.iterable.items():
             if not self.add(key, value, sanitize=False, raise_failure=False):
                 self.add(key, value, sanitize=True)
 
+    def __add_trusted(self, iterable: dict) -> None:
+        """
+        Sets the values without sanitation and validation, only the keys are checked.
+        Keys of fields like 'extra' as a whole and ignored values take the regular path.
+        """
+        fields = self._schema.fields
+        for key, value in iterable.items():
+            field = fields.get(key)
+            if field is not None and field.is_valid_subitem is None and value not in self._IGNORED_VALUES:
+                super().__setitem__(key, value)
+            elif field is None and self._schema.is_valid_key(key)[0]:
+                super().__setitem__(key, value)
+            elif not self.add(key, value, sanitize=False, raise_failure=False):
+                self.add(key, value, sanitize=True)
+
+    def update_trusted(self, other: dict) -> None:
+        """
+        Sets values which have already been validated, e.g. taken from another message.
+        Only the keys are checked, the values are neither sanitized nor validated.
+        """
+        self.__add_trusted(other)
+
     def __setitem__(self, key: str, value: Any) -> None:
         self.add(key, value)
 
@@ -314,6 +507,16 @@ def copy(self):
         del self['__type']
         return retval
 
+    def clone(self):
+        """
+        Returns a shallow copy of the message, sharing its harmonization.
+        Unlike `copy`, the values are not sanitized and validated again.
+        """
+        retval = self.__class__.__new__(self.__class__)
+        retval.__dict__.update(self.__dict__)
+        dict.update(retval, self)
+        return retval
+
     def deep_copy(self):
         return MessageFactory.unserialize(MessageFactory.serialize(self),
                                           harmonization={self.__class__.__name__.lower(): self.harmonization_config})
@@ -328,65 +531,26 @@ def serialize(self):
         return json_dump
 
     @staticmethod
-    def unserialize(message_string: str):
-        message = json.loads(message_string)
+    def unserialize(message_string: Union[bytes, str]):
+        message = libcodec.decode(message_string)
         return message
 
     def __is_valid_key(self, key: str) -> Tuple[bool, str]:
-        try:
-            class_name, subitem = self.__get_type_config(key)
-        except KeyError:
-            return False, 'This key is not allowed by the harmonization configuration'
-        if key in self.harmonization_config or key == '__type':
-            return True, None
-        if subitem:
-            return HARMONIZATION_KEY_FORMAT.match(key), f'Does not match regular expression {HARMONIZATION_KEY_FORMAT.pattern}'
-        return False, 'This key is not allowed by the harmonization configuration'
+        return self._schema.is_valid_key(key)
 
     def __is_valid_value(self, key: str, value: str):
-        if key == '__type':
-            return (True, )
-        config, subitem = self.__get_type_config(key)
-        class_reference = getattr(intelmq.lib.harmonization, config['type'])
-        if not subitem:
-            validation = class_reference().is_valid(value)
-        else:
-            validation = class_reference().is_valid_subitem(value)
-        if not validation:
-            return (False, 'is_valid returned False.')
-        if 'length' in config:
-            length = len(str(value))
-            if not length <= config['length']:
-                return (False, 'too long: {} > {}.'.format(length,
-                                                           config['length']))
-        if 'regex' in config:
-            if not re.search(config['regex'], str(value)):
-                return (False, 'regex did not match.')
-        if 'iregex' in config:
-            if not re.search(config['iregex'], str(value), re.IGNORECASE):
-                return (False, 'regex (case insensitive) did not match.')
-        return (True, )
+        return self._schema.is_valid_value(key, value)
 
     def __sanitize_value(self, key: str, value: str):
-        class_name, subitem = self.__get_type_config(key)
-        class_reference = getattr(intelmq.lib.harmonization, class_name['type'])
-        if not subitem:
-            return class_reference().sanitize(value)
-        else:
-            return class_reference().sanitize_subitem(value)
+        return self._schema.sanitize_value(key, value)
 
     def __get_type_config(self, key: str):
         if key == '__type':
             return None, None
-        try:
-            class_name = self.harmonization_config[key]
-        except KeyError:
-            # Could be done recursively in the future if needed
-            class_name = self.harmonization_config[key.split('.')[0]]
-            subitem = True
-        else:
-            subitem = False
-        return class_name, subitem
+        field, subitem = self._schema.lookup(key)
+        if field is None:
+            raise KeyError(key)
+        return field.config, subitem
 
     def __hash__(self):
         return int(self.hash(), 16)
@@ -528,6 +692,7 @@ def __init__(
         auto: bool = False,
         harmonization: Optional[dict] = None,
         copy_collector_provided_fields: Optional[dict] = None,
+        trusted: bool = False,
     ) -> None:
         """
         Parameters:
@@ -536,6 +701,7 @@ def __init__(
                 If it's another type, the value is given to dict's init
             auto: unused here
             harmonization: Harmonization definition to use
+            trusted: The values of a dict message are not validated, see Message.__init__
         """
         if isinstance(message, Report):
             template = {}
@@ -563,13 +729,13 @@ def __init__(
                     template[key] = message.get(key)
         else:
             template = message
-        super().__init__(template, auto, harmonization)
+        super().__init__(template, auto, harmonization, trusted=trusted and template is message)
 
 
 class Report(Message):
 
     def __init__(self, message: Union[dict, tuple] = (), auto: bool = False,
-                 harmonization: Optional[dict] = None, **_) -> None:
+                 harmonization: Optional[dict] = None, trusted: bool = False, **_) -> None:
         """
         Parameters:
             message: Passed along to Message's and dict's init.
@@ -577,6 +743,7 @@ def __init__(self, message: Union[dict, tuple] = (), auto: bool = False,
                 has only the fields which are possible in Report, all others are stripped.
             auto: if False (default), time.observation is automatically added.
             harmonization: Harmonization definition to use
+            trusted: The values of a dict message are not validated, see Message.__init__
         """
         if isinstance(message, Event):
             super().__init__({}, auto, harmonization)
@@ -584,7 +751,7 @@ def __init__(self, message: Union[dict, tuple] = (), auto: bool = False,
                 if self._Message__is_valid_key(key)[0]:
                     self.add(key, value, sanitize=False)
         else:
-            super().__init__(message, auto, harmonization)
+            super().__init__(message, auto, harmonization, trusted=trusted)
         if not auto and 'time.observation' not in self:
             time_observation = intelmq.lib.harmonization.DateTime().generate_datetime_now()
             self.add('time.observation', time_observation, sanitize=False)
@@ -0,0 +1,105 @@
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Metrics in the OpenMetrics text format, as read by Prometheus, and a minimal HTTP server for them.
+
+See `intelmqctl metrics` and `intelmqctl metrics-server` for the collected metrics.
+"""
+import logging
+import math
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Callable, Iterable, List, Tuple
+
+__all__ = ['CONTENT_TYPE', 'MetricFamily', 'render', 'serve']
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isnan(value):
+            return 'NaN'
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if value.is_integer():
+            return str(int(value))
+    return str(value)
+
+
+class MetricFamily:
+    """
+    A metric with its samples, which differ in their labels.
+
+    The name of counters is given without the suffix `_total`, it is added to the samples.
+    """
+
+    def __init__(self, name: str, metric_type: str, documentation: str):
+        if metric_type not in ('counter', 'gauge'):
+            raise ValueError(f'Unsupported metric type {metric_type!r}.')
+        self.name = name
+        self.type = metric_type
+        self.documentation = documentation
+        self.samples: List[Tuple[dict, float]] = []
+
+    def add(self, value: float, **labels):
+        self.samples.append((labels, value))
+
+    def render(self) -> str:
+        lines = [f'# TYPE {self.name} {self.type}',
+                 f'# HELP {self.name} {_escape(self.documentation)}']
+        sample_name = f'{self.name}_total' if self.type == 'counter' else self.name
+        for labels, value in self.samples:
+            if labels:
+                label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+                lines.append(f'{sample_name}{{{label_text}}} {_format_value(value)}')
+            else:
+                lines.append(f'{sample_name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def render(families: Iterable[MetricFamily]) -> str:
+    """
+    Returns the metric families in the OpenMetrics text format, including the terminating `# EOF`.
+    """
+    return ''.join(family.render() for family in families) + '# EOF\n'
+
+
+def serve(collect: Callable[[], Iterable[MetricFamily]], host: str, port: int, logger: logging.Logger):
+    """
+    Serves the metrics returned by `collect` at `/metrics` until interrupted.
+    The metrics are collected on every request, the requests are handled one after another.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            try:
+                body = render(collect()).encode()
+            except Exception:
+                logger.exception('Collecting the metrics failed.')
+                self.send_error(500)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug('%s - %s', self.address_string(), format % args)
+
+    with HTTPServer((host, port), MetricsHandler) as server:
+        logger.info('Serving the metrics at http://%s:%d/metrics.', host, port)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info('Received KeyboardInterrupt, stopping the metrics server.')
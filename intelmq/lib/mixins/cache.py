@@ -4,20 +4,78 @@
 SPDX-License-Identifier: AGPL-3.0-or-later
 
 CacheMixin is used for caching/storing data in redis.
+
+Optionally, a bounded local cache in the bot's process holds the recently used entries,
+saving the round trips to redis for hot keys. It is enabled with the parameter
+`redis_cache_local_size`. Local entries expire after `redis_cache_local_ttl` seconds at
+the latest, changes made by other bots to redis are not visible before.
 """
 
-from typing import Any, Optional
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
 import redis
 import intelmq.lib.utils as utils
 
 
+class LocalCache:
+    """
+    A bounded in-process cache with least-recently-used eviction and expiry of the entries.
+    """
+
+    def __init__(self, size: int, ttl: Optional[int] = None):
+        self.size = size
+        self.ttl = ttl
+        # key -> (expiry as monotonic time or None, value)
+        self.__data = OrderedDict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            expiry, value = self.__data[key]
+        except KeyError:
+            return default
+        if expiry is not None and expiry <= time.monotonic():
+            del self.__data[key]
+            return default
+        self.__data.move_to_end(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """
+        Parameters:
+            ttl: The time to live of the entry in seconds, capped by the local TTL.
+        """
+        if self.ttl and (not ttl or ttl > self.ttl):
+            ttl = self.ttl
+        self.__data[key] = (time.monotonic() + ttl if ttl else None, value)
+        self.__data.move_to_end(key)
+        while len(self.__data) > self.size:
+            self.__data.popitem(last=False)
+
+    def delete(self, key: str):
+        self.__data.pop(key, None)
+
+    def clear(self):
+        self.__data.clear()
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+
 class CacheMixin:
     __redis: redis.Redis = None
+    __local: Optional[LocalCache] = None
     redis_cache_host: str = "127.0.0.1"
     redis_cache_port: int = 6379
     redis_cache_db: int = 9
     redis_cache_ttl: int = 15
     redis_cache_password: Optional[str] = None
+    redis_cache_local_size: int = 0
+    redis_cache_local_ttl: Optional[int] = 60
 
     def __init__(self, **kwargs):
         if self.redis_cache_host.startswith("/"):
@@ -32,29 +90,107 @@ def __init__(self, **kwargs):
             }
 
         self.__redis = redis.Redis(db=self.redis_cache_db, password=self.redis_cache_password, **kwargs)
+        if self.redis_cache_local_size:
+            self.__local = LocalCache(int(self.redis_cache_local_size),
+                                      int(self.redis_cache_local_ttl) if self.redis_cache_local_ttl else None)
         super().__init__()
 
+    def __ttl(self, ttl: Optional[int]) -> Optional[int]:
+        if ttl is None:
+            ttl = self.redis_cache_ttl
+        return int(ttl) if ttl else None
+
+    @staticmethod
+    def __as_retrieved(value: Any) -> Optional[str]:
+        """
+        Converts a value to the form in which it is retrieved from redis.
+        """
+        if value is None or isinstance(value, str):
+            return value
+        if isinstance(value, bytes):
+            return utils.decode(value)
+        return str(value)
+
     def cache_exists(self, key: str):
+        if self.__local is not None and key in self.__local:
+            return 1
         return self.__redis.exists(key)
 
     def cache_get(self, key: str):
+        if self.__local is not None:
+            retval = self.__local.get(key)
+            if retval is not None:
+                return retval
         retval = self.__redis.get(key)
         if isinstance(retval, bytes):
-            return utils.decode(retval)
+            retval = utils.decode(retval)
+        if self.__local is not None and retval is not None:
+            self.__local.set(key, retval)
+        return retval
+
+    def cache_get_many(self, keys: Iterable[str]) -> List[Optional[str]]:
+        """
+        Gets the values of multiple keys, with one request to redis for all keys not cached locally.
+
+        Returns:
+            The values in the order of the keys, None for missing keys.
+        """
+        keys = list(keys)
+        retval = [None] * len(keys)
+        missing = []
+        for index, key in enumerate(keys):
+            if self.__local is not None:
+                retval[index] = self.__local.get(key)
+            if retval[index] is None:
+                missing.append(index)
+        if missing:
+            for index, value in zip(missing, self.__redis.mget([keys[index] for index in missing])):
+                if isinstance(value, bytes):
+                    value = utils.decode(value)
+                retval[index] = value
+                if self.__local is not None and value is not None:
+                    self.__local.set(keys[index], value)
         return retval
 
     def cache_set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """
+        Sets the value with an expiration time in one request.
+
+        Parameters:
+            ttl: The time to live in seconds, defaults to the parameter `redis_cache_ttl`.
+                0 disables the expiration.
+        """
+        ttl = self.__ttl(ttl)
+        if self.__local is not None:
+            self.__local.set(key, self.__as_retrieved(value), ttl)
         if isinstance(value, str):
             value = utils.encode(value)
-        # backward compatibility (Redis v2.2)
-        self.__redis.set(key, value)
-        if self.redis_cache_ttl:
-            self.__redis.expire(key, self.redis_cache_ttl)
+        self.__redis.set(key, value, ex=ttl)
+
+    def cache_set_many(self, mapping: Dict[str, Any], ttl: Optional[int] = None):
+        """
+        Sets multiple values with the same expiration time in one round trip.
+
+        Parameters:
+            mapping: The keys and their values.
+            ttl: See `cache_set`.
+        """
+        ttl = self.__ttl(ttl)
+        pipe = self.__redis.pipeline(transaction=False)
+        for key, value in mapping.items():
+            if self.__local is not None:
+                self.__local.set(key, self.__as_retrieved(value), ttl)
+            if isinstance(value, str):
+                value = utils.encode(value)
+            pipe.set(key, value, ex=ttl)
+        pipe.execute()
 
     def cache_flush(self):
         """
         Flushes the currently opened database by calling FLUSHDB.
         """
+        if self.__local is not None:
+            self.__local.clear()
         self.__redis.flushdb()
 
     def cache_get_redis_instance(self):
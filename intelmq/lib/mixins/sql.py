@@ -110,14 +110,32 @@ def _init_mssql(self):
                        },
                       autocommitable=True)
 
-    def execute(self, query: str, values: tuple, rollback=False):
+    def execute(self, query: str, values: tuple, rollback=False, many=False, reraise=False):
+        """
+        Executes the query, reconnecting on connection problems.
+
+        If `many` is true, `values` is a list of tuples and the query is executed for each of them.
+        With PostgreSQL, the query must then contain a single `VALUES %s`, all tuples are
+        passed in one statement with `psycopg2.extras.execute_values`.
+
+        If `reraise` is true, the error of the database driver is raised after the rollback
+        or reconnection, instead of returning False.
+
+        Returns:
+            If the query has been executed successfully
+        """
         try:
             self.logger.debug('Executing %r.', (query, values))
             # note: this assumes, the DB was created with UTF-8 support!
-            self.cur.execute(query, values)
+            if not many:
+                self.cur.execute(query, values)
+            elif self._engine_name == SQLMixin.POSTGRESQL:
+                self._engine.extras.execute_values(self.cur, query, values, page_size=len(values))
+            else:
+                self.cur.executemany(query, values)
             self.logger.debug('Done.')
         except (self._engine.InterfaceError, self._engine.InternalError,
-                self._engine.OperationalError, AttributeError):
+                self._engine.OperationalError, AttributeError) as exc:
             if rollback and not self.fail_on_errors:
                 try:
                     self.con.rollback()
@@ -142,6 +160,8 @@ def execute(self, query: str, values: tuple, rollback=False):
                 if self.reconnect_delay > 0:
                     sleep(self.reconnect_delay)
                 self._init_sql()
+            if reraise:
+                raise exc
         else:
             return True
         return False
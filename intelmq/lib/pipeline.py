@@ -10,11 +10,30 @@
 [Receive]     B RPOP LPUSH   source_queue ->  internal_queue
 [Send]        LPUSH          message      ->  destination_queue
 [Acknowledge] RPOP           message      <-  internal_queue
+
+The internal queue is named `<source_queue>-internal`. If a bot runs in multiple
+processes (`instances_processes`), every process has its own internal queue
+`<source_queue>-internal.<n>`, while all of them share the source queue.
+
+With `source_pipeline_batch_size` > 1, the Redis pipeline moves up to this
+number of messages at once from the source queue to the internal queue and
+removes them with a single LTRIM after all of them have been acknowledged.
+
+With `destination_pipeline_batch_size` > 1, sent messages are buffered and
+pushed with one LPUSH per destination queue when the buffer is full or the
+bot acknowledges its source message (flush).
+
+The AMQP pipeline supports the same parameters: With `source_pipeline_batch_size` > 1,
+the broker delivers up to `source_pipeline_amqp_prefetch` unacknowledged messages in
+advance and the acknowledgements are sent at once with `basic_ack(multiple=True)`.
+With `destination_pipeline_batch_size` > 1, the messages are published in a transaction
+which is committed after each batch, instead of waiting for the confirmation of each message.
 """
 
 
 import time
-from itertools import chain
+from collections import deque
+from itertools import chain, islice
 from typing import Optional
 import ssl
 
@@ -22,6 +41,7 @@
 
 import intelmq.lib.exceptions as exceptions
 import intelmq.lib.pipeline
+from intelmq.lib import codec
 import intelmq.lib.utils as utils
 from intelmq.lib.message import Message
 
@@ -40,11 +60,13 @@
 class PipelineFactory:
 
     @staticmethod
-    def create(logger, broker=None, direction=None, queues=None, pipeline_args: Optional[dict] = None, load_balance=False, is_multithreaded=False):
+    def create(logger, broker=None, direction=None, queues=None, pipeline_args: Optional[dict] = None, load_balance=False, is_multithreaded=False,
+               instance_id: Optional[str] = None):
         """
         direction: "source" or "destination", optional, needed for queues
         queues: needs direction to be set, calls set_queues
         bot: Bot instance
+        instance_id: ID of the bot's process instance, each instance has its own internal queue
         """
         if pipeline_args is None:
             pipeline_args = {}
@@ -68,7 +90,8 @@ def create(logger, broker=None, direction=None, queues=None, pipeline_args: Opti
                 broker = broker.title()
             else:
                 broker = "Redis"
-        pipe = getattr(intelmq.lib.pipeline, broker)(logger=logger, pipeline_args=pipeline_args, load_balance=load_balance, is_multithreaded=is_multithreaded)
+        pipe = getattr(intelmq.lib.pipeline, broker)(logger=logger, pipeline_args=pipeline_args, load_balance=load_balance, is_multithreaded=is_multithreaded,
+                                                     instance_id=instance_id)
         if queues and not direction:
             raise ValueError("Parameter 'direction' must be given when using "
                              "the queues parameter.")
@@ -82,8 +105,11 @@ class Pipeline:
     has_internal_queues = False
     # If the class currently holds a message, restricts the actions
     _has_message = False
+    # Number of currently held messages, more than one after receive_batch
+    _held_messages = 0
 
-    def __init__(self, logger, pipeline_args: dict = None, load_balance=False, is_multithreaded=False):
+    def __init__(self, logger, pipeline_args: dict = None, load_balance=False, is_multithreaded=False,
+                 instance_id: Optional[str] = None):
         if pipeline_args:
             self.pipeline_args = pipeline_args
         else:
@@ -94,6 +120,7 @@ def __init__(self, logger, pipeline_args: dict = None, load_balance=False, is_mu
         self.logger = logger
         self.load_balance = load_balance
         self.is_multithreaded = is_multithreaded
+        self.instance_id = instance_id
 
     def connect(self):
         raise NotImplementedError
@@ -113,7 +140,13 @@ def set_queues(self, queues: Optional[str], queues_type: str):
         """
         if queues_type == "source":
             self.source_queue = queues
-            self.internal_queue = None if queues is None else f'{queues}-internal'
+            if queues is None:
+                self.internal_queue = None
+            elif self.instance_id is None:
+                self.internal_queue = f'{queues}-internal'
+            else:
+                # every process instance of a bot has its own internal queue
+                self.internal_queue = f'{queues}-internal.{self.instance_id}'
 
         elif queues_type == "destination":
             type_ = type(queues)
@@ -136,6 +169,13 @@ def send(self, message: str, path: str = "_default",
              path_permissive: bool = False):
         raise NotImplementedError
 
+    def flush(self):
+        """
+        Sends all buffered messages to the destination queues.
+
+        No-op for pipelines without a send buffer.
+        """
+
     def receive(self) -> str:
         if self._has_message:
             raise exceptions.PipelineError("There's already a message, first "
@@ -143,11 +183,48 @@ def receive(self) -> str:
 
         retval = self._receive()
         self._has_message = True
+        self._held_messages = 1
+        if codec.is_binary(retval):
+            return retval
         return utils.decode(retval)
 
     def _receive(self) -> bytes:
         raise NotImplementedError
 
+    def receive_batch(self, count: int, linger: float = 0) -> list:
+        """
+        Receives up to `count` messages at once, blocks only until the first message is available.
+        If less than `count` messages are available, waits up to `linger` seconds for further messages.
+
+        The messages are held until each of them has been acknowledged with
+        `acknowledge`, in the order they have been received.
+        Contrary to `receive`, the messages are not decoded.
+
+        Parameters:
+            count: Maximum number of messages to receive
+            linger: Maximum time in seconds to wait for further messages, if supported by the pipeline
+
+        Raises:
+            exceptions: exceptions.PipelineError: If a message is already held
+
+        Returns:
+            list: The received messages
+        """
+        if self._has_message:
+            raise exceptions.PipelineError("There's already a message, first "
+                                           "acknowledge the existing one.")
+
+        retval = self._receive_batch(count, linger)
+        self._has_message = True
+        self._held_messages = len(retval)
+        return retval
+
+    def _receive_batch(self, count: int, linger: float = 0) -> list:
+        """
+        Pipelines not supporting batches receive only one message.
+        """
+        return [self._receive()]
+
     def acknowledge(self):
         """
         Acknowledge/delete the current message from the source queue
@@ -163,7 +240,8 @@ def acknowledge(self):
         if not self._has_message:
             raise exceptions.PipelineError("No message to acknowledge.")
         self._acknowledge()
-        self._has_message = False
+        self._held_messages -= 1
+        self._has_message = self._held_messages > 0
 
     def _acknowledge(self):
         raise NotImplementedError
@@ -179,6 +257,7 @@ def reject_message(self):
             raise exceptions.PipelineError("No message to acknowledge.")
         self._reject_message()
         self._has_message = False
+        self._held_messages = 0
 
     def _reject_message(self):
         raise NotImplementedError
@@ -194,6 +273,40 @@ class Redis(Pipeline):
     source_pipeline_password = None
     destination_pipeline_password = None
     _redis_server_version = None
+    _acknowledged_count = 0
+    # Moves up to ARGV[1] messages from the source queue (KEYS[1]) to the internal queue (KEYS[2]).
+    # Unacknowledged messages already in the internal queue (e.g. after a restart) are returned first.
+    # The messages are returned in the order they need to be processed and acknowledged.
+    _receive_batch_lua = """
+        local messages = redis.call('LRANGE', KEYS[2], -tonumber(ARGV[1]), -1)
+        if #messages > 0 then
+            local reversed = {}
+            for i = #messages, 1, -1 do
+                reversed[#reversed + 1] = messages[i]
+            end
+            return reversed
+        end
+        for i = 1, tonumber(ARGV[1]) do
+            local message = redis.call('RPOPLPUSH', KEYS[1], KEYS[2])
+            if not message then
+                break
+            end
+            messages[#messages + 1] = message
+        end
+        return messages
+    """
+    _move_batch_lua = """
+        local messages = {}
+        for i = 1, tonumber(ARGV[1]) do
+            local message = redis.call('RPOPLPUSH', KEYS[1], KEYS[2])
+            if not message then
+                break
+            end
+            messages[#messages + 1] = message
+        end
+        return messages
+    """
+    LINGER_POLL_INTERVAL = 0.01
 
     def load_configurations(self, queues_type):
         self.host = self.pipeline_args.get(f"{queues_type}_pipeline_host", "127.0.0.1")
@@ -204,6 +317,8 @@ def load_configurations(self, queues_type):
         self.socket_timeout = self.pipeline_args.get(f"{queues_type}_pipeline_socket_timeout", None)
         self.load_balance = self.pipeline_args.get("load_balance", False)
         self.load_balance_iterator = 0
+        self.receive_batch_size = int(self.pipeline_args.get("source_pipeline_batch_size", 1))
+        self.send_batch_size = int(self.pipeline_args.get("destination_pipeline_batch_size", 1))
 
     def connect(self):
         redis_version = tuple(int(x) for x in redis.__version__.split('.'))
@@ -240,8 +355,23 @@ def __brlpoplpush(source, destination):
         else:
             self._blmove = __brlpoplpush
 
+        # messages fetched in batch mode, but not yet acknowledged
+        self._receive_buffer = deque()
+        # number of acknowledged messages not yet removed from the internal queue
+        self._acknowledged_count = 0
+        # messages sent in batch mode, but not yet pushed to redis, per destination queue
+        self._send_buffer = {}
+        self._send_buffer_count = 0
+        self._receive_batch_script = self.pipe.register_script(self._receive_batch_lua)
+        self._move_batch_script = self.pipe.register_script(self._move_batch_lua)
+
     def disconnect(self):
-        pass
+        if self._acknowledged_count:
+            try:
+                self._flush_acknowledgements()
+            except Exception:
+                self.logger.debug('Could not remove acknowledged messages from the internal queue.',
+                                  exc_info=True)
 
     def set_queues(self, queues, queues_type):
         self.load_configurations(queues_type)
@@ -263,21 +393,52 @@ def send(self, message: str, path: str = "_default",
             self.load_balance_iterator += 1
             self.load_balance_iterator %= len(self.destination_queues[path])
 
+        if self.send_batch_size > 1:
+            for destination_queue in queues:
+                self._send_buffer.setdefault(destination_queue, []).append(message)
+            self._send_buffer_count += 1
+            if self._send_buffer_count >= self.send_batch_size:
+                self.flush()
+            return
+
         for destination_queue in queues:
             try:
                 self.pipe.lpush(destination_queue, message)
             except Exception as exc:
-                if 'Cannot assign requested address' in exc.args[0] or \
-                        "OOM command not allowed when used memory > 'maxmemory'." in exc.args[0]:
-                    raise MemoryError(exc.args[0])
-                elif 'Redis is configured to save RDB snapshots, but is currently not able to persist on disk' in exc.args[0]:
-                    raise OSError(28, 'No space left on device or in memory. Redis can\'t save its snapshots. '
-                                      'Look at redis\'s logs.')
-                raise exceptions.PipelineError(exc)
+                self._raise_send_error(exc)
+
+    def flush(self):
+        """
+        Pushes all buffered messages with one LPUSH per destination queue in a single round trip.
+        """
+        if not self._send_buffer:
+            return
+        try:
+            pipe = self.pipe.pipeline(transaction=False)
+            for destination_queue, messages in self._send_buffer.items():
+                pipe.lpush(destination_queue, *messages)
+            pipe.execute()
+        except Exception as exc:
+            self._raise_send_error(exc)
+        finally:
+            self._send_buffer = {}
+            self._send_buffer_count = 0
+
+    @staticmethod
+    def _raise_send_error(exc: Exception):
+        if 'Cannot assign requested address' in exc.args[0] or \
+                "OOM command not allowed when used memory > 'maxmemory'." in exc.args[0]:
+            raise MemoryError(exc.args[0])
+        elif 'Redis is configured to save RDB snapshots, but is currently not able to persist on disk' in exc.args[0]:
+            raise OSError(28, 'No space left on device or in memory. Redis can\'t save its snapshots. '
+                              'Look at redis\'s logs.')
+        raise exceptions.PipelineError(exc)
 
     def _receive(self) -> bytes:
         if self.source_queue is None:
             raise exceptions.ConfigurationError('pipeline', 'No source queue given.')
+        if self.receive_batch_size > 1 or self._receive_buffer:
+            return self._receive_from_batch()
         try:
             while True:
                 try:
@@ -293,7 +454,82 @@ def _receive(self) -> bytes:
         else:
             return retval
 
+    def _receive_from_batch(self) -> bytes:
+        """
+        Returns the first not yet acknowledged message of the current batch.
+
+        If the batch is exhausted, the next one is fetched with one call.
+        Blocks for a single message if the source queue is empty.
+        """
+        if not self._receive_buffer:
+            self._fill_receive_buffer(self.receive_batch_size)
+        return self._receive_buffer[0]
+
+    def _receive_batch(self, count: int, linger: float = 0) -> list:
+        if self.source_queue is None:
+            raise exceptions.ConfigurationError('pipeline', 'No source queue given.')
+        if not self._receive_buffer:
+            self._fill_receive_buffer(max(count, self.receive_batch_size))
+            if linger > 0 and len(self._receive_buffer) < count:
+                self._linger(count, linger)
+        return list(islice(self._receive_buffer, count))
+
+    def _linger(self, count: int, linger: float):
+        """
+        Moves further messages to the internal queue until `count` messages are buffered, at most for `linger` seconds.
+        The source queue is polled every `LINGER_POLL_INTERVAL` seconds while it is empty.
+        """
+        deadline = time.monotonic() + linger
+        try:
+            while True:
+                messages = self._move_batch_script(keys=[self.source_queue, self.internal_queue],
+                                                   args=[count - len(self._receive_buffer)])
+                self._receive_buffer.extend(messages)
+                remaining = deadline - time.monotonic()
+                if len(self._receive_buffer) >= count or remaining <= 0:
+                    return
+                if not messages:
+                    time.sleep(min(remaining, self.LINGER_POLL_INTERVAL))
+        except Exception as exc:
+            raise exceptions.PipelineError(exc)
+
+    def _fill_receive_buffer(self, count: int):
+        """
+        Fetches up to `count` messages with one call, blocks for a single message if the source queue is empty.
+        """
+        try:
+            while True:
+                try:
+                    messages = self._receive_batch_script(keys=[self.source_queue, self.internal_queue],
+                                                          args=[count])
+                except redis.exceptions.BusyLoadingError:  # Just wait at redis' startup #1334
+                    time.sleep(1)
+                else:
+                    break
+            if not messages:
+                messages = [self._blmove(self.source_queue, self.internal_queue)]
+        except Exception as exc:
+            raise exceptions.PipelineError(exc)
+        self._receive_buffer.extend(messages)
+
+    def _flush_acknowledgements(self):
+        """
+        Removes all acknowledged messages of the batch from the internal queue at once.
+        They are the oldest ones, stored at the right end of the list.
+        """
+        self.pipe.ltrim(self.internal_queue, 0, -self._acknowledged_count - 1)
+        self._acknowledged_count = 0
+
     def _acknowledge(self):
+        if self._receive_buffer:
+            self._receive_buffer.popleft()
+            self._acknowledged_count += 1
+            if not self._receive_buffer:
+                try:
+                    self._flush_acknowledgements()
+                except Exception as exc:
+                    raise exceptions.PipelineError(exc)
+            return
         try:
             retval = self.pipe.rpop(self.internal_queue)
         except Exception as exc:
@@ -305,13 +541,16 @@ def _acknowledge(self):
                                                "" % retval)
 
     def count_queued_messages(self, *queues) -> dict:
-        queue_dict = {}
-        for queue in queues:
-            try:
-                queue_dict[queue] = self.pipe.llen(queue)
-            except Exception as exc:
-                raise exceptions.PipelineError(exc)
-        return queue_dict
+        """
+        Returns the lengths of the queues, requested in one round trip.
+        """
+        try:
+            pipe = self.pipe.pipeline(transaction=False)
+            for queue in queues:
+                pipe.llen(queue)
+            return dict(zip(queues, pipe.execute()))
+        except Exception as exc:
+            raise exceptions.PipelineError(exc)
 
     def clear_queue(self, queue):
         """Clears a queue by removing (deleting) the key,
@@ -386,7 +625,7 @@ def _receive(self) -> bytes:
         Does not block unlike the other pipelines.
         """
         if len(self.state[self.internal_queue]) > 0:
-            return utils.decode(self.state[self.internal_queue][0])
+            return self.state[self.internal_queue][0]
 
         try:
             first_msg = self.state[self.source_queue].pop(0)
@@ -396,6 +635,23 @@ def _receive(self) -> bytes:
 
         return first_msg
 
+    def _receive_batch(self, count: int, linger: float = 0) -> list:
+        """
+        Receives up to `count` messages, unacknowledged messages in the internal queue first.
+
+        Does not block unlike the other pipelines, `linger` is ignored.
+        """
+        if self.state[self.internal_queue]:
+            return self.state[self.internal_queue][:count]
+
+        if not self.state[self.source_queue]:
+            raise exceptions.PipelineError('The source queue is empty.')
+        messages = self.state[self.source_queue][:count]
+        del self.state[self.source_queue][:count]
+        self.state[self.internal_queue].extend(messages)
+
+        return messages
+
     def _acknowledge(self):
         """Removes a message from the internal queue and returns it"""
         self.state.get(self.internal_queue, [None]).pop(0)
@@ -504,10 +760,14 @@ class Amqp(Pipeline):
     destination_pipeline_ssl = False
     source_pipeline_amqp_exchange = ""
     destination_pipeline_amqp_exchange = ""
+    source_pipeline_amqp_prefetch = None
     intelmqctl_rabbitmq_monitoring_url = None
+    delivery_tag = None
+    _acknowledged_count = 0
 
-    def __init__(self, logger, pipeline_args: dict = None, load_balance=False, is_multithreaded=False):
-        super().__init__(logger, pipeline_args, load_balance, is_multithreaded)
+    def __init__(self, logger, pipeline_args: dict = None, load_balance=False, is_multithreaded=False,
+                 instance_id: Optional[str] = None):
+        super().__init__(logger, pipeline_args, load_balance, is_multithreaded, instance_id)
         if pika is None:
             raise ValueError("To use AMQP you must install the 'pika' library.")
         self.properties = pika.BasicProperties(delivery_mode=2)  # message persistence
@@ -526,6 +786,12 @@ def load_configurations(self, queues_type):
         self.ssl = self.pipeline_args.get(f"{queues_type}_pipeline_ssl", False)
         self.exchange = self.pipeline_args.get(f"{queues_type}_pipeline_amqp_exchange", "")
         self.load_balance_iterator = 0
+        self.receive_batch_size = int(self.pipeline_args.get("source_pipeline_batch_size", 1))
+        self.send_batch_size = int(self.pipeline_args.get("destination_pipeline_batch_size", 1))
+        # by default the broker may deliver the next batch while the current one is processed
+        self.prefetch = self.pipeline_args.get("source_pipeline_amqp_prefetch", None)
+        if self.prefetch is None and self.receive_batch_size > 1:
+            self.prefetch = 2 * self.receive_batch_size
         self.kwargs = {}
         if self.username and self.password:
             self.kwargs['credentials'] = pika.PlainCredentials(self.username, self.password)
@@ -562,7 +828,22 @@ def connect(self):
 
     def setup_channel(self):
         self.channel = self.connection.channel()
-        self.channel.confirm_delivery()
+        # Delivery tags are only valid in their channel, unacknowledged messages
+        # of a previous channel are delivered again by the broker.
+        self.delivery_tag = None
+        self._delivery_tags = deque()
+        self._acknowledged_tag = None
+        self._acknowledged_count = 0
+        # messages published in the current transaction as (destination queue, message)
+        self._unconfirmed = []
+        self._returned = []
+        if self.send_batch_size > 1 and self.destination_queues:
+            self.channel.tx_select()
+            self.channel.add_on_return_callback(self._on_return)
+        else:
+            self.channel.confirm_delivery()
+        if self.prefetch and self.source_queue:
+            self.channel.basic_qos(prefetch_count=int(self.prefetch))
 
         if self.exchange:
             # Do not declare and use queues if an exchange is given
@@ -582,6 +863,12 @@ def check_connection(self):
             self.setup_channel()
 
     def disconnect(self):
+        if self._acknowledged_count:
+            try:
+                self._flush_acknowledgements()
+            except Exception:
+                self.logger.debug('Could not acknowledge the processed messages, '
+                                  'they will be delivered again.', exc_info=True)
         try:
             self.channel.close()
         except Exception:
@@ -638,34 +925,155 @@ def send(self, message: str, path: str = "_default",
             self.load_balance_iterator += 1
             self.load_balance_iterator %= len(self.destination_queues[path])
 
+        if self.send_batch_size > 1:
+            for destination_queue in queues:
+                self._publish_in_transaction(destination_queue, message)
+            if len(self._unconfirmed) >= self.send_batch_size:
+                self.flush()
+            return
+
         for destination_queue in queues:
             self._send(destination_queue, message)
 
+    def _publish_in_transaction(self, destination_queue, message, reconnect=True):
+        """
+        Publishes the message without waiting, it is confirmed by the commit in `flush`.
+
+        If the connection is lost, the messages of the open transaction are lost as well,
+        so all of them are published again in the new channel.
+        """
+        try:
+            self.channel.basic_publish(exchange=self.exchange,
+                                       routing_key=destination_queue,
+                                       body=message,
+                                       properties=self.properties,
+                                       mandatory=True,
+                                       )
+        except (pika.exceptions.AMQPConnectionError, pika.exceptions.ChannelClosed,
+                pika.exceptions.ChannelWrongStateError) as exc:
+            if not reconnect:
+                raise exceptions.PipelineError(exc)
+            self.logger.debug('Error sending the message. Will re-connect and re-send.',
+                              exc_info=True)
+            self._republish()
+            self._publish_in_transaction(destination_queue, message, reconnect=False)
+            return
+        except Exception as exc:
+            raise exceptions.PipelineError(exc)
+        self._unconfirmed.append((destination_queue, message))
+
+    def _republish(self):
+        """
+        Re-connects and publishes the messages of the lost transaction again.
+        """
+        unconfirmed = self._unconfirmed
+        self.connect()
+        for destination_queue, message in unconfirmed:
+            self._publish_in_transaction(destination_queue, message, reconnect=False)
+
+    def _on_return(self, channel, method, properties, body):
+        self._returned.append(method.routing_key)
+
+    def flush(self, reconnect=True):
+        """
+        Commits the transaction of the published messages, which confirms all of them with one round trip.
+
+        If the connection is lost, the messages of the transaction are published again.
+        """
+        if not self._unconfirmed:
+            return
+        try:
+            self.channel.tx_commit()
+            # dispatch the returns of unroutable messages, received before the commit's answer
+            self.connection.process_data_events(time_limit=0)
+        except (pika.exceptions.AMQPConnectionError, pika.exceptions.ChannelClosed,
+                pika.exceptions.ChannelWrongStateError) as exc:
+            if not reconnect:
+                raise exceptions.PipelineError(exc)
+            self.logger.debug('Error committing the sent messages. Will re-connect and re-send.',
+                              exc_info=True)
+            self._republish()
+            self.flush(reconnect=False)
+            return
+        except Exception as exc:
+            raise exceptions.PipelineError(exc)
+        self._unconfirmed = []
+        if self._returned:
+            returned, self._returned = self._returned, []
+            raise exceptions.PipelineError(f'{len(returned)} sent message(s) could not be routed '
+                                           f'to the queue(s) {sorted(set(returned))!r}.')
+
     def _receive(self) -> bytes:
         if self.source_queue is None:
             raise exceptions.ConfigurationError('pipeline', 'No source queue given.')
         try:
+            if self._acknowledged_count and not self.channel.get_waiting_message_count():
+                # do not delay the acknowledgements while waiting for new messages
+                self._flush_acknowledgements()
             method, header, body = next(self.channel.consume(self.source_queue))
             if method:
                 self.delivery_tag = method.delivery_tag
+                self._delivery_tags.append(method.delivery_tag)
         except Exception as exc:
             raise exceptions.PipelineError(exc)
         else:
             return body
 
+    def _receive_batch(self, count: int, linger: float = 0) -> list:
+        """
+        Returns the next message and up to `count - 1` further messages
+        already delivered by the broker (see `source_pipeline_amqp_prefetch`),
+        waiting up to `linger` seconds for their delivery.
+        """
+        messages = [self._receive()]
+        deadline = time.monotonic() + linger
+        while len(messages) < count:
+            if self.channel.get_waiting_message_count():
+                messages.append(self._receive())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                self.connection.process_data_events(time_limit=remaining)
+            except Exception as exc:
+                raise exceptions.PipelineError(exc)
+        self.delivery_tag = self._delivery_tags[0]
+        return messages
+
+    def _flush_acknowledgements(self):
+        """
+        Acknowledges all processed messages at once.
+        """
+        try:
+            self.channel.basic_ack(delivery_tag=self._acknowledged_tag, multiple=True)
+        finally:
+            self._acknowledged_tag = None
+            self._acknowledged_count = 0
+
     def _acknowledge(self):
+        if not self._delivery_tags:
+            # received in a previous channel, the broker delivers the message again
+            self.logger.debug('Acknowledging a message of a closed channel, it will be delivered again.')
+            return
+        tag = self._delivery_tags.popleft()
+        self.delivery_tag = self._delivery_tags[0] if self._delivery_tags else None
         try:
-            self.channel.basic_ack(delivery_tag=self.delivery_tag)
+            if self.receive_batch_size > 1:
+                self._acknowledged_tag = tag
+                self._acknowledged_count += 1
+                if self._acknowledged_count >= self.receive_batch_size:
+                    self._flush_acknowledgements()
+            else:
+                self.channel.basic_ack(delivery_tag=tag)
         except pika.exceptions.ConnectionClosed:
-            self.logger.debug('Error sending the message. '
-                              'Will re-connect and re-send.',
+            # At-least-once delivery: The unacknowledged messages are delivered again in the new channel.
+            self.logger.debug('Error acknowledging the message. Will re-connect, '
+                              'the unacknowledged messages will be delivered again.',
                               exc_info=True)
             self.connect()
-            self.channel.basic_ack(delivery_tag=self.delivery_tag)
         except Exception as e:
             raise exceptions.PipelineError(e)
-        else:
-            self.delivery_tag = None
 
     def _get_queues(self) -> dict:
         if self.username and self.password:
@@ -709,4 +1117,12 @@ def nonempty_queues(self) -> set:
         return {name for name, count in result.items() if count}
 
     def _reject_message(self):
-        self.channel.basic_nack(delivery_tag=self.delivery_tag, requeue=True)
+        """
+        Requeues all held messages, the processed ones of the batch are acknowledged first.
+        """
+        if self._acknowledged_count:
+            self._flush_acknowledgements()
+        if self._delivery_tags:
+            self.channel.basic_nack(delivery_tag=self._delivery_tags[-1], multiple=True, requeue=True)
+        self._delivery_tags.clear()
+        self.delivery_tag = None
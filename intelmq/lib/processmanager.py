@@ -4,18 +4,20 @@
 import abc
 import distutils.version
 import getpass
+import glob
 import http.client
 import inspect
 import logging
 import os
 import psutil
+import re
 import signal
 import socket
 import subprocess
 import sys
 import time
 import xmlrpc.client
-from typing import Union, Iterable
+from typing import Union, Iterable, List
 
 
 from intelmq import (DEFAULT_LOGGING_LEVEL,  # noqa: F401
@@ -85,6 +87,47 @@ def _log_bot_message(self, status, *args):
     def _is_enabled(self, bot_id):
         return self._runtime_configuration[bot_id].get('enabled', True)
 
+    def _instances(self, bot_id: str) -> List[str]:
+        """
+        Returns the IDs of the bot's processes: With the parameter `instances_processes` larger than 1,
+        `<bot_id>.<n>` for every process, otherwise only the bot ID itself.
+        """
+        instances = int(self._runtime_configuration[bot_id].get('parameters', {}).get('instances_processes') or 0)
+        if instances > 1:
+            return [f'{bot_id}.{number}' for number in range(instances)]
+        return [bot_id]
+
+    def _existing_instances(self, bot_id: str) -> Iterable[str]:
+        """
+        Returns the IDs of the bot's processes known to the process manager, running or not.
+        """
+        return ()
+
+    def _all_instances(self, bot_id: str) -> List[str]:
+        """
+        Returns the configured instances of the bot (see `_instances`) and all other instances known
+        to the process manager, e.g. after `instances_processes` has been changed.
+        """
+        instances = self._instances(bot_id)
+        existing = set(self._existing_instances(bot_id))
+        numbered = [instance_id for instance_id in existing
+                    if re.fullmatch(re.escape(bot_id) + r'\.[0-9]+', instance_id) and instance_id not in instances]
+        instances.extend(sorted(numbered, key=lambda instance_id: int(instance_id[len(bot_id) + 1:])))
+        if len(instances) > 1 and bot_id not in instances and bot_id in existing:
+            instances.insert(0, bot_id)
+        return instances
+
+    @staticmethod
+    def _combine_status(statuses: list):
+        """
+        Combines the states of the bot's processes, the first deviating one
+        if not all of them are running.
+        """
+        for status in statuses:
+            if status != 'running':
+                return status
+        return statuses[0]
+
 
 class IntelMQProcessManager(ProcessManagerInterface):
     PIDDIR = VAR_RUN_PATH
@@ -103,21 +146,22 @@ def __init__(self, *args, **kwargs):
                 self._logger.error('Directory %s does not exist and cannot be created: %s.', self.PIDDIR, exc)
 
     def bot_run(self, bot_id, run_subcommand=None, console_type=None, message_action_kind=None, dryrun=None, msg=None, show_sent=None, loglevel=None):
-        pid = self.__check_pid(bot_id)
         module = self._runtime_configuration[bot_id]['module']
-        status = self.__status_process(pid, module, bot_id) if pid else False
-        if pid and status is True:
+        paused = False
+        for instance_id in self._all_instances(bot_id):
+            pid = self.__check_pid(instance_id)
+            status = self.__status_process(pid, module, instance_id) if pid else False
+            if pid and status is True:
+                paused = True
+            elif status is not False:
+                self._logger.error(status)
+                return 1
+        if paused:
             self._logger.info("Main instance of the bot is running in the background and will be stopped; "
                               "when finished, we try to relaunch it again. "
                               "You may want to launch: 'intelmqctl stop {}' to prevent this message."
                               .format(bot_id))
-            paused = True
             self.bot_stop(bot_id)
-        elif status is False:
-            paused = False
-        else:
-            self._logger.error(status)
-            return 1
 
         self._log_bot_message('starting', bot_id)
         filename = self.PIDFILE.format(bot_id)
@@ -145,144 +189,159 @@ def bot_run(self, bot_id, run_subcommand=None, console_type=None, message_action
         return retval, output
 
     def bot_start(self, bot_id, getstatus=True):
-        pid = self.__check_pid(bot_id)
+        return self._combine_status([self.__bot_start(bot_id, instance_id, getstatus)
+                                     for instance_id in self._instances(bot_id)])
+
+    def __bot_start(self, bot_id, instance_id, getstatus=True):
+        pid = self.__check_pid(instance_id)
         module = self._runtime_configuration[bot_id]['module']
         if pid:
-            status = self.__status_process(pid, module, bot_id)
+            status = self.__status_process(pid, module, instance_id)
             if status is True:
-                self._log_bot_message('running', bot_id)
+                self._log_bot_message('running', instance_id)
                 return 'running'
             elif status is False:
-                self.__remove_pidfile(bot_id)
+                self.__remove_pidfile(instance_id)
             else:
                 self._logger.error(status)
                 return 1
 
-        self._log_bot_message('starting', bot_id)
-        module = self._runtime_configuration[bot_id]['module']
-        cmdargs = [module, bot_id]
+        self._log_bot_message('starting', instance_id)
+        cmdargs = [module, instance_id]
         try:
             proc = psutil.Popen(cmdargs, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         except FileNotFoundError:
-            self._log_bot_error("not found", bot_id)
+            self._log_bot_error("not found", instance_id)
             return 'stopped'
         else:
-            filename = self.PIDFILE.format(bot_id)
+            filename = self.PIDFILE.format(instance_id)
             with open(filename, 'w') as fp:
                 fp.write(str(proc.pid))
 
         if getstatus:
             time.sleep(0.5)
-            return self.bot_status(bot_id, proc=proc)
+            return self.__bot_status(bot_id, instance_id, proc=proc)
 
     def bot_stop(self, bot_id, getstatus=True):
-        pid = self.__check_pid(bot_id)
+        return self._combine_status([self.__bot_stop(bot_id, instance_id, getstatus)
+                                     for instance_id in self._all_instances(bot_id)])
+
+    def __bot_stop(self, bot_id, instance_id, getstatus=True):
+        pid = self.__check_pid(instance_id)
         module = self._runtime_configuration[bot_id]['module']
         if not pid:
             if self._is_enabled(bot_id):
-                self._log_bot_error('stopped', bot_id)
+                self._log_bot_error('stopped', instance_id)
                 return 'stopped'
             else:
-                self._log_bot_message('disabled', bot_id)
+                self._log_bot_message('disabled', instance_id)
                 return 'disabled'
-        status = self.__status_process(pid, module, bot_id)
+        status = self.__status_process(pid, module, instance_id)
         if status is False:
-            self.__remove_pidfile(bot_id)
-            self._log_bot_error('stopped', bot_id)
+            self.__remove_pidfile(instance_id)
+            self._log_bot_error('stopped', instance_id)
             return 'stopped'
         elif status is not True:
-            self._log_bot_error('unknown', bot_id, status)
+            self._log_bot_error('unknown', instance_id, status)
             return 'unknown'
-        self._log_bot_message('stopping', bot_id)
+        self._log_bot_message('stopping', instance_id)
         proc = psutil.Process(int(pid))
         try:
             proc.send_signal(signal.SIGTERM)
         except psutil.AccessDenied:
-            self._log_bot_error('access denied', bot_id, 'STOP')
+            self._log_bot_error('access denied', instance_id, 'STOP')
             return 'running'
         else:
             if getstatus:
                 # Wait for up to 2 seconds until the bot stops, #1434
                 starttime = time.time()
                 remaining = 2
-                status = self.__status_process(pid, module, bot_id)
+                status = self.__status_process(pid, module, instance_id)
                 while status is True and remaining > 0:
-                    status = self.__status_process(pid, module, bot_id)
+                    status = self.__status_process(pid, module, instance_id)
                     time.sleep(0.1)
                     remaining = 2 - (time.time() - starttime)
 
                 if status is True:
-                    self._log_bot_error('running', bot_id)
+                    self._log_bot_error('running', instance_id)
                     return 'running'
                 elif status is not False:
-                    self._log_bot_error('unknown', bot_id, status)
+                    self._log_bot_error('unknown', instance_id, status)
                     return 'unknown'
                 try:
-                    self.__remove_pidfile(bot_id)
+                    self.__remove_pidfile(instance_id)
                 except FileNotFoundError:  # Bot was running interactively and file has been removed already
                     pass
-                self._log_bot_message('stopped', bot_id)
+                self._log_bot_message('stopped', instance_id)
                 return 'stopped'
 
     def bot_reload(self, bot_id, getstatus=True):
-        pid = self.__check_pid(bot_id)
+        return self._combine_status([self.__bot_reload(bot_id, instance_id, getstatus)
+                                     for instance_id in self._all_instances(bot_id)])
+
+    def __bot_reload(self, bot_id, instance_id, getstatus=True):
+        pid = self.__check_pid(instance_id)
         module = self._runtime_configuration[bot_id]['module']
         if not pid:
             if self._is_enabled(bot_id):
-                self._log_bot_error('stopped', bot_id)
+                self._log_bot_error('stopped', instance_id)
                 return 'stopped'
             else:
-                self._log_bot_message('disabled', bot_id)
+                self._log_bot_message('disabled', instance_id)
                 return 'disabled'
-        status = self.__status_process(pid, module, bot_id)
+        status = self.__status_process(pid, module, instance_id)
         if status is False:
-            self.__remove_pidfile(bot_id)
-            self._log_bot_error('stopped', bot_id)
+            self.__remove_pidfile(instance_id)
+            self._log_bot_error('stopped', instance_id)
             return 'stopped'
         elif status is not True:
-            self._log_bot_error('unknown', bot_id, status)
+            self._log_bot_error('unknown', instance_id, status)
             return 'unknown'
-        self._log_bot_message('reloading', bot_id)
+        self._log_bot_message('reloading', instance_id)
         proc = psutil.Process(int(pid))
         try:
             proc.send_signal(signal.SIGHUP)
         except psutil.AccessDenied:
-            self._log_bot_error('access denied', bot_id, 'RELOAD')
+            self._log_bot_error('access denied', instance_id, 'RELOAD')
             return 'running'
         else:
             if getstatus:
                 time.sleep(0.5)
-                status = self.__status_process(pid, module, bot_id)
+                status = self.__status_process(pid, module, instance_id)
                 if status is True:
-                    self._log_bot_message('running', bot_id)
+                    self._log_bot_message('running', instance_id)
                     return 'running'
                 elif status is False:
-                    self._log_bot_error('stopped', bot_id)
+                    self._log_bot_error('stopped', instance_id)
                     return 'stopped'
                 else:
-                    self._log_bot_error('unknown', bot_id, status)
+                    self._log_bot_error('unknown', instance_id, status)
                     return 'unknown'
 
-    def bot_status(self, bot_id, *, proc=None):
+    def bot_status(self, bot_id):
+        return self._combine_status([self.__bot_status(bot_id, instance_id)
+                                     for instance_id in self._all_instances(bot_id)])
+
+    def __bot_status(self, bot_id, instance_id, *, proc=None):
         if proc:
             if proc.status() not in [psutil.STATUS_STOPPED, psutil.STATUS_DEAD, psutil.STATUS_ZOMBIE]:
-                self._log_bot_message('running', bot_id)
+                self._log_bot_message('running', instance_id)
                 return 'running'
         else:
-            pid = self.__check_pid(bot_id)
+            pid = self.__check_pid(instance_id)
             module = self._runtime_configuration[bot_id]['module']
-            status = self.__status_process(pid, module, bot_id) if pid else False
+            status = self.__status_process(pid, module, instance_id) if pid else False
             if pid and status is True:
-                self._log_bot_message('running', bot_id)
+                self._log_bot_message('running', instance_id)
                 return 'running'
             elif status is not False:
-                self._log_bot_error('unknown', bot_id, status)
+                self._log_bot_error('unknown', instance_id, status)
                 return 'unknown'
 
         if self._is_enabled(bot_id):
             if not proc and pid:
-                self.__remove_pidfile(bot_id)
-            self._log_bot_message('stopped', bot_id)
+                self.__remove_pidfile(instance_id)
+            self._log_bot_message('stopped', instance_id)
             if proc and self._returntype is ReturnType.TEXT:
                 log = proc.stderr.read().decode()
                 if not log:  # if nothing in stderr, print stdout
@@ -290,9 +349,16 @@ def bot_status(self, bot_id, *, proc=None):
                 print(log.strip(), file=sys.stderr)
             return 'stopped'
         else:
-            self._log_bot_message('disabled', bot_id)
+            self._log_bot_message('disabled', instance_id)
             return 'disabled'
 
+    def _existing_instances(self, bot_id: str) -> Iterable[str]:
+        """
+        The instances of the bot with a PID file.
+        """
+        for filename in glob.glob(self.PIDFILE.format(glob.escape(bot_id) + '*')):
+            yield os.path.basename(filename)[:-4]
+
     def __check_pid(self, bot_id):
         filename = self.PIDFILE.format(bot_id)
         if os.path.isfile(filename):
@@ -403,8 +469,8 @@ def is_running(state: int) -> bool:
     def bot_run(self, bot_id, run_subcommand=None, console_type=None, message_action_kind=None, dryrun=None, msg=None,
                 show_sent=None, loglevel=None):
         paused = False
-        state = self._get_process_state(bot_id)
-        if state in (self.ProcessState.STARTING, self.ProcessState.RUNNING, self.ProcessState.BACKOFF):
+        if any(self.ProcessState.is_running(self._get_process_state(instance_id))
+               for instance_id in self._all_instances(bot_id)):
             self.__logger.warning("Main instance of the bot is running in the background and will be stopped; "
                                   "when finished, we try to relaunch it again. "
                                   "You may want to launch: 'intelmqctl stop {}' to prevent this message."
@@ -434,63 +500,75 @@ def bot_run(self, bot_id, run_subcommand=None, console_type=None, message_action
         return retval, output
 
     def bot_start(self, bot_id: str, getstatus: bool = True):
-        state = self._get_process_state(bot_id)
+        return self._combine_status([self._bot_start(bot_id, instance_id, getstatus)
+                                     for instance_id in self._instances(bot_id)])
+
+    def _bot_start(self, bot_id: str, instance_id: str, getstatus: bool = True):
+        state = self._get_process_state(instance_id)
         if state is not None:
             if state == self.ProcessState.RUNNING:
-                self._log_bot_message("running", bot_id)
+                self._log_bot_message("running", instance_id)
                 return "running"
 
             elif not self.ProcessState.is_running(state):
-                self._remove_bot(bot_id)
+                self._remove_bot(instance_id)
 
-        self._log_bot_message("starting", bot_id)
-        self._create_and_start_bot(bot_id)
+        self._log_bot_message("starting", instance_id)
+        self._create_and_start_bot(bot_id, instance_id)
 
         if getstatus:
-            return self.bot_status(bot_id)
+            return self._bot_status(bot_id, instance_id)
 
     def bot_stop(self, bot_id: str, getstatus: bool = True):
-        state = self._get_process_state(bot_id)
+        return self._combine_status([self._bot_stop(bot_id, instance_id, getstatus)
+                                     for instance_id in self._all_instances(bot_id)])
+
+    def _bot_stop(self, bot_id: str, instance_id: str, getstatus: bool = True):
+        state = self._get_process_state(instance_id)
         if state is None:
             if not self._is_enabled(bot_id):
-                self._log_bot_message("disabled", bot_id)
+                self._log_bot_message("disabled", instance_id)
                 return "disabled"
             else:
-                self._log_bot_error("stopped", bot_id)
+                self._log_bot_error("stopped", instance_id)
                 return "stopped"
 
         if not self.ProcessState.is_running(state):
-            self._remove_bot(bot_id)
-            self._log_bot_error("stopped", bot_id)
+            self._remove_bot(instance_id)
+            self._log_bot_error("stopped", instance_id)
             return "stopped"
 
-        self._log_bot_message("stopping", bot_id)
+        self._log_bot_message("stopping", instance_id)
 
-        self._get_supervisor().supervisor.stopProcess(self._process_name(bot_id))
-        self._remove_bot(bot_id)
+        self._get_supervisor().supervisor.stopProcess(self._process_name(instance_id))
+        self._remove_bot(instance_id)
 
         if getstatus:
-            return self.bot_status(bot_id)
+            return self._bot_status(bot_id, instance_id)
 
     def bot_reload(self, bot_id: str, getstatus: bool = True):
-        state = self._get_process_state(bot_id)
+        return self._combine_status([self._bot_reload(bot_id, instance_id, getstatus)
+                                     for instance_id in self._all_instances(bot_id)])
+
+    def _bot_reload(self, bot_id: str, instance_id: str, getstatus: bool = True):
+        state = self._get_process_state(instance_id)
         if state is None:
             if not self._is_enabled(bot_id):
-                self._log_bot_message("disabled", bot_id)
+                self._log_bot_message("disabled", instance_id)
                 return "disabled"
             else:
-                self._log_bot_error("stopped", bot_id)
+                self._log_bot_error("stopped", instance_id)
                 return "stopped"
 
         if not self.ProcessState.is_running(state):
-            self._remove_bot(bot_id)
-            self._log_bot_error("stopped", bot_id)
+            self._remove_bot(instance_id)
+            self._log_bot_error("stopped", instance_id)
             return "stopped"
 
-        self._log_bot_message("reloading", bot_id)
+        self._log_bot_message("reloading", instance_id)
 
         try:
-            self._get_supervisor().supervisor.signalProcess(self._process_name(bot_id), "HUP")
+            self._get_supervisor().supervisor.signalProcess(self._process_name(instance_id), "HUP")
         except xmlrpc.client.Fault as e:
             if e.faultCode == self.RpcFaults.UNKNOWN_METHOD:
                 self._abort("Supervisor does not support signalProcess method, that was added in supervisor 3.2.0. "
@@ -499,44 +577,56 @@ def bot_reload(self, bot_id: str, getstatus: bool = True):
                 raise e
 
         if getstatus:
-            return self.bot_status(bot_id)
+            return self._bot_status(bot_id, instance_id)
 
     def bot_status(self, bot_id: str) -> str:
-        state = self._get_process_state(bot_id)
+        return self._combine_status([self._bot_status(bot_id, instance_id)
+                                     for instance_id in self._all_instances(bot_id)])
+
+    def _bot_status(self, bot_id: str, instance_id: str) -> str:
+        state = self._get_process_state(instance_id)
         if state is None:
             if not self._is_enabled(bot_id):
-                self._log_bot_message("disabled", bot_id)
+                self._log_bot_message("disabled", instance_id)
                 return "disabled"
             else:
-                self._log_bot_message("stopped", bot_id)
+                self._log_bot_message("stopped", instance_id)
                 return "stopped"
 
         if state == self.ProcessState.STARTING:
             # If process is still starting, try check it later
             time.sleep(0.1)
-            return self.bot_status(bot_id)
+            return self._bot_status(bot_id, instance_id)
 
         elif state == self.ProcessState.RUNNING:
-            self._log_bot_message("running", bot_id)
+            self._log_bot_message("running", instance_id)
             return "running"
 
         elif state == self.ProcessState.STOPPING:
-            self._log_bot_error("stopping", bot_id)
+            self._log_bot_error("stopping", instance_id)
             return "stopping"
 
         else:
-            self._log_bot_message("stopped", bot_id)
+            self._log_bot_message("stopped", instance_id)
             return "stopped"
 
-    def _create_and_start_bot(self, bot_id: str) -> None:
+    def _create_and_start_bot(self, bot_id: str, instance_id: str) -> None:
         module = self._runtime_configuration[bot_id]["module"]
-        cmdargs = (module, bot_id)
+        cmdargs = (module, instance_id)
 
-        self._get_supervisor().twiddler.addProgramToGroup(self.SUPERVISOR_GROUP, bot_id, {
+        self._get_supervisor().twiddler.addProgramToGroup(self.SUPERVISOR_GROUP, instance_id, {
             "command": " ".join(cmdargs),
             "stopsignal": "INT",
         })
 
+    def _existing_instances(self, bot_id: str) -> Iterable[str]:
+        """
+        The instances of the bot in the supervisor process group.
+        """
+        for process in self._get_supervisor().supervisor.getAllProcessInfo():
+            if process['group'] == self.SUPERVISOR_GROUP and process['name'].startswith(bot_id):
+                yield process['name']
+
     def _remove_bot(self, bot_id: str) -> None:
         self._get_supervisor().twiddler.removeProcessFromGroup(self.SUPERVISOR_GROUP, bot_id)
 
@@ -9,7 +9,9 @@
 decode
 encode
 base64_decode
+base64_decode_stream
 base64_encode
+iter_json_array
 load_configuration
 log
 reverse_readline
@@ -57,7 +59,7 @@
     from importlib_metadata import entry_points
 
 
-__all__ = ['base64_decode', 'base64_encode', 'decode', 'encode',
+__all__ = ['base64_decode', 'base64_decode_stream', 'base64_encode', 'decode', 'encode', 'iter_json_array',
            'load_configuration', 'load_parameters', 'log', 'parse_logline',
            'reverse_readline', 'error_message_from_exc', 'parse_relative',
            'RewindableFileHandle',
@@ -174,6 +176,150 @@ def base64_decode(value: Union[bytes, str]) -> str:
     return decode(base64.b64decode(encode(value, force=True)), force=True)
 
 
+class _Base64Reader(io.RawIOBase):
+    """
+    Raw stream of the decoded data of a base64 string, decoding it chunk by chunk.
+    """
+
+    def __init__(self, value: str, chunk_size: int):
+        self._value = value
+        self._position = 0
+        # number of base64 characters per chunk, must be a multiple of 4
+        self._chunk_size = max(chunk_size // 3, 1) * 4
+        self._buffer = memoryview(b'')
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._buffer:
+            if self._position >= len(self._value):
+                return 0
+            chunk = self._value[self._position:self._position + self._chunk_size]
+            self._position += len(chunk)
+            self._buffer = memoryview(base64.b64decode(chunk))
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+BASE64_STREAM_CHUNK_SIZE = 2 ** 20
+_BASE64_NON_ALPHABET = re.compile('[^A-Za-z0-9+/=]')
+
+
+def base64_decode_stream(value: Union[bytes, str],
+                         chunk_size: int = BASE64_STREAM_CHUNK_SIZE) -> io.TextIOBase:
+    """
+    Decodes a base64 string lazily, in chunks of the given size.
+
+    The decoded data is never held in memory as a whole, contrary to `base64_decode`.
+    Line endings are preserved when iterating over the lines (`newline=''`).
+
+    Parameters:
+        value: base64 encoded string
+        chunk_size: the size of the decoded chunks in bytes
+
+    Returns:
+        retval: text stream of the decoded string
+
+    Notes:
+        Possible bytes - unicode conversions problems are ignored.
+    """
+    value = decode(value, force=True)
+    if _BASE64_NON_ALPHABET.search(value):
+        # e.g. line breaks, the positions of the chunks can't be computed
+        return io.StringIO(base64_decode(value), newline='')
+    return io.TextIOWrapper(io.BufferedReader(_Base64Reader(value, chunk_size), buffer_size=chunk_size),
+                            encoding='utf-8', errors='ignore', newline='')
+
+
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_JSON_NUMBER_CHARACTERS = frozenset('0123456789.eE+-')
+
+
+def iter_json_array(stream: io.TextIOBase, chunk_size: int = BASE64_STREAM_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Parses a JSON array incrementally and yields its elements one by one.
+
+    The stream is read in chunks, the memory usage is bounded by the largest element instead
+    of the whole document. If the data is not a JSON array, it is parsed as a whole and
+    iterated, like `json.loads`.
+
+    Parameters:
+        stream: text stream holding the JSON data, e.g. from `base64_decode_stream`
+        chunk_size: number of characters to read at once
+
+    Raises:
+        json.JSONDecodeError: if the data is not valid JSON
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+
+    def read_more(size: int) -> None:
+        nonlocal buffer, position, eof
+        data = stream.read(size)
+        if not data:
+            eof = True
+        buffer = buffer[position:] + data
+        position = 0
+
+    read_more(chunk_size)
+    position = _JSON_WHITESPACE.match(buffer).end()
+    while position == len(buffer) and not eof:
+        read_more(chunk_size)
+        position = _JSON_WHITESPACE.match(buffer).end()
+    if not buffer.startswith('[', position):
+        yield from json.loads(buffer + stream.read())
+        return
+
+    position += 1
+    expect_element = True
+    first_element = True
+    while True:
+        position = _JSON_WHITESPACE.match(buffer, position).end()
+        if position == len(buffer):
+            if eof:
+                raise json.JSONDecodeError('Unterminated array', buffer, position)
+            read_more(chunk_size)
+            continue
+        if buffer[position] == ']' and (first_element or not expect_element):
+            position += 1
+            break
+        if not expect_element:
+            if buffer[position] != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, position)
+            position += 1
+            expect_element = True
+            continue
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # the element is incomplete, double the buffer to keep the number of retries low
+            read_more(max(chunk_size, len(buffer) - position))
+            continue
+        following = _JSON_WHITESPACE.match(buffer, end).end()
+        if not eof and (following == len(buffer) or buffer[following] in _JSON_NUMBER_CHARACTERS):
+            # a number may continue in the next chunk
+            read_more(chunk_size)
+            continue
+        position = end
+        expect_element = first_element = False
+        yield element
+
+    while True:
+        end = _JSON_WHITESPACE.match(buffer, position).end()
+        if end != len(buffer):
+            raise json.JSONDecodeError('Extra data', buffer, end)
+        if eof:
+            return
+        read_more(chunk_size)
+
+
 def base64_encode(value: Union[bytes, str]) -> str:
     """
     Parameters:
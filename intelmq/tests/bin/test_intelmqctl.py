@@ -3,6 +3,7 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
 # -*- coding: utf-8 -*-
+import json
 import os
 import unittest
 from tempfile import TemporaryDirectory
@@ -12,9 +13,42 @@
 
 import intelmq.bin.intelmqctl as ctl
 import intelmq.lib.utils as utils
+from intelmq.lib.histogram import Histogram
 from intelmq.lib.test import skip_installation
 
 
+class FakeStatisticsRedis:
+    """
+    Answers the requests of intelmqctl to the statistics cache and counts the round trips.
+    """
+
+    def __init__(self, values, instances=None):
+        self.values = {key: value.encode() for key, value in values.items()}
+        self.instances = {key: {member.encode() for member in members} for key, members in (instances or {}).items()}
+        self.round_trips = 0
+        self.commands = []
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def smembers(self, key):
+        self.commands.append(('smembers', key))
+
+    def mget(self, keys):
+        if self.commands:
+            self.commands.append(('mget', keys))
+        else:
+            self.round_trips += 1
+            return [self.values.get(key) for key in keys]
+
+    def execute(self):
+        self.round_trips += 1
+        replies = [self.instances.get(key, set()) if command == 'smembers' else [self.values.get(item) for item in key]
+                   for command, key in self.commands]
+        self.commands = []
+        return replies
+
+
 class TestIntelMQProcessManager(unittest.TestCase):
     def test_interpret_commandline(self):
         func = ctl.IntelMQProcessManager._interpret_commandline
@@ -48,6 +82,44 @@ def test_interpret_commandline(self):
                       func(1, (),
                            'intelmq.bots.collectors.http.collector_http', 'other-collector'))
 
+    def test_instances(self):
+        runtime = {'single': {'module': 'sys', 'parameters': {}},
+                   'multi': {'module': 'sys', 'parameters': {'instances_processes': 3}}}
+        manager = ctl.IntelMQProcessManager(interactive=False, runtime_configuration=runtime,
+                                            logger=mock.Mock(), returntype=ctl.ReturnType.PYTHON, quiet=True)
+        self.assertEqual(manager._instances('single'), ['single'])
+        self.assertEqual(manager._instances('multi'), ['multi.0', 'multi.1', 'multi.2'])
+
+    def test_all_instances(self):
+        """ Both process managers find instances which are not configured anymore """
+        runtime = {'single': {'module': 'sys', 'parameters': {}},
+                   'multi': {'module': 'sys', 'parameters': {'instances_processes': 2}}}
+        with TemporaryDirectory() as piddir:
+            for instance_id in ('single', 'single.0', 'single.10', 'single.2', 'single-2', 'multi', 'multi.1', 'multi.2'):
+                open(os.path.join(piddir, f'{instance_id}.pid'), 'w').close()
+            with mock.patch.object(ctl.IntelMQProcessManager, 'PIDFILE', os.path.join(piddir, '{}.pid')):
+                manager = ctl.IntelMQProcessManager(interactive=False, runtime_configuration=runtime,
+                                                    logger=mock.Mock(), returntype=ctl.ReturnType.PYTHON, quiet=True)
+                self.assertEqual(manager._all_instances('single'), ['single', 'single.0', 'single.2', 'single.10'])
+                self.assertEqual(manager._all_instances('multi'), ['multi', 'multi.0', 'multi.1', 'multi.2'])
+
+        supervisor = mock.Mock()
+        supervisor.supervisor.getAllProcessInfo.return_value = [
+            {'group': 'intelmq', 'name': name} for name in ('single', 'single.0', 'single.10', 'single.2', 'single-2',
+                                                            'multi', 'multi.1', 'multi.2')]
+        supervisor.supervisor.getAllProcessInfo.return_value.append({'group': 'other', 'name': 'single.3'})
+        manager = ctl.SupervisorProcessManager(interactive=False, runtime_configuration=runtime,
+                                               logger=mock.Mock(), returntype=ctl.ReturnType.PYTHON, quiet=True)
+        with mock.patch.object(manager, '_get_supervisor', mock.Mock(return_value=supervisor)):
+            self.assertEqual(manager._all_instances('single'), ['single', 'single.0', 'single.2', 'single.10'])
+            self.assertEqual(manager._all_instances('multi'), ['multi', 'multi.0', 'multi.1', 'multi.2'])
+
+    def test_combine_status(self):
+        func = ctl.IntelMQProcessManager._combine_status
+        self.assertEqual(func(['running', 'running']), 'running')
+        self.assertEqual(func(['running', 'stopped']), 'stopped')
+        self.assertEqual(func(['disabled']), 'disabled')
+
 
 class TestIntelMQController(unittest.TestCase):
     BOT_CONFIG = {"test-bot":
@@ -137,6 +209,111 @@ def test_check_imports_real_bot_module(self):
 
         import_mock.assert_called_once_with("mocked-module")
 
+    @skip_installation()
+    def test_get_queues_instances(self):
+        """ Every process of a bot has its own internal queue """
+        self.intelmqctl._runtime_configuration = {
+            "test-bot": {"module": "sys", "group": "Expert",
+                         "parameters": {"instances_processes": 2, "destination_queues": {"_default": ["other-queue"]}}}}
+        source, destination, internal, all_queues = self.intelmqctl.get_queues(with_internal_queues=True)
+        self.assertEqual(internal, {'test-bot-queue-internal.0', 'test-bot-queue-internal.1'})
+        self.assertEqual(all_queues, {'test-bot-queue', 'other-queue', 'test-bot-queue-internal.0',
+                                      'test-bot-queue-internal.1'})
+
+    @skip_installation()
+    def test_bot_latency(self):
+        """ The histograms of all processes of a bot are merged """
+        first, second = Histogram(), Histogram()
+        first.record(0.001)
+        second.record(0.003)
+        self.intelmqctl._runtime_configuration = {
+            "test-bot": {"module": "sys", "group": "Expert", "parameters": {"instances_processes": 2}}}
+        stats = {'test-bot.0.latency.process': json.dumps(first.to_dict()),
+                 'test-bot.1.latency.process': json.dumps(second.to_dict()),
+                 'test-bot.0.latency.receive': json.dumps(first.to_dict()),
+                 'test-bot.0.stats.success': '2'}
+        stats_cache = mock.Mock(redis=FakeStatisticsRedis(stats, {'test-bot.instances': ['0', '1']}))
+        with mock.patch.object(ctl.cache, 'Cache', mock.Mock(return_value=stats_cache)):
+            retval, results = self.intelmqctl.bot_latency('test-bot')
+        self.assertEqual(stats_cache.redis.round_trips, 1)
+        self.assertEqual(retval, 0)
+        self.assertEqual(list(results['test-bot']), ['receive', 'process'])
+        self.assertEqual(results['test-bot']['process']['count'], 2)
+        self.assertAlmostEqual(results['test-bot']['process']['mean'], 0.002)
+        self.assertAlmostEqual(results['test-bot']['process']['max'], 0.003)
+        self.assertEqual(results['test-bot']['receive']['count'], 1)
+
+    @skip_installation()
+    def test_collect_metrics(self):
+        """ The counters of all processes of a bot are summed up """
+        self.intelmqctl._runtime_configuration = {
+            "test-bot": {"module": "sys", "group": "Expert",
+                         "parameters": {"instances_processes": 2, "destination_queues": {"_default": ["other-queue"]}}}}
+        self.intelmqctl._processmanager = ctl.IntelMQProcessManager(
+            interactive=False, runtime_configuration=self.intelmqctl._runtime_configuration,
+            logger=mock.Mock(), returntype=ctl.ReturnType.PYTHON, quiet=True)
+        self.intelmqctl._parameters.logging_path = self.tmp_config_dir.name
+        with open(os.path.join(self.tmp_config_dir.name, 'test-bot.dump'), 'w') as handle:
+            handle.write('{}\n')
+        pipeline = mock.Mock(has_internal_queues=True)
+        pipeline.count_queued_messages = lambda *queues: {queue: 1 for queue in queues}
+        stats = {'test-bot.0.stats.success': '5', 'test-bot.1.stats.success': '7',
+                 'test-bot.1.stats.failure': '1', 'test-bot.0.total._default': '4'}
+        stats_cache = mock.Mock(redis=FakeStatisticsRedis(stats, {'test-bot.instances': ['0', '1']}))
+        with mock.patch.object(ctl.PipelineFactory, 'create', mock.Mock(return_value=pipeline)), \
+                mock.patch.object(ctl.cache, 'Cache', mock.Mock(return_value=stats_cache)):
+            families = {family.name: family.samples for family in self.intelmqctl.collect_metrics()}
+        self.assertEqual(stats_cache.redis.round_trips, 1)
+        self.assertEqual(families['intelmq_queue_messages'],
+                         [({'queue': 'other-queue'}, 1), ({'queue': 'test-bot-queue'}, 1),
+                          ({'queue': 'test-bot-queue-internal.0'}, 1), ({'queue': 'test-bot-queue-internal.1'}, 1)])
+        self.assertEqual(families['intelmq_bot_processed_messages'], [({'bot': 'test-bot'}, 12)])
+        self.assertEqual(families['intelmq_bot_failed_messages'], [({'bot': 'test-bot'}, 1)])
+        self.assertEqual(families['intelmq_bot_sent_messages'], [({'bot': 'test-bot', 'path': '_default'}, 4)])
+        self.assertEqual(families['intelmq_bot_dump_file_bytes'], [({'bot': 'test-bot'}, 3)])
+
+    @skip_installation()
+    def test_collect_metrics_threads(self):
+        """ The counters of all threads of a bot are summed up, the ones of other bots are ignored """
+        self.intelmqctl._runtime_configuration = {
+            "test-bot": {"module": "sys", "group": "Expert",
+                         "parameters": {"instances_threads": 2, "destination_queues": {"_default": ["other-queue"]}}},
+            "test-bot-2": {"module": "sys", "group": "Output", "parameters": {}}}
+        self.intelmqctl._processmanager = ctl.IntelMQProcessManager(
+            interactive=False, runtime_configuration=self.intelmqctl._runtime_configuration,
+            logger=mock.Mock(), returntype=ctl.ReturnType.PYTHON, quiet=True)
+        self.intelmqctl._parameters.logging_path = self.tmp_config_dir.name
+        pipeline = mock.Mock(has_internal_queues=False)
+        pipeline.count_queued_messages = lambda *queues: {queue: 0 for queue in queues}
+        stats = {'test-bot.0.stats.success': '5', 'test-bot.1.stats.success': '7',
+                 'test-bot.1.stats.failure': '1', 'test-bot.0.total._default': '4',
+                 'test-bot.1.total._default': '6', 'test-bot.1.total.other': '1',
+                 'test-bot-2.stats.success': '3', 'test-bot.0.latency.process': '{}'}
+        stats_cache = mock.Mock(redis=FakeStatisticsRedis(stats))
+        with mock.patch.object(ctl.PipelineFactory, 'create', mock.Mock(return_value=pipeline)), \
+                mock.patch.object(ctl.cache, 'Cache', mock.Mock(return_value=stats_cache)):
+            families = {family.name: family.samples for family in self.intelmqctl.collect_metrics()}
+        self.assertEqual(stats_cache.redis.round_trips, 1)
+        self.assertEqual(families['intelmq_bot_processed_messages'], [({'bot': 'test-bot'}, 12), ({'bot': 'test-bot-2'}, 3)])
+        self.assertEqual(families['intelmq_bot_failed_messages'], [({'bot': 'test-bot'}, 1), ({'bot': 'test-bot-2'}, 0)])
+        self.assertEqual(families['intelmq_bot_sent_messages'], [({'bot': 'test-bot', 'path': '_default'}, 10)])
+
+    @skip_installation()
+    def test_bot_latency_registered_instances(self):
+        """ The statistics of registered, but not configured, instances are requested additionally """
+        histogram = Histogram()
+        histogram.record(0.001)
+        self.intelmqctl._runtime_configuration = {"test-bot": {"module": "sys", "group": "Expert", "parameters": {}}}
+        stats = {'test-bot.latency.process': json.dumps(histogram.to_dict()),
+                 'test-bot.2.latency.process': json.dumps(histogram.to_dict())}
+        stats_cache = mock.Mock(redis=FakeStatisticsRedis(stats, {'test-bot.instances': ['2']}))
+        with mock.patch.object(ctl.cache, 'Cache', mock.Mock(return_value=stats_cache)):
+            retval, results = self.intelmqctl.bot_latency('test-bot')
+        self.assertEqual(retval, 0)
+        self.assertEqual(stats_cache.redis.round_trips, 2)
+        self.assertEqual(list(results['test-bot']), ['process'])
+        self.assertEqual(results['test-bot']['process']['count'], 2)
+
 
 if __name__ == '__main__':  # pragma: nocover
     unittest.main()
@@ -14,6 +14,7 @@
 import termstyle
 
 from intelmq.bin import intelmqdump
+from intelmq.lib import codec, exceptions
 from intelmq.lib.test import skip_installation
 
 
@@ -44,6 +45,33 @@ def test_queues(self):
         self.assertEqual(comp.complete('a some-e', 0), 'a some-expert-queue')
 
 
+class TestSanitizeMessage(unittest.TestCase):
+    """
+    Messages are fully validated before recovery.
+    """
+
+    def test_sanitized(self):
+        self.assertEqual(intelmqdump.sanitize_message('{"__type": "Event", "source.ip": " 192.0.2.1"}'),
+                         '{"source.ip": "192.0.2.1", "__type": "Event"}')
+
+    def test_invalid(self):
+        with self.assertRaises(exceptions.InvalidValue):
+            intelmqdump.sanitize_message('{"__type": "Event", "source.ip": "foobar"}')
+
+    @unittest.skipIf(codec.msgpack is None, 'msgpack is not installed.')
+    def test_binary(self):
+        """ Messages of binary codecs are recovered as JSON """
+        msg = codec.get_codec('msgpack').encode({'source.ip': '192.0.2.1'}, 'Event')
+        self.assertEqual(intelmqdump.sanitize_message(msg),
+                         '{"source.ip": "192.0.2.1", "__type": "Event"}')
+        with self.assertRaises(exceptions.DecodingError):
+            intelmqdump.sanitize_message(b'\x01\xc1')
+
+    def test_no_message(self):
+        self.assertEqual(intelmqdump.sanitize_message('foobar'), 'foobar')
+        self.assertEqual(intelmqdump.sanitize_message('{"source.ip": "foobar"}'), '{"source.ip": "foobar"}')
+
+
 class TestIntelMQDump(unittest.TestCase):
     def setUp(self) -> None:
         super().setUp()
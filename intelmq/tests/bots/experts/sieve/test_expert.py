@@ -433,6 +433,18 @@ def test_string_invalid_ipaddr(self):
         exception = context.exception
         self.assertRegex(str(exception), "Invalid IP address:")
 
+    def test_string_invalid_regex(self):
+        """Tests validation of regular expressions when the file is loaded."""
+        self.sysconfig["file"] = os.path.join(
+            os.path.dirname(__file__),
+            "test_sieve_files/test_string_invalid_regex.sieve",
+        )
+
+        self.input_message = EXAMPLE_INPUT.copy()
+        with self.assertRaises(ValueError) as context:
+            self.run_bot()
+        self.assertRegex(str(context.exception), "Invalid regular expression:")
+
     def test_numeric_equal_match(self):
         """Test == numeric match"""
         self.sysconfig["file"] = os.path.join(
@@ -1899,6 +1911,32 @@ def test_variables(self):
         self.run_bot()
         self.assertMessageEqual(0, expected)
 
+    def test_indexed_elif_clause(self):
+        """Test if-elif chains of equality conditions, which are looked up in an index."""
+        self.sysconfig["file"] = os.path.join(
+            os.path.dirname(__file__), "test_sieve_files/test_indexed_elif_clause.sieve"
+        )
+
+        cases = (
+            ({"feed.name": "feed1"}, "first"),
+            ({"feed.name": "feed3"}, "second"),
+            ({"feed.name": "feed4", "source.ip": "10.0.0.1"}, "fourth"),
+            ({"feed.name": "feed5", "source.ip": "10.0.0.1"}, "network"),
+            ({"feed.name": "feed6"}, "sixth"),
+            ({"feed.name": "other", "source.asn": 64496}, "asn"),
+            ({"source.asn": 64498}, "asns"),
+            ({"feed.name": "feed7", "source.asn": 64499}, "else"),
+        )
+        for fields, comment in cases:
+            with self.subTest(fields=fields):
+                event = EXAMPLE_INPUT.copy()
+                event.update(fields)
+                expected = event.copy()
+                expected["comment"] = comment
+                self.input_message = event
+                self.run_bot()
+                self.assertMessageEqual(0, expected)
+
 
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
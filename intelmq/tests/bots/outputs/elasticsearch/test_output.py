@@ -3,12 +3,14 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
 # -*- coding: utf-8 -*-
+import json
 import os
 import unittest
 import unittest.mock as mock
 from datetime import datetime
 
 import intelmq.lib.test as test
+import intelmq.bots.outputs.elasticsearch.output as output
 from intelmq.bots.outputs.elasticsearch.output import ElasticsearchOutputBot, get_event_date
 
 if os.environ.get('INTELMQ_TEST_DATABASES'):
@@ -251,5 +253,89 @@ def base_check_expected_index_created(self, input_event, expected_index_name):
         self.assertEqual(result_index_name, expected_index_name)
 
 
+INPUT_BULK = [dict(INPUT_TIME_SOURCE, **{'source.ip': '192.0.2.1'}),
+              dict(INPUT_TIME_OBSERVATION, **{'source.ip': '192.0.2.2'}),
+              dict(INPUT_TIME_SOURCE, **{'source.ip': '192.0.2.3'}),
+              dict(INPUT_TIME_OBSERVATION, **{'source.ip': '192.0.2.4'})]
+
+
+class FakeElasticsearch:
+    """
+    Answers bulk requests, rejecting the documents of the source IP addresses in `reject` with the given status once.
+    The requests with the numbers in `fail` raise a ConnectionError.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.indices = mock.Mock()
+        self.requests = []
+        self.reject = {}
+        self.fail = set()
+
+    def bulk(self, body):
+        lines = body.splitlines()
+        if len(self.requests) in self.fail:
+            self.fail.discard(len(self.requests))
+            self.requests.append(None)
+            raise ConnectionError('test connection error')
+        self.requests.append([json.loads(action)['index']['_index'] for action in lines[::2]])
+        items = []
+        for document in map(json.loads, lines[1::2]):
+            status = self.reject.pop(document['source.ip'], None)
+            if status:
+                items.append({'index': {'status': status, 'error': {'type': 'test_exception'}}})
+            else:
+                items.append({'index': {'status': 201}})
+        return {'errors': any('error' in item['index'] for item in items), 'items': items}
+
+
+class TestElasticsearchOutputBotBulk(test.BotTestCase, unittest.TestCase):
+    """
+    Tests the bulk requests with a fake Elasticsearch client.
+    """
+
+    @classmethod
+    def set_bot(cls):
+        cls.bot_reference = ElasticsearchOutputBot
+        cls.sysconfig = {'batch_size': 4, 'rotate_index': 'daily', 'error_max_retries': 1, 'error_retry_delay': 0}
+
+    def run_bulk(self, reject, fail=(), iterations=1, allowed_warning_count=0, **kwargs):
+        self.input_message = INPUT_BULK
+        with mock.patch.object(output, 'Elasticsearch', FakeElasticsearch):
+            self.prepare_bot(destination_queues=['_on_error'], parameters=kwargs)
+            self.bot.es.reject = reject
+            self.bot.es.fail = set(fail)
+            self.run_bot(prepare=False, iterations=iterations, allowed_error_count=1,
+                         allowed_warning_count=allowed_warning_count)
+        return self.bot.es.requests
+
+    def test_bulk(self):
+        """ All documents are sent in one request, to the index of their date """
+        requests = self.run_bulk({})
+        self.assertEqual(requests, [['intelmq-1869-12-02', 'intelmq-2020-02-02', 'intelmq-1869-12-02',
+                                     'intelmq-2020-02-02']])
+        self.assertOutputQueueLen(0, path='_on_error')
+
+    def test_bulk_max_bytes(self):
+        """ The requests are split at bulk_max_bytes """
+        requests = self.run_bulk({}, bulk_max_bytes=500)
+        self.assertEqual([len(request) for request in requests], [2, 2])
+
+    def test_bulk_rejected(self):
+        """ Temporarily rejected documents are sent again, permanently rejected ones go to the _on_error path """
+        requests = self.run_bulk({'192.0.2.2': 429, '192.0.2.3': 400})
+        self.assertEqual(requests[1], ['intelmq-2020-02-02'])
+        self.assertLogMatches("Elasticsearch rejected the document with status 400: {'type': 'test_exception'}.")
+        self.assertOutputQueueLen(1, path='_on_error')
+        self.assertEqual(json.loads(self.get_output_queue(path='_on_error')[0])['source.ip'], '192.0.2.3')
+
+    def test_bulk_failed_request(self):
+        """ If a later request fails, the documents rejected before are not handled twice """
+        requests = self.run_bulk({'192.0.2.1': 400}, fail={1}, iterations=4,
+                                 allowed_warning_count=1, bulk_max_bytes=500)
+        self.assertEqual([len(request) if request else None for request in requests], [2, None, 1, 1, 1, 1])
+        self.assertLogMatches('Processing the batch of 4 messages failed', 'WARNING')
+        self.assertOutputQueueLen(0, path='_on_error')
+
+
 if __name__ == '__main__':  # pragma: no cover
     unittest.main()
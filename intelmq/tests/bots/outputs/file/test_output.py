@@ -3,9 +3,11 @@
 # SPDX-License-Identifier: AGPL-3.0-or-later
 
 # -*- coding: utf-8 -*-
+import json
 import os
 import tempfile
 import unittest
+from unittest import mock
 
 import intelmq.lib.test as test
 from intelmq.bots.outputs.file.output import FileOutputBot
@@ -28,6 +30,36 @@ def test_event(self):
         self.assertEqual('{}\n', filepointer.read())
         filepointer.close()
 
+    def test_format_filename_batch(self):
+        """ Events are written to the files of their date, the least recently used file is closed """
+        with tempfile.TemporaryDirectory() as directory:
+            events = [{'__type': 'Event', 'time.source': f'2026-01-0{day}T00:00:00{fraction}+00:00',
+                       'source.ip': f'192.0.2.{index}'}
+                      for index, (day, fraction) in enumerate(((1, ''), (2, '.5'), (1, ''), (3, ''), (2, '')))]
+            self.input_message = events
+            with mock.patch('os.fsync') as fsync:
+                self.run_bot(parameters={'file': os.path.join(directory, '{event[time.source]:%Y-%m-%d}.txt'),
+                                         'format_filename': True, 'hierarchical_output': False,
+                                         'batch_size': 5, 'max_open_files': 2, 'fsync': 'batch'})
+            # the files of the 2nd and the 1st are synced when they are closed, those of the 3rd and 2nd at the end
+            self.assertEqual(fsync.call_count, 4)
+            self.assertEqual(sorted(os.listdir(directory)), ['2026-01-01.txt', '2026-01-02.txt', '2026-01-03.txt'])
+            with open(os.path.join(directory, '2026-01-02.txt')) as handle:
+                self.assertEqual([json.loads(line)['source.ip'] for line in handle], ['192.0.2.1', '192.0.2.4'])
+            with open(os.path.join(directory, '2026-01-01.txt')) as handle:
+                self.assertEqual([json.loads(line)['source.ip'] for line in handle], ['192.0.2.0', '192.0.2.2'])
+
+    def test_fsync_event(self):
+        self.input_message = [{'__type': 'Event'}] * 3
+        with mock.patch('os.fsync') as fsync:
+            self.run_bot(parameters={'batch_size': 3, 'fsync': 'event'})
+        self.assertEqual(fsync.call_count, 3)
+
+    def test_check_fsync(self):
+        self.assertEqual(FileOutputBot.check({'file': self.filename, 'fsync': 'always'}),
+                         [["error", "Invalid value 'always' of parameter 'fsync', possible values are "
+                                    "('none', 'batch', 'event')."]])
+
     @classmethod
     def tearDownClass(cls):
         os.remove(cls.filename)
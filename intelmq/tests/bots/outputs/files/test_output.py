@@ -56,6 +56,20 @@ def test_event_whole(self):
             event = json.loads(data)
             self.assertDictEqual({"output": self.test_output}, event)
 
+    def test_batch(self):
+        """ The events of a batch are written as JSON lines into one file """
+        self.sysconfig = {"dir": self.incoming_path,
+                          "tmp": self.tmp_path,
+                          "single_key": "output",
+                          "batch_size": 3}
+        self.input_message = [self.input_message] * 3
+        self.run_bot()
+        names = os.listdir(self.incoming_path)
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names[0].endswith('.json'))
+        with open(pth.join(self.incoming_path, names[0]), encoding="utf-8") as f:
+            self.assertEqual(f.read(), 3 * (self.test_output + "\n"))
+
     def test_path_error(self):
         self.sysconfig = {"hierarchical_output": False,
                           "dir": self.incoming_path,
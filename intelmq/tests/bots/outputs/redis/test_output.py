@@ -6,7 +6,9 @@
 
 import json
 import os
+import threading
 import unittest
+from unittest import mock
 
 import redis
 
@@ -81,6 +83,53 @@ def test_event(self):
         event_dict = json.loads(event)
         self.assertDictEqual(EXAMPLE_EVENT, event_dict)
 
+    @test.skip_redis()
+    def test_batch(self):
+        """ The events of a batch are pushed in their order, the oldest ones are trimmed """
+        redis_output = redis.Redis(host=self.sysconfig['redis_server_ip'], port=self.sysconfig['redis_server_port'],
+                                   db=self.sysconfig['redis_db'], password=self.sysconfig['redis_password'])
+        redis_output.delete(self.sysconfig['redis_queue'])
+        self.input_message = [{'__type': 'Event', 'source.port': port} for port in range(1, 5)]
+        self.run_bot(parameters={'batch_size': 4, 'redis_max_length': 3})
+        values = [json.loads(value) for value in redis_output.lrange(self.sysconfig['redis_queue'], 0, -1)]
+        redis_output.delete(self.sysconfig['redis_queue'])
+        self.assertEqual([value['source.port'] for value in values], [4, 3, 2])
+
+    @test.skip_redis()
+    def test_max_length_wait(self):
+        """ The bot waits until the consumers shortened the list """
+        redis_output = redis.Redis(host=self.sysconfig['redis_server_ip'], port=self.sysconfig['redis_server_port'],
+                                   db=self.sysconfig['redis_db'], password=self.sysconfig['redis_password'])
+        redis_output.delete(self.sysconfig['redis_queue'])
+        redis_output.lpush(self.sysconfig['redis_queue'], 'old')
+        self.prepare_bot(parameters={'redis_max_length': 1, 'redis_max_length_policy': 'wait'})
+        self.bot._wait_interval = 0.01
+        timer = threading.Timer(0.05, redis_output.rpop, args=(self.sysconfig['redis_queue'], ))
+        timer.start()
+        self.run_bot(prepare=False, allowed_warning_count=1)
+        timer.join()
+        self.assertLogMatches("List 'test-redis-output-queue' holds 1 values, waiting until it is shorter than 1.",
+                              'WARNING')
+        self.assertEqual(redis_output.llen(self.sysconfig['redis_queue']), 1)
+        redis_output.delete(self.sysconfig['redis_queue'])
+
+    @test.skip_redis()
+    def test_push_failed(self):
+        """ Failures are handled by the bot's error handling, without creating a new client """
+        self.prepare_bot()
+        self.bot.output.lpush = mock.Mock(side_effect=redis.ConnectionError('test connection error'))
+        with mock.patch.object(self.bot, 'connect') as connect:
+            self.run_bot(prepare=False, allowed_error_count=1)
+        connect.assert_not_called()
+        self.assertLogMatches('Bot has found a problem.', 'ERROR')
+        self.assertLogMatches('redis.exceptions.ConnectionError: test connection error', 'ERROR')
+        self.assertOutputQueueLen(0)
+
+    def test_check(self):
+        self.assertEqual(RedisOutputBot.check({'redis_max_length_policy': 'drop'}),
+                         [["error", "Invalid value 'drop' of parameter 'redis_max_length_policy', "
+                                    "possible values are ('trim', 'wait')."]])
+
 
 if __name__ == '__main__':  # pragma: no cover
     unittest.main()
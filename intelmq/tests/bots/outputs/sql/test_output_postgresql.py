@@ -141,6 +141,37 @@ def test_event(self):
         from_db = {k: v for k, v in self.cur.fetchone().items() if v is not None}
         self.assertDictEqual(from_db, OUTPUT1)
 
+    def test_batch(self):
+        """ Events with different columns are inserted in one transaction """
+        self.input_message = [dict(INPUT1, **{'source.asn': 64497}), dict(INPUT_EXTRA, **{'extra.asn': 64497}),
+                              dict(INPUT1, **{'source.asn': 64497, 'source.ip': '192.0.2.2'})]
+        self.run_bot(parameters={'batch_size': 3})
+        self.cur.execute('SELECT "source.ip" FROM tests WHERE "source.asn" = 64497 ORDER BY "source.ip"')
+        self.assertEqual([row['source.ip'] for row in self.cur.fetchall()], ['192.0.2.1', '192.0.2.2'])
+        self.cur.execute('SELECT "extra" FROM tests WHERE "extra" ->> \'asn\' = \'64497\'')
+        self.assertEqual(self.cur.rowcount, 1)
+
+    def test_batch_execute_values(self):
+        """ The events with the same columns are inserted with one statement """
+        self.input_message = [dict(INPUT1, **{'source.asn': 64498, 'source.ip': f'192.0.2.{number}'})
+                              for number in range(1, 4)]
+        with mock.patch.object(psycopg2.extras, 'execute_values', wraps=psycopg2.extras.execute_values) as execute_values:
+            self.run_bot(parameters={'batch_size': 3})
+        self.assertEqual(execute_values.call_count, 1)
+        self.assertEqual(len(execute_values.call_args.args[2]), 3)
+        self.cur.execute('SELECT "source.ip" FROM tests WHERE "source.asn" = 64498 ORDER BY "source.ip"')
+        self.assertEqual([row['source.ip'] for row in self.cur.fetchall()], ['192.0.2.1', '192.0.2.2', '192.0.2.3'])
+
+    def test_batch_error(self):
+        """ The error of the database is raised, the events are then inserted one by one in new transactions """
+        self.input_message = [dict(INPUT1, **{'source.asn': 64499}), dict(INPUT1, **{'source.asn': 64499})]
+        self.run_bot(parameters={'batch_size': 2, 'table': 'tests_nonexistent'}, iterations=2,
+                     allowed_error_count=2, allowed_warning_count=1)
+        self.assertLogMatches('Processing the batch of 2 messages failed .*"tests_nonexistent" does not exist',
+                              'WARNING')
+        self.assertLogMatches('psycopg2.errors.UndefinedTable: relation "tests_nonexistent" does not exist', 'ERROR')
+        self.assertNotRegexpMatchesLog('current transaction is aborted')
+
     def test_prepare_null(self):
         """ Test if a null character in extra is correctly removed. https://github.com/certtools/intelmq/issues/2203 """
         values = [json.dumps({"special": "foo\x00bar"})]
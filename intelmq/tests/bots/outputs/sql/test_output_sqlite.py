@@ -0,0 +1,81 @@
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Tests the SQL output bot with SQLite, which is always available.
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import intelmq.lib.test as test
+from intelmq.bots.outputs.sql.output import SQLOutputBot
+
+INPUT1 = {"__type": "Event",
+          "classification.type": "infected-system",
+          "source.asn": 64496,
+          "source.ip": "192.0.2.1",
+          }
+INPUT2 = {"__type": "Event",
+          "classification.type": "vulnerable-system",
+          "extra.asn": 64496,
+          }
+INPUT_INVALID = {"__type": "Event",
+                 "classification.type": "undetermined",
+                 "source.port": 80,
+                 }
+
+
+class TestSQLiteOutputBot(test.BotTestCase, unittest.TestCase):
+
+    @classmethod
+    def set_bot(cls):
+        cls.bot_reference = SQLOutputBot
+        cls.default_input_message = INPUT1
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        database = os.path.join(self.tmp_dir.name, 'events.sqlite')
+        self.con = sqlite3.connect(database)
+        self.con.execute('CREATE TABLE events ("classification.type" TEXT, "source.asn" INTEGER, '
+                         '"source.ip" TEXT, "extra" TEXT)')
+        self.sysconfig = {'engine': 'sqlite', 'database': database, 'table': 'events'}
+
+    def tearDown(self):
+        self.con.close()
+        self.tmp_dir.cleanup()
+        super().tearDown()
+
+    def select(self):
+        return self.con.execute('SELECT "classification.type", "source.asn", "source.ip", "extra" '
+                                'FROM events ORDER BY rowid').fetchall()
+
+    def test_event(self):
+        self.run_bot()
+        self.assertEqual(self.select(), [('infected-system', 64496, '192.0.2.1', None)])
+
+    def test_batch(self):
+        """ Events with different columns are inserted with one statement per column set """
+        self.input_message = [INPUT1, INPUT2, dict(INPUT1, **{'source.ip': '192.0.2.2'})]
+        self.run_bot(parameters={'batch_size': 3})
+        self.assertEqual(self.select(), [('infected-system', 64496, '192.0.2.1', None),
+                                         ('infected-system', 64496, '192.0.2.2', None),
+                                         ('vulnerable-system', None, None, '{"asn": 64496}')])
+
+    def test_batch_invalid(self):
+        """ If the batch fails, nothing is committed and the events are inserted one by one """
+        self.input_message = [INPUT1, INPUT_INVALID, INPUT2]
+        self.run_bot(parameters={'batch_size': 3}, iterations=3, allowed_error_count=3, allowed_warning_count=1)
+        self.assertLogMatches(r'Processing the batch of 3 messages failed \(sqlite3.table events has no '
+                              r'column named source.port\)', 'WARNING')
+        self.assertLogMatches('sqlite3.OperationalError: table events has no column named source.port', 'ERROR')
+        self.assertEqual(self.select(), [('infected-system', 64496, '192.0.2.1', None),
+                                         ('vulnerable-system', None, None, '{"asn": 64496}')])
+
+
+if __name__ == '__main__':  # pragma: no cover
+    unittest.main()
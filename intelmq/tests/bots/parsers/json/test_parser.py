@@ -51,6 +51,15 @@
 NO_DEFAULT_EVENT = MULTILINE_EVENTS[1].copy()
 NO_DEFAULT_EVENT['raw'] = base64.b64encode(b'{"source.ip": "127.0.0.2", "classification.type": "c2-server"}\n').decode()
 
+ARRAY_REPORT = {"feed.name": "Test feed",
+                "raw": base64.b64encode(b'[{"source.ip": "127.0.0.1", "classification.type": "c2-server"},\n'
+                                        b' {"source.ip": "127.0.0.2", "classification.type": "c2-server"}]').decode(),
+                "__type": "Report",
+                }
+ARRAY_EVENTS = [{**event, "raw": base64.b64encode(b'{"source.ip": "%s", "classification.type": "c2-server"}'
+                                                  % event["source.ip"].encode()).decode()}
+                for event in MULTILINE_EVENTS]
+
 
 class TestJSONParserBot(test.BotTestCase, unittest.TestCase):
     """
@@ -81,6 +90,13 @@ def test_default_event(self):
         self.run_bot()
         self.assertMessageEqual(0, NO_DEFAULT_EVENT)
 
+    def test_array_report(self):
+        """ Test if each element of a JSON array is an Event. """
+        self.input_message = ARRAY_REPORT
+        self.run_bot()
+        self.assertMessageEqual(0, ARRAY_EVENTS[0])
+        self.assertMessageEqual(1, ARRAY_EVENTS[1])
+
 
 if __name__ == '__main__':  # pragma: no cover
     unittest.main()
@@ -9,8 +9,18 @@
 @author: sebastian
 """
 
+import logging
 import unittest
-from intelmq.bots.parsers.shadowserver._config import validate_to_none, convert_bool
+from intelmq.bots.parsers.shadowserver._config import validate_to_none, convert_bool, RowConverter
+from intelmq.lib.message import Event
+
+CONFIG = {'required_fields': [('time.source', 'timestamp', 'add_UTC_to_timestamp'),
+                              ('source.ip', 'ip', 'validate_ip')],
+          'optional_fields': [('source.port', 'port', 'convert_int'),
+                              ('extra.', 'tag'),
+                              ('extra.source_ip', 'ip'),
+                              (False, 'ignored')],
+          'constant_fields': {'classification.identifier': 'test'}}
 
 
 class TestShadowserverHelpers(unittest.TestCase):
@@ -33,3 +43,34 @@ def test_bool(self):
         self.assertEqual(False, convert_bool('no'))
         self.assertEqual(False, convert_bool('disabled'))
         self.assertEqual(False, convert_bool('0'))
+
+
+class TestShadowserverRowConverter(unittest.TestCase):
+
+    def setUp(self):
+        self.converter = RowConverter('Test', CONFIG, ['timestamp', 'ip', 'port', 'tag', 'ignored', 'other', 'empty'],
+                                      logging.getLogger('test'))
+
+    def test_compiled(self):
+        self.assertEqual(self.converter.unmapped_columns, ['other', 'empty'])
+        self.assertEqual(self.converter.mapped_columns,
+                         {'timestamp': 1, 'ip': 1, 'port': 1, 'tag': 1, 'ignored': 1})
+
+    def test_convert(self):
+        event = Event()
+        extra = self.converter.convert({'timestamp': '2020-01-01 00:00:00', 'ip': '192.0.2.1', 'port': '80',
+                                        'tag': 'foo', 'ignored': 'bar', 'other': 'baz', 'empty': ''}, event)
+        self.assertEqual(extra, {'tag': 'foo', 'source_ip': '192.0.2.1', 'other': 'baz'})
+        self.assertEqual(event.to_dict(hierarchical=False),
+                         {'time.source': '2020-01-01T00:00:00+00:00', 'source.ip': '192.0.2.1',
+                          'source.port': 80, 'classification.identifier': 'test'})
+
+    def test_unconverted(self):
+        """ Values which could not be added to the event are added to extra """
+        extra = self.converter.convert({'timestamp': '2020-01-01 00:00:00', 'ip': '0.0.0.0', 'port': '',
+                                        'tag': '', 'ignored': '', 'other': '', 'empty': ''}, Event())
+        self.assertEqual(extra, {'tag': '', 'source_ip': '0.0.0.0'})
+
+    def test_missing_required(self):
+        with self.assertRaisesRegex(ValueError, "Required column 'ip' not found in feed 'Test'"):
+            RowConverter('Test', CONFIG, ['timestamp'], logging.getLogger('test'))
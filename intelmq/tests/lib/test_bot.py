@@ -8,6 +8,8 @@
 """
 import unittest
 
+import intelmq.lib.codec as codec
+import intelmq.lib.message as message
 import intelmq.lib.test as test
 from intelmq.tests.lib import test_parser_bot
 
@@ -77,6 +79,28 @@ def test_invalid_value_on_input_message(self):
         self.assertEqual(self.pipe.state['test-bot-input'], [])
         self.assertEqual(self.pipe.state['test-bot-output'], [])
 
+    @unittest.skipIf(codec.msgpack is None, 'msgpack is not installed.')
+    def test_destination_codec(self):
+        """
+        Test if the messages are sent with the configured codec and received by detecting it.
+        """
+        self.input_message = [message.MessageFactory.serialize(message.Report(test_parser_bot.EXAMPLE_SHORT.copy()),
+                                                               codec=codec.get_codec('msgpack'))]
+        self.run_bot(parameters={'destination_pipeline_codec': 'msgpack'})
+        self.assertTrue(self.pipe.state['test-bot-output'][0].startswith(b'\x01'))
+        self.assertMessageEqual(0, test_parser_bot.EXAMPLE_EVENT)
+
+    def test_latency(self):
+        """
+        Test if the durations of the stages are recorded per processed message.
+        """
+        self.input_message = [test_parser_bot.EXAMPLE_SHORT, test_parser_bot.EXAMPLE_SHORT]
+        self.run_bot(iterations=2)
+        latency = self.bot._Bot__latency
+        self.assertEqual({stage: histogram.count for stage, histogram in latency.items()},
+                         {'receive': 2, 'process': 2, 'send': 2})
+        self.assertGreater(latency['process'].max, 0)
+
 
 if __name__ == '__main__':  # pragma: no cover
     unittest.main()
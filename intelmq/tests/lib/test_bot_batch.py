@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Tests the batch processing of the Bot class (process_batch).
+"""
+import unittest
+
+import intelmq.lib.test as test
+from intelmq.lib.bot import ExpertBot
+
+EXAMPLES = [{'__type': 'Event', 'source.ip': f'192.0.2.{i}'} for i in range(1, 6)]
+
+
+class DummyBatchExpertBot(ExpertBot):
+    fail_on: str = None
+
+    def init(self):
+        self.batch_sizes = []
+
+    def process(self):
+        self.batch_sizes.append(None)
+        self.send_message(self.receive_message())
+        self.acknowledge_message()
+
+    def process_batch(self, messages):
+        self.batch_sizes.append(len(messages))
+        for message in messages:
+            if message['source.ip'] == self.fail_on:
+                raise ValueError(f'Failing for {self.fail_on}.')
+        for message in messages:
+            self.send_message(message)
+
+
+class TestDummyBatchExpertBot(test.BotTestCase, unittest.TestCase):
+    """ Testing the batch processing of the Bot base class. """
+
+    @classmethod
+    def set_bot(cls):
+        cls.bot_reference = DummyBatchExpertBot
+        cls.sysconfig = {'batch_size': 3}
+
+    def test_batch(self):
+        self.input_message = EXAMPLES
+        self.run_bot(iterations=2)
+        self.assertEqual(self.bot.batch_sizes, [3, 2])
+        self.assertOutputQueueLen(5)
+        for position, example in enumerate(EXAMPLES):
+            self.assertMessageEqual(position, example)
+
+    def test_batch_failure(self):
+        """
+        The failing batch is processed message by message,
+        only the faulty message is sent to the _on_error path.
+        """
+        self.input_message = EXAMPLES
+        self.prepare_bot(parameters={'fail_on': '192.0.2.2'},
+                         destination_queues=['_default', '_on_error'])
+        self.run_bot(iterations=4, prepare=False, allowed_error_count=1, allowed_warning_count=1)
+        self.assertEqual(self.bot.batch_sizes, [3, 1, 1, 1, 2])
+        self.assertLogMatches('Processing the batch of 3 messages failed', 'WARNING')
+        self.assertOutputQueueLen(4)
+        self.assertMessageEqual(0, EXAMPLES[0])
+        self.assertMessageEqual(1, EXAMPLES[2])
+        self.assertMessageEqual(0, EXAMPLES[1], path='_on_error')
+
+    def test_no_batch(self):
+        """ With a batch_size of 1 process is called """
+        self.input_message = EXAMPLES[:2]
+        self.run_bot(iterations=2, parameters={'batch_size': 1})
+        self.assertEqual(self.bot.batch_sizes, [None, None])
+        self.assertOutputQueueLen(2)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,71 @@
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Tests the message codecs.
+"""
+import unittest
+
+import intelmq.lib.codec as codec
+import intelmq.lib.exceptions as exceptions
+import intelmq.lib.message as message
+
+EXAMPLE = {'source.ip': '192.0.2.1', 'source.port': 80, 'extra.foo': [1, 'bar'],
+           'raw': 'Zm9vYmFy'}
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_json(self):
+        encoded = codec.get_codec('json').encode(EXAMPLE.copy(), 'Event')
+        self.assertIsInstance(encoded, str)
+        self.assertFalse(codec.is_binary(encoded))
+        self.assertEqual(codec.decode(encoded), dict(EXAMPLE, __type='Event'))
+        self.assertEqual(codec.decode(encoded.encode()), dict(EXAMPLE, __type='Event'))
+
+    @unittest.skipIf(codec.msgpack is None, 'msgpack is not installed.')
+    def test_msgpack(self):
+        example = EXAMPLE.copy()
+        encoded = codec.get_codec('msgpack').encode(example, 'Event')
+        self.assertEqual(example, EXAMPLE)
+        self.assertTrue(encoded.startswith(b'\x01'))
+        self.assertTrue(codec.is_binary(encoded))
+        self.assertEqual(codec.decode(encoded), dict(EXAMPLE, __type='Event'))
+
+    @unittest.skipIf(codec.msgpack is None or codec.zstandard is None, 'msgpack or zstandard is not installed.')
+    def test_msgpack_zstd(self):
+        encoded = codec.get_codec('msgpack-zstd').encode(EXAMPLE.copy(), 'Event')
+        self.assertTrue(encoded.startswith(b'\x02'))
+        self.assertEqual(codec.decode(encoded), dict(EXAMPLE, __type='Event'))
+
+    @unittest.skipIf(codec.msgpack is None, 'msgpack is not installed.')
+    def test_msgpack_raw_binary(self):
+        """ Base64 fields are transported as bytes and are base64 strings again after decoding. """
+        event = message.Event({'raw': 'Zm9vYmFy'}, harmonization=None)
+        encoded = codec.get_codec('msgpack').encode(event, 'Event')
+        self.assertIn(b'foobar', encoded)
+        self.assertNotIn(b'Zm9vYmFy', encoded)
+        self.assertEqual(codec.decode(encoded), {'raw': 'Zm9vYmFy', '__type': 'Event'})
+
+    @unittest.skipIf(codec.msgpack is None, 'msgpack is not installed.')
+    def test_invalid_binary(self):
+        with self.assertRaises(exceptions.DecodingError) as context:
+            codec.decode(b'\x01\xc1')
+        self.assertEqual(context.exception.object, b'\x01\xc1')
+
+    def test_unknown(self):
+        with self.assertRaises(exceptions.InvalidArgument):
+            codec.get_codec('foobar')
+
+    @unittest.skipIf(codec.msgpack is None, 'msgpack is not installed.')
+    def test_message_factory(self):
+        event = message.Event(EXAMPLE.copy(), harmonization=None)
+        encoded = message.MessageFactory.serialize(event, codec=codec.get_codec('msgpack'))
+        self.assertEqual(message.MessageFactory.unserialize(encoded), event)
+        self.assertNotIn('__type', event)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,93 @@
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Tests the dump files in the JSON lines format.
+"""
+import json
+import os
+import stat
+import tempfile
+import unittest
+
+from intelmq.lib import dump
+
+RECORD1 = {'timestamp': '2026-01-01T00:00:00', 'bot_id': 'test-bot', 'source_queue': 'test-bot-queue',
+           'traceback': ['ValueError'], 'message': '{"__type": "Event"}'}
+RECORD2 = dict(RECORD1, timestamp='2026-01-02T00:00:00', traceback=['KeyError'])
+
+
+class TestDump(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'test-bot.dump')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_append_read(self):
+        dump.append(self.path, RECORD1)
+        dump.append(self.path, RECORD2)
+        records = list(dump.read(self.path))
+        self.assertEqual([record for _, record in records], [RECORD1, RECORD2])
+        self.assertEqual(records[0][0], 0)
+        self.assertEqual(dump.count(self.path), 2)
+
+    def test_delete(self):
+        """ Deleting a record keeps the offsets of the others """
+        dump.append(self.path, RECORD1)
+        dump.append(self.path, RECORD2)
+        (offset1, _), (offset2, _) = dump.read(self.path)
+        dump.delete(self.path, offset1)
+        self.assertEqual(list(dump.read(self.path)), [(offset2, RECORD2)])
+        self.assertFalse(dump.remove_if_empty(self.path))
+        dump.delete(self.path, offset2)
+        self.assertEqual(dump.count(self.path), 0)
+        self.assertTrue(dump.remove_if_empty(self.path))
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_delete_invalid_offset(self):
+        dump.append(self.path, RECORD1)
+        with self.assertRaises(ValueError):
+            dump.delete(self.path, os.path.getsize(self.path))
+
+    def test_invalid_record(self):
+        """ Incomplete lines are reported as invalid records """
+        dump.append(self.path, RECORD1)
+        with open(self.path, 'ab') as handle:
+            handle.write(b'{"timestamp": "2026-\n')
+        records = list(dump.read(self.path))
+        self.assertEqual(records[1][1], None)
+        self.assertEqual(dump.count(self.path), 2)
+
+    def test_migrate(self):
+        """ Dump files of previous versions are converted """
+        with open(self.path, 'w') as handle:
+            json.dump({record['timestamp']: {key: value for key, value in record.items() if key != 'timestamp'}
+                       for record in (RECORD2, RECORD1)}, handle, indent=4)
+        os.chmod(self.path, 0o640)
+        self.assertTrue(dump.is_legacy(self.path))
+        self.assertEqual(dump.count(self.path), 2)
+        dump.append(self.path, RECORD1)
+        self.assertFalse(dump.is_legacy(self.path))
+        self.assertEqual([record for _, record in dump.read(self.path)], [RECORD1, RECORD2, RECORD1])
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o640)
+        self.assertEqual(os.listdir(self.tmp_dir.name), ['test-bot.dump'])
+
+    def test_migrate_empty(self):
+        with open(self.path, 'w') as handle:
+            handle.write('{}')
+        dump.migrate(self.path)
+        self.assertEqual(dump.count(self.path), 0)
+
+    def test_not_legacy(self):
+        self.assertFalse(dump.is_legacy(self.path))
+        dump.append(self.path, RECORD1)
+        self.assertFalse(dump.is_legacy(self.path))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    unittest.main()
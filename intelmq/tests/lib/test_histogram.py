@@ -0,0 +1,59 @@
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Tests the latency histograms.
+"""
+import json
+import unittest
+
+from intelmq.lib.histogram import BUCKETS, Histogram, bucket_bounds, bucket_index
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_bucket_bounds(self):
+        """ Every value is within the bounds of its bucket, which are at most 12.5% apart """
+        for value in list(range(5000)) + [2 ** 20 + 12345, 2 ** 33 - 1]:
+            lower, upper = bucket_bounds(bucket_index(value))
+            self.assertLessEqual(lower, value)
+            self.assertLessEqual(value, upper)
+            self.assertLessEqual(upper - lower, lower / 8)
+
+    def test_bucket_index_overflow(self):
+        self.assertEqual(bucket_index(2 ** 60), BUCKETS - 1)
+        self.assertEqual(bucket_index(-1), 0)
+
+    def test_percentile(self):
+        histogram = Histogram()
+        for value in range(1, 1001):
+            histogram.record(value / 1e6)
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.mean, 500.5e-6)
+        self.assertAlmostEqual(histogram.max, 1000e-6)
+        self.assertAlmostEqual(histogram.percentile(50), 500e-6, delta=500e-6 / 8)
+        self.assertAlmostEqual(histogram.percentile(99), 990e-6, delta=990e-6 / 8)
+        self.assertAlmostEqual(histogram.percentile(100), 1000e-6)
+
+    def test_empty(self):
+        self.assertEqual(Histogram().summary(),
+                         {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0})
+
+    def test_merge_serialization(self):
+        first, second = Histogram(), Histogram()
+        first.record(0.001)
+        second.record(0.5)
+        second.record(0.000_005)
+        first.merge(Histogram.from_dict(json.loads(json.dumps(second.to_dict()))))
+        self.assertEqual(first.count, 3)
+        self.assertEqual(first.total, 501005)
+        self.assertEqual(first.max, 0.5)
+        self.assertEqual(first.percentile(1), 0.000_005)
+        self.assertEqual(first.to_dict()['buckets'], {'5': 1, str(bucket_index(1000)): 1,
+                                                      str(bucket_index(500000)): 1})
+
+
+if __name__ == '__main__':  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,76 @@
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Tests the prefix tries of IP networks.
+"""
+import ipaddress
+import random
+import unittest
+
+from intelmq.lib.iptrie import IPTrie
+
+NETWORKS = ['10.0.0.0/8', '10.1.0.0/16', '10.1.2.0/24', '10.1.2.3/32', '192.168.0.0/16',
+            '0.0.0.0/1', '2001:db8::/32', '2001:db8:1::/48', '::1/128']
+
+
+class TestIPTrie(unittest.TestCase):
+
+    def test_longest_match(self):
+        trie = IPTrie(NETWORKS)
+        self.assertEqual(len(trie), len(NETWORKS))
+        self.assertEqual(trie.get('10.1.2.3'), ipaddress.ip_network('10.1.2.3/32'))
+        self.assertEqual(trie.get('10.1.2.4'), ipaddress.ip_network('10.1.2.0/24'))
+        self.assertEqual(trie.get('10.1.3.1'), ipaddress.ip_network('10.1.0.0/16'))
+        self.assertEqual(trie.get('10.2.0.1'), ipaddress.ip_network('10.0.0.0/8'))
+        self.assertEqual(trie.get('11.0.0.1'), ipaddress.ip_network('0.0.0.0/1'))
+        self.assertEqual(trie.get('2001:db8:1::1'), ipaddress.ip_network('2001:db8:1::/48'))
+        self.assertEqual(trie.get(ipaddress.ip_address('::1')), ipaddress.ip_network('::1/128'))
+        self.assertIsNone(trie.lookup('172.16.0.1'))
+        self.assertEqual(trie.get('::2', 'default'), 'default')
+
+    def test_membership(self):
+        trie = IPTrie(['192.168.0.0/16', '2001:db8::/32'])
+        self.assertIn('192.168.1.1', trie)
+        self.assertNotIn('192.169.0.0', trie)
+        self.assertNotIn('::ffff:192.168.1.1', trie)
+        self.assertIn('2001:db8::1', trie)
+        self.assertNotIn('10.0.0.1', IPTrie())
+        with self.assertRaises(ValueError):
+            '192.168.1' in trie
+
+    def test_values(self):
+        """ Values are replaced, host bits of networks are ignored """
+        trie = IPTrie()
+        trie.add('10.0.0.1/8', 'a')
+        trie.add('10.0.0.0/8', 'b')
+        trie.add('10.128.0.0/9', None)
+        self.assertEqual(len(trie), 2)
+        self.assertEqual(trie.lookup('10.0.0.1'), (ipaddress.ip_network('10.0.0.0/8'), 'b'))
+        self.assertEqual(trie.get('10.200.0.1'), ipaddress.ip_network('10.128.0.0/9'))
+
+    def test_iter(self):
+        trie = IPTrie(reversed(NETWORKS))
+        self.assertEqual(list(trie), sorted((ipaddress.ip_network(network) for network in NETWORKS),
+                                            key=lambda network: (network.version, network)))
+
+    def test_random(self):
+        """ Compares the lookups with a linear search over random networks """
+        generator = random.Random(1)
+        networks = set()
+        for _ in range(300):
+            address = ipaddress.ip_address(generator.getrandbits(32))
+            networks.add(ipaddress.ip_network(f'{address}/{generator.randint(0, 32)}', strict=False))
+        trie = IPTrie(networks)
+        self.assertEqual(len(trie), len(networks))
+        for _ in range(1000):
+            address = ipaddress.ip_address(generator.getrandbits(32))
+            matches = [network for network in networks if address in network]
+            expected = max(matches, key=lambda network: network.prefixlen) if matches else None
+            self.assertEqual(trie.get(address), expected)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    unittest.main()
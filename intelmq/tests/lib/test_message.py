@@ -10,8 +10,11 @@
 Most tests are performed on Report, as it is formally the same as Message,
 but has a valid Harmonization configuration.
 """
+import copy
 import json
+import tempfile
 import unittest
+from unittest import mock
 
 import pkg_resources
 
@@ -406,6 +409,53 @@ def test_copy_object(self):
         report = self.new_report(examples=True)
         self.assertIsNot(report.copy(), report)
 
+    def test_clone(self):
+        """ Test if clone returns an independent message with the same items. """
+        event = self.add_event_examples(self.new_event())
+        clone = event.clone()
+        self.assertIsInstance(clone, message.Event)
+        self.assertDictEqual(clone, event)
+        self.assertIs(clone.harmonization_config, event.harmonization_config)
+        clone.add('source.port', 80)
+        self.assertNotIn('source.port', event)
+
+    def test_load_harmonization_fallback_cached(self):
+        """ Test if the internal harmonization is cached if the configuration file does not exist. """
+        with mock.patch.object(message, 'HARMONIZATION_CONF_FILE', '/nonexistent/harmonization.conf'), \
+                mock.patch.object(message, '_HARMONIZATION_CACHE', {}), \
+                mock.patch.object(message.utils, 'load_configuration', wraps=load_configuration) as loader:
+            harmonization = message.load_harmonization()
+            self.assertIs(message.load_harmonization(), harmonization)
+        internal = pkg_resources.resource_filename('intelmq', 'etc/harmonization.conf')
+        self.assertEqual([call.args[0] for call in loader.call_args_list].count(internal), 1)
+        self.assertDictEqual(harmonization, HARM)
+
+    def test_load_harmonization_legacy_extra(self):
+        """ Test if the legacy type of extra is converted once when the harmonization is loaded. """
+        harmonization = copy.deepcopy(HARM)
+        harmonization['event']['extra']['type'] = 'JSON'
+        with tempfile.NamedTemporaryFile('w', suffix='.conf') as handle:
+            json.dump(harmonization, handle)
+            handle.flush()
+            with mock.patch.object(message, 'HARMONIZATION_CONF_FILE', handle.name), \
+                    mock.patch.object(message, '_HARMONIZATION_CACHE', {}):
+                with self.assertWarns(DeprecationWarning):
+                    loaded = message.load_harmonization()
+                self.assertEqual(loaded['event']['extra']['type'], 'JSONDict')
+                event = message.Event()
+                event.add('extra.foo', 'bar')
+                self.assertIs(event.harmonization_config, loaded['event'])
+                self.assertIs(message.load_harmonization(), loaded)
+
+    def test_update_trusted(self):
+        """ Test if update_trusted sets the values without validation. """
+        event = self.new_event()
+        event.update_trusted({'source.port': 'not validated', 'extra.foo': 'bar'})
+        self.assertEqual(event['source.port'], 'not validated')
+        self.assertEqual(event['extra.foo'], 'bar')
+        with self.assertRaises(exceptions.InvalidKey):
+            event.update_trusted({'invalid': 1})
+
     def test_event_hash(self):
         """ Test Event __hash__ 'time.observation should be ignored. """
         event = self.new_event()
@@ -772,6 +822,40 @@ def test_invalid_extra_key_name(self):
             event.add('extra.foo-', 'bar')
         self.assertIn('Does not match regular expression', cm.exception.args[0])
 
+    def test_harmonization_schema_shared(self):
+        """ Messages with the same harmonization share the compiled schema. """
+        event1 = message.Event(harmonization=HARM)
+        event2 = message.Event(harmonization=HARM)
+        self.assertIs(event1._schema, event2._schema)
+        self.assertIs(message.HarmonizationSchema.get(HARM['event']), event1._schema)
+        self.assertIsNot(message.Report(harmonization=HARM)._schema, event1._schema)
+
+    def test_harmonization_schema_regex(self):
+        """ Test the compiled regular expressions of the schema. """
+        schema = message.HarmonizationSchema.get(HARM['event'])
+        self.assertEqual(schema.is_valid_value('classification.type', 'infected-system'), (True, ))
+        self.assertEqual(schema.is_valid_value('protocol.transport', 'foobar'),
+                         (False, 'regex (case insensitive) did not match.'))
+        self.assertEqual(schema.is_valid_key('extra.foo'), (True, None))
+        self.assertEqual(schema.is_valid_key('foo.bar'),
+                         (False, 'This key is not allowed by the harmonization configuration'))
+
+    def test_unserialize_trusted(self):
+        """ Trusted messages are not sanitized, but the keys are checked. """
+        event = message.MessageFactory.unserialize('{"__type": "Event", "source.ip": " 192.0.2.1", "extra.foo": "bar"}',
+                                                   harmonization=HARM, trusted=True)
+        self.assertEqual(event['source.ip'], ' 192.0.2.1')
+        self.assertEqual(event['extra.foo'], 'bar')
+        with self.assertRaises(exceptions.InvalidKey):
+            message.MessageFactory.unserialize('{"__type": "Event", "foo.bar": 1}',
+                                               harmonization=HARM, trusted=True)
+
+    def test_unserialize_trusted_extra(self):
+        """ 'extra' as a whole takes the regular path. """
+        event = message.MessageFactory.unserialize('{"__type": "Event", "extra": {"foo": "bar"}}',
+                                                   harmonization=HARM, trusted=True)
+        self.assertEqual(event['extra.foo'], 'bar')
+
 
 class TestReport(unittest.TestCase):
     """
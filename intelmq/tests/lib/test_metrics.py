@@ -0,0 +1,46 @@
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Tests the OpenMetrics exposition.
+"""
+import unittest
+
+from intelmq.lib import metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_render(self):
+        queues = metrics.MetricFamily('intelmq_queue_messages', 'gauge', 'Number of messages in the queue.')
+        queues.add(3, queue='test-queue')
+        queues.add(0, queue='test-queue-internal')
+        sent = metrics.MetricFamily('intelmq_bot_sent_messages', 'counter', 'Number of "sent" messages.')
+        sent.add(12, bot='test-bot', path='_default')
+        self.assertEqual(metrics.render([queues, sent]),
+                         '# TYPE intelmq_queue_messages gauge\n'
+                         '# HELP intelmq_queue_messages Number of messages in the queue.\n'
+                         'intelmq_queue_messages{queue="test-queue"} 3\n'
+                         'intelmq_queue_messages{queue="test-queue-internal"} 0\n'
+                         '# TYPE intelmq_bot_sent_messages counter\n'
+                         '# HELP intelmq_bot_sent_messages Number of \\"sent\\" messages.\n'
+                         'intelmq_bot_sent_messages_total{bot="test-bot",path="_default"} 12\n'
+                         '# EOF\n')
+
+    def test_values(self):
+        family = metrics.MetricFamily('test', 'gauge', 'Test')
+        family.add(1.0)
+        family.add(0.5, label='a\\b\n')
+        family.add(float('nan'))
+        self.assertEqual(family.render().splitlines()[2:],
+                         ['test 1', 'test{label="a\\\\b\\n"} 0.5', 'test NaN'])
+
+    def test_invalid_type(self):
+        with self.assertRaises(ValueError):
+            metrics.MetricFamily('test', 'histogram', 'Test')
+
+
+if __name__ == '__main__':  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,89 @@
+# SPDX-FileCopyrightText: 2026 Sebastian Wagner
+#
+# SPDX-License-Identifier: AGPL-3.0-or-later
+
+# -*- coding: utf-8 -*-
+"""
+Tests the CacheMixin and its local cache.
+"""
+import unittest
+from unittest import mock
+
+import intelmq.lib.test as test
+from intelmq.lib.mixins.cache import CacheMixin, LocalCache
+
+
+class TestLocalCache(unittest.TestCase):
+
+    def test_lru(self):
+        cache = LocalCache(size=2)
+        cache.set('a', '1')
+        cache.set('b', '2')
+        self.assertEqual(cache.get('a'), '1')
+        cache.set('c', '3')
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl(self):
+        cache = LocalCache(size=3, ttl=10)
+        with mock.patch('time.monotonic', return_value=100):
+            cache.set('a', '1', ttl=5)
+            cache.set('b', '2', ttl=100)
+            cache.set('c', '3')
+        with mock.patch('time.monotonic', return_value=106):
+            self.assertIsNone(cache.get('a'))
+            self.assertEqual(cache.get('b'), '2')
+        with mock.patch('time.monotonic', return_value=111):
+            self.assertIsNone(cache.get('b'))
+
+
+class DummyCache(CacheMixin):
+    redis_cache_db = 4
+    redis_cache_ttl = 100
+
+
+class DummyLocalCache(DummyCache):
+    redis_cache_local_size = 10
+
+
+@test.skip_redis()
+class TestCacheMixin(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = DummyCache()
+        self.cache.cache_flush()
+        self.redis = self.cache.cache_get_redis_instance()
+
+    def test_set_ttl(self):
+        self.cache.cache_set('a', 'foo')
+        self.cache.cache_set('b', 1, ttl=10)
+        self.cache.cache_set('c', 'bar', ttl=0)
+        self.assertEqual(self.cache.cache_get('a'), 'foo')
+        self.assertEqual(self.cache.cache_get('b'), '1')
+        self.assertTrue(90 < self.redis.ttl('a') <= 100)
+        self.assertTrue(0 < self.redis.ttl('b') <= 10)
+        self.assertEqual(self.redis.ttl('c'), -1)
+
+    def test_many(self):
+        self.cache.cache_set_many({'a': 'foo', 'b': 2}, ttl=10)
+        self.assertEqual(self.cache.cache_get_many(['b', 'x', 'a']), ['2', None, 'foo'])
+        self.assertTrue(0 < self.redis.ttl('a') <= 10)
+
+    def test_local(self):
+        cache = DummyLocalCache()
+        cache.cache_set('a', 'foo')
+        self.redis.delete('a')
+        self.assertEqual(cache.cache_get('a'), 'foo')
+        self.assertTrue(cache.cache_exists('a'))
+        self.redis.set('b', 'bar')
+        self.assertEqual(cache.cache_get_many(['a', 'b', 'c']), ['foo', 'bar', None])
+        self.redis.delete('b')
+        self.assertEqual(cache.cache_get('b'), 'bar')
+        self.assertIsNone(cache.cache_get('c'))
+        cache.cache_flush()
+        self.assertIsNone(cache.cache_get('a'))
+
+
+if __name__ == '__main__':  # pragma: no cover
+    unittest.main()
@@ -154,6 +154,16 @@ def test_default_fields_parameter(self):
         self.run_bot(allowed_error_count=2, parameters={"default_fields": {"protocol.application": "http"}})
         self.assertMessageEqual(0, output_message)
 
+    def test_default_fields_not_overwritten(self):
+        """ Default fields do not overwrite the values of the parser """
+        self.input_message = EXAMPLE_REPORT
+        output_message = EXAMPLE_EVENT.copy()
+        output_message["extra.tag"] = "test"
+        self.run_bot(allowed_error_count=2,
+                     parameters={"default_fields": {"classification.type": "spam", "extra": {"tag": "test"},
+                                                    "protocol.transport": ""}})
+        self.assertMessageEqual(0, output_message)
+
     def test_bad_default_fields_parameter(self):
         self.input_message = EXAMPLE_SHORT
         self.run_bot(allowed_error_count=4, allowed_warning_count=1,
@@ -248,6 +258,16 @@ def test_event(self):
         self.run_bot()
         self.assertMessageEqual(0, {**EXAMPLE_EVE_1, "raw": "MTkyLjAuMi4zLGJsbGFhCg=="})
 
+    def test_event_line_ending_strip(self):
+        """
+        Test the lazy decoding with surrounding whitespace, null characters and the CRLF line ending.
+        """
+        self.input_message = {**EXAMPLE_REPO_1,
+                              "raw": utils.base64_encode('\r\n  \r\n# ignore this\r\n192.0.2.3,bll\x00aa\r\n'
+                                                         '#ending line\r\n \r\n')}
+        self.run_bot()
+        self.assertMessageEqual(0, {**EXAMPLE_EVE_1, "raw": utils.base64_encode('192.0.2.3,bllaa\r\n')})
+
 
 EXAMPLE_JSON_STREAM_REPORT = {'__type': 'Report',
                               'raw': utils.base64_encode('''{"a": 1}
@@ -312,5 +332,32 @@ def test_dump(self):
         self.run_bot(allowed_error_count=2)
 
 
+class DummyProcessParserBot(bot.ParserBot):
+    """
+    A parser with its own process method, like many parsers of JSON documents.
+    """
+
+    def process(self):
+        report = self.receive_message()
+        event = self.new_event(report)
+        event['classification.type'] = 'other'
+        event.add('raw', report.get('raw'))
+        self.send_message(event)
+        self.acknowledge_message()
+
+
+class TestDummyProcessParserBot(test.BotTestCase, unittest.TestCase):
+    @classmethod
+    def set_bot(cls):
+        cls.bot_reference = DummyProcessParserBot
+        cls.default_input_message = EXAMPLE_REPORT
+
+    def test_event_template_freed(self):
+        """ The event template does not keep the report after it has been acknowledged """
+        self.run_bot()
+        self.assertEqual(self.get_output_queue()[0].count('"feed.name": "Example"'), 1)
+        self.assertIsNone(self.bot._ParserBot__event_template)
+
+
 if __name__ == '__main__':  # pragma: no cover
     unittest.main()
@@ -14,6 +14,7 @@
 import logging
 import os
 import time
+import threading
 import unittest
 import sys
 
@@ -116,6 +117,17 @@ def test_acknowledge(self):
         self.assertEqual(self.pipe.count_queued_messages('test-bot-input')['test-bot-input'], 0)
         self.assertEqual(self.pipe.count_queued_messages('test-bot-input-internal')['test-bot-input-internal'], 0)
 
+    def test_receive_batch(self):
+        self.pipe.state['test-bot-input'] = [SAMPLES['normal'][0], SAMPLES['unicode'][0], SAMPLES['normal'][0]]
+        self.assertEqual(self.pipe.receive_batch(2), [SAMPLES['normal'][0], SAMPLES['unicode'][0]])
+        self.assertTrue(self.pipe._has_message)
+        self.pipe.acknowledge()
+        self.assertTrue(self.pipe._has_message)
+        self.pipe.acknowledge()
+        self.assertFalse(self.pipe._has_message)
+        self.assertEqual(self.pipe.count_queued_messages('test-bot-input', 'test-bot-input-internal'),
+                         {'test-bot-input': 1, 'test-bot-input-internal': 0})
+
     def test_bad_encoding_and_pop(self):
         self.pipe.state['test-bot-input'] = [SAMPLES['badencoding']]
         try:
@@ -135,6 +147,7 @@ class TestRedis(unittest.TestCase):
     """
     We use the queue 'test' for both source and destination
     """
+    pipeline_args = {}
 
     def setUp(self):
         params = {}
@@ -144,6 +157,7 @@ def setUp(self):
         params['destination_pipeline_host'] = os.getenv('INTELMQ_PIPELINE_HOST', 'localhost')
         params['destination_pipeline_password'] = os.getenv('INTELMQ_TEST_REDIS_PASSWORD')
         params['destination_pipeline_db'] = 4
+        params.update(self.pipeline_args)
         logger = logging.getLogger('foo')
         logger.addHandler(logging.NullHandler())
         self.pipe = pipeline.PipelineFactory.create(logger, broker='Redis', pipeline_args=params)
@@ -204,11 +218,228 @@ def test_bad_encoding_and_pop(self):
         self.assertEqual(self.pipe.count_queued_messages('test-bot-input')['test-bot-input'], 0)
         self.assertEqual(self.pipe.count_queued_messages('test-bot-input-internal')['test-bot-input-internal'], 0)
 
+    def test_receive_batch(self):
+        self.clear()
+        for i in range(3):
+            self.pipe.send(str(i))
+        self.pipe.flush()
+        self.assertEqual(self.pipe.receive_batch(2), [b'0', b'1'])
+        self.pipe.acknowledge()
+        self.assertTrue(self.pipe._has_message)
+        self.pipe.acknowledge()
+        self.assertFalse(self.pipe._has_message)
+        self.assertEqual(self.pipe.receive_batch(2), [b'2'])
+        self.pipe.acknowledge()
+        self.assertEqual(self.pipe.count_queued_messages('test', 'test-internal'),
+                         {'test': 0, 'test-internal': 0})
+
+    def test_receive_batch_linger(self):
+        """ Waits for further messages until the batch is full or the time is up """
+        self.clear()
+        self.pipe.send('0')
+        self.pipe.flush()
+        timer = threading.Timer(0.05, lambda: [self.pipe.pipe.lpush('test', message) for message in ('1', '2', '3')])
+        timer.start()
+        self.assertEqual(self.pipe.receive_batch(3, linger=10), [b'0', b'1', b'2'])
+        timer.join()
+        for _ in range(3):
+            self.pipe.acknowledge()
+        start = time.monotonic()
+        self.assertEqual(self.pipe.receive_batch(3, linger=0.05), [b'3'])
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.pipe.acknowledge()
+        self.assertEqual(self.pipe.count_queued_messages('test', 'test-internal'),
+                         {'test': 0, 'test-internal': 0})
+
     def tearDown(self):
         self.pipe.disconnect()
         self.clear()
 
 
+@test.skip_redis()
+class TestRedisBatch(TestRedis):
+    """
+    Runs all Redis tests with batched receiving and acknowledging
+    """
+    pipeline_args = {'source_pipeline_batch_size': 3}
+
+    def test_batch_receive(self):
+        self.clear()
+        for i in range(5):
+            self.pipe.send(str(i))
+        self.assertEqual('0', self.pipe.receive())
+        self.assertEqual(self.pipe.count_queued_messages('test', 'test-internal'),
+                         {'test': 2, 'test-internal': 3})
+        self.pipe.acknowledge()
+        self.assertEqual('1', self.pipe.receive())
+        self.pipe.acknowledge()
+        # acknowledged messages stay in the internal queue until the batch is completed
+        self.assertEqual(self.pipe.count_queued_messages('test-internal'), {'test-internal': 3})
+        self.assertEqual('2', self.pipe.receive())
+        self.pipe.acknowledge()
+        self.assertEqual(self.pipe.count_queued_messages('test', 'test-internal'),
+                         {'test': 2, 'test-internal': 0})
+        self.assertEqual('3', self.pipe.receive())
+        self.pipe.acknowledge()
+        self.assertEqual('4', self.pipe.receive())
+        self.pipe.acknowledge()
+        self.assertEqual(self.pipe.count_queued_messages('test', 'test-internal'),
+                         {'test': 0, 'test-internal': 0})
+
+    def test_batch_recover_internal_queue(self):
+        """ Unacknowledged messages of an interrupted batch are processed first """
+        self.clear()
+        for i in range(4):
+            self.pipe.send(str(i))
+        self.assertEqual('0', self.pipe.receive())
+        self.pipe.acknowledge()
+        self.assertEqual('1', self.pipe.receive())
+        self.pipe.disconnect()
+        self.pipe._has_message = False
+        self.pipe.connect()
+        self.assertEqual(self.pipe.count_queued_messages('test', 'test-internal'),
+                         {'test': 1, 'test-internal': 2})
+        self.assertEqual('1', self.pipe.receive())
+        self.pipe.acknowledge()
+        self.assertEqual('2', self.pipe.receive())
+        self.pipe.acknowledge()
+        self.assertEqual('3', self.pipe.receive())
+        self.pipe.acknowledge()
+        self.assertEqual(self.pipe.count_queued_messages('test', 'test-internal'),
+                         {'test': 0, 'test-internal': 0})
+
+
+@test.skip_redis()
+class TestRedisInstances(unittest.TestCase):
+    """
+    Multiple process instances of a bot share the source queue, each has its own internal queue
+    """
+
+    def setUp(self):
+        params = {'source_pipeline_host': os.getenv('INTELMQ_PIPELINE_HOST', 'localhost'),
+                  'source_pipeline_password': os.getenv('INTELMQ_TEST_REDIS_PASSWORD'),
+                  'source_pipeline_db': 4,
+                  'destination_pipeline_host': os.getenv('INTELMQ_PIPELINE_HOST', 'localhost'),
+                  'destination_pipeline_password': os.getenv('INTELMQ_TEST_REDIS_PASSWORD'),
+                  'destination_pipeline_db': 4}
+        logger = logging.getLogger('foo')
+        logger.addHandler(logging.NullHandler())
+        self.pipes = []
+        for instance_id in ('0', '1'):
+            pipe = pipeline.PipelineFactory.create(logger, broker='Redis', pipeline_args=params,
+                                                   direction='source', queues='test',
+                                                   instance_id=instance_id)
+            pipe.set_queues('test', 'destination')
+            pipe.connect()
+            self.pipes.append(pipe)
+        self.clear()
+
+    def clear(self):
+        for queue in ('test', 'test-internal.0', 'test-internal.1'):
+            self.pipes[0].clear_queue(queue)
+
+    def test_instance_internal_queues(self):
+        self.assertEqual([pipe.internal_queue for pipe in self.pipes], ['test-internal.0', 'test-internal.1'])
+        self.pipes[0].send(SAMPLES['normal'][0])
+        self.pipes[0].send(SAMPLES['unicode'][0])
+        self.assertEqual(SAMPLES['normal'][1], self.pipes[0].receive())
+        self.assertEqual(SAMPLES['unicode'][1], self.pipes[1].receive())
+        self.assertEqual(self.pipes[0].count_queued_messages('test', 'test-internal.0', 'test-internal.1'),
+                         {'test': 0, 'test-internal.0': 1, 'test-internal.1': 1})
+        self.pipes[1].acknowledge()
+        self.assertEqual(self.pipes[0].count_queued_messages('test-internal.0', 'test-internal.1'),
+                         {'test-internal.0': 1, 'test-internal.1': 0})
+
+    def tearDown(self):
+        self.clear()
+        for pipe in self.pipes:
+            pipe.disconnect()
+
+
+@test.skip_redis()
+class TestRedisBufferedSend(TestRedis):
+    """
+    Sending with a send buffer
+    """
+    pipeline_args = {'destination_pipeline_batch_size': 3}
+
+    def test_send_receive(self):
+        self.clear()
+        self.pipe.send(SAMPLES['normal'][0])
+        self.pipe.flush()
+        self.assertEqual(SAMPLES['normal'][1], self.pipe.receive())
+
+    def test_send_receive_unicode(self):
+        self.clear()
+        self.pipe.send(SAMPLES['unicode'][1])
+        self.pipe.flush()
+        self.assertEqual(SAMPLES['unicode'][1], self.pipe.receive())
+
+    def test_count(self):
+        self.clear()
+        self.pipe.send(SAMPLES['normal'][0])
+        self.pipe.send(SAMPLES['normal'][1])
+        self.assertEqual(self.pipe.count_queued_messages('test'), {'test': 0})
+        self.pipe.send(SAMPLES['unicode'][0])
+        # buffer is full and flushed automatically
+        self.assertEqual(self.pipe.count_queued_messages('test'), {'test': 3})
+
+    def test_has_message(self):
+        self.pipe.send(SAMPLES['normal'][0])
+        self.pipe.flush()
+        self.pipe.receive()
+        self.assertTrue(self.pipe._has_message)
+
+    def test_reject(self):
+        self.pipe.send(SAMPLES['normal'][0])
+        self.pipe.flush()
+        self.pipe.receive()
+        self.pipe.reject_message()
+        self.assertEqual(SAMPLES['normal'][1], self.pipe.receive())
+
+    def test_acknowledge(self):
+        self.pipe.send(SAMPLES['normal'][0])
+        self.pipe.flush()
+        self.pipe.receive()
+        self.pipe.acknowledge()
+        self.assertEqual(self.pipe.count_queued_messages('test')['test'], 0)
+        self.assertEqual(self.pipe.count_queued_messages('test-internal')['test-internal'], 0)
+
+    def test_bad_encoding_and_pop(self):
+        self.pipe.send(SAMPLES['badencoding'])
+        self.pipe.flush()
+        try:
+            self.pipe.receive()
+        except exceptions.DecodingError:
+            pass
+        self.pipe.acknowledge()
+
+    def test_order_and_load_balance(self):
+        """ Buffered messages keep their order, the load balancing iterator continues to work """
+        self.pipe.set_queues(['test', 'test-2'], 'destination')
+        self.pipe.load_balance = True
+        self.clear()
+        self.pipe.clear_queue('test-2')
+        for i in range(4):
+            self.pipe.send(str(i))
+        self.pipe.flush()
+        self.assertEqual(self.pipe.count_queued_messages('test', 'test-2'),
+                         {'test': 2, 'test-2': 2})
+        self.assertEqual('0', self.pipe.receive())
+        self.pipe.acknowledge()
+        self.assertEqual('2', self.pipe.receive())
+        self.pipe.acknowledge()
+        self.pipe.clear_queue('test-2')
+
+    def test_path_permissive(self):
+        self.clear()
+        self.pipe.send(SAMPLES['normal'][0], path='other', path_permissive=True)
+        self.pipe.flush()
+        self.assertEqual(self.pipe.count_queued_messages('test'), {'test': 0})
+        with self.assertRaises(exceptions.PipelineError):
+            self.pipe.send(SAMPLES['normal'][0], path='other')
+
+
 @test.skip_exotic()
 class TestAmqp(unittest.TestCase):
 
@@ -290,5 +521,63 @@ def tearDown(self):
         self.pipe.disconnect()
 
 
+@test.skip_exotic()
+class TestAmqpBatch(unittest.TestCase):
+    """
+    Tests the batched acknowledging and the transactional sending of the AMQP pipeline.
+    """
+
+    def setUp(self):
+        logger = logging.getLogger('foo')
+        logger.addHandler(logging.NullHandler())
+
+        self.pipe = pipeline.PipelineFactory.create(logger=logger, broker='Amqp',
+                                                    pipeline_args={'source_pipeline_host': '127.0.0.1',
+                                                                   'destination_pipeline_host': '127.0.0.1',
+                                                                   'source_pipeline_batch_size': 3,
+                                                                   'destination_pipeline_batch_size': 3})
+        self.pipe.set_queues('test-batch', 'source')
+        self.pipe.set_queues('test-batch', 'destination')
+        self.pipe.connect()
+        self.pipe.clear_queue('test-batch')
+        self.pipe.connect()
+
+    def test_receive_batch(self):
+        for sample in ('1', '2', '3', '4'):
+            self.pipe.send(sample)
+        self.pipe.flush()
+        time.sleep(0.1)  # let the broker deliver the prefetched messages
+        self.assertEqual([b'1', b'2', b'3'], self.pipe.receive_batch(3))
+        for _ in range(3):
+            self.pipe.acknowledge()
+        self.assertEqual(self.pipe._acknowledged_count, 0)
+        self.assertEqual(self.pipe.receive_batch(3), [b'4'])
+        self.pipe.acknowledge()
+
+    def test_reject_batch(self):
+        self.pipe.send('1')
+        self.pipe.send('2')
+        self.pipe.flush()
+        time.sleep(0.1)
+        self.assertEqual([b'1', b'2'], self.pipe.receive_batch(3))
+        self.pipe.acknowledge()
+        self.pipe.reject_message()
+        self.assertEqual([b'2'], self.pipe.receive_batch(3))
+        self.pipe.acknowledge()
+
+    def test_send_transaction(self):
+        """ Messages are only published when the transaction is committed """
+        self.pipe.send('1')
+        self.assertEqual(len(self.pipe._unconfirmed), 1)
+        self.pipe.flush()
+        self.assertEqual(self.pipe._unconfirmed, [])
+        self.assertEqual('1', self.pipe.receive())
+        self.pipe.acknowledge()
+
+    def tearDown(self):
+        self.pipe.clear_queue('test-batch')
+        self.pipe.disconnect()
+
+
 if __name__ == '__main__':  # pragma: no cover
     unittest.main()
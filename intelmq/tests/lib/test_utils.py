@@ -82,6 +82,34 @@ def test_encode_unicode(self):
         self.assertEqual(SAMPLES['unicode'][0],
                          utils.encode(SAMPLES['unicode'][1]))
 
+    def test_base64_decode_stream(self):
+        """ Test the decoding in chunks, also splitting multi-byte characters. """
+        text = 'lörem\r\nipsum\ndolor\rsit\n' * 10
+        for chunk_size in (1, 2, 5, 1000):
+            self.assertEqual(list(utils.base64_decode_stream(utils.base64_encode(text), chunk_size)),
+                             ['lörem\r\n', 'ipsum\n', 'dolor\r', 'sit\n'] * 10)
+
+    def test_base64_decode_stream_invalid(self):
+        """ Invalid characters are ignored, like base64_decode does. """
+        self.assertEqual(utils.base64_decode_stream('Zm9v\nYmFy\n').read(), 'foobar')
+        self.assertEqual(utils.base64_decode_stream(utils.base64_encode(b'fo\xe4bar')).read(), 'fobar')
+
+    def test_iter_json_array(self):
+        """ Test the incremental parsing with elements split over chunks. """
+        data = [1, -2.5e-3, 'foo"bar', None, True, {'a': [1, {}]}, [], 1234567890]
+        for chunk_size in (1, 3, 1000):
+            for indent in (None, 2):
+                self.assertEqual(list(utils.iter_json_array(io.StringIO(json.dumps(data, indent=indent) + '\n'),
+                                                            chunk_size)),
+                                 data)
+        self.assertEqual(list(utils.iter_json_array(io.StringIO(' [] '))), [])
+        self.assertEqual(list(utils.iter_json_array(io.StringIO('{"a": 1}'))), ['a'])
+
+    def test_iter_json_array_invalid(self):
+        for data in ('[1,]', '[1 2]', '[1', '[1] 2', '[,1]', '[1.2.3]'):
+            with self.subTest(data=data), self.assertRaises(json.JSONDecodeError):
+                list(utils.iter_json_array(io.StringIO(data), 2))
+
     def test_decode_ascii(self):
         """ Test ASCII decoding enforcement. """
         self.assertEqual('fobar',
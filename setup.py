@@ -62,6 +62,8 @@
     test_suite='intelmq.tests',
     extras_require={
         'development': TESTS_REQUIRES + DOCS_REQUIRES,
+        'msgpack': ['msgpack'],
+        'msgpack-zstd': ['msgpack', 'zstandard'],
     },
     packages=find_packages(),
     include_package_data=True,